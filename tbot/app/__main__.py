@@ -1,8 +1,8 @@
+import threading
 import traceback
 from datetime import datetime
 
 from tbot.candles import Candle, CandlePeriod, CandleSeries
-from tbot.platforms.ibkr import IBWrapper
 from tbot.symbol_manager import SymbolManager, SymbolSubscriber
 from tbot.util import log
 
@@ -13,6 +13,9 @@ LOGGER.setLevel("DEBUG")
 
 PD = CandlePeriod("3m")
 
+# Candles each feed keeps beyond what its subscribers' indicators need
+FEED_MARGIN = 100
+
 EXCHANGE_LOOKUP = {
     # Metals
     "HG": "COMEX",
@@ -79,12 +82,19 @@ class App:
         This description is left intentionally vague because I don't know what this class needs
     """
 
-    def __init__(self):
-        """Initialize the application."""
-        self.mgr = SymbolManager()
+    def __init__(self, stream=False):
+        """Initialize the application.
+
+        :param bool stream: If True, the web API is started in the background and streams the live feeds
+        """
+        self.mgr = SymbolManager(margin=FEED_MARGIN)
+        self.stream = stream
 
     def run(self):
         """Run the application."""
+        # ib_insync is slow to import, so only load it once the application runs
+        from tbot.platforms.ibkr import IBWrapper
+
         ib = IBWrapper(self.mgr)
 
         try:
@@ -107,10 +117,21 @@ class App:
                         )
                     )
 
-                # Register a strategy
+                # Register a strategy. The feed is then sized to what the strategy needs.
                 notes_listener = Notes(symbol, PD)
                 self.mgr.add_subscriber(notes_listener)
-                self.mgr.add_feed(symbol, PD, CandleSeries(PD, candles, 500))
+                self.mgr.add_feed(
+                    symbol, PD, CandleSeries(PD, candles, max(len(candles), 2))
+                )
+
+            # Serve the live feeds to web clients
+            if self.stream:
+                from tbot.web import api
+
+                api.attach_manager(self.mgr)
+                threading.Thread(
+                    target=api.run, kwargs={"debug": False}, daemon=True
+                ).start()
 
             # Run
             LOGGER.info("Running Event loop")
@@ -0,0 +1,23 @@
+from .broker import Order, SimBroker
+from .engine import BacktestEngine, BacktestResult
+from .ledger import TRADE_DTYPE, EquityLedger, TradeLedger
+from .portfolio import Portfolio, align
+from .strategy import Strategy
+from .sweep import ParameterSweep, SharedCandles, load_results, param_grid
+
+__all__ = [
+    "BacktestEngine",
+    "BacktestResult",
+    "EquityLedger",
+    "Order",
+    "ParameterSweep",
+    "Portfolio",
+    "SharedCandles",
+    "SimBroker",
+    "Strategy",
+    "TRADE_DTYPE",
+    "TradeLedger",
+    "align",
+    "load_results",
+    "param_grid",
+]
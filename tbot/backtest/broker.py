@@ -0,0 +1,211 @@
+from .ledger import TradeLedger
+
+
+class Order:
+    """Class to represent an order waiting to be filled by the simulated broker."""
+
+    __slots__ = ("symbol", "qty", "limit", "time_ms")
+
+    def __init__(self, symbol, qty, limit=None, time_ms=0):
+        """Initialize the order.
+
+        :param str symbol: The symbol to trade
+        :param float qty: The signed quantity to trade. Positive to buy and negative to sell
+        :param float limit: The worst price to accept. If None, the order is a market order
+        :param int time_ms: Time the order was placed, in milliseconds since the epoch
+        """
+        self.symbol = symbol
+        self.qty = qty
+        self.limit = limit
+        self.time_ms = time_ms
+
+
+class SimBroker:
+    """Class to simulate order fills against historical candles.
+
+    Orders are filled on the next candle of their symbol that opens at or after the time the order was placed, so a
+    candle of a longer period that was already forming when the order was placed never fills it. Market orders fill at the open, adjusted by the slippage. Limit
+    orders fill at the better of the open and the limit if the candle trades through the limit, and otherwise stay
+    pending.
+    """
+
+    def __init__(self, cash, commission=0.0, slippage=0.0, trade_capacity=1024):
+        """Initialize the broker.
+
+        :param float cash: The starting cash balance
+        :param float commission: The commission charged per unit traded
+        :param float slippage: The fraction of the price lost on every market order fill
+        :param int trade_capacity: The number of fills to pre-allocate in the trade ledger
+        """
+        self.cash = cash
+        self.commission = commission
+        self.slippage = slippage
+        self.ledger = TradeLedger(trade_capacity)
+
+        # The time new orders are placed at, in milliseconds since the epoch. The backtest engine sets it to the close
+        # time of each candle before its subscribers run.
+        self.time_ms = 0
+
+        self._symbol_inds = {}
+        self._positions = {}
+        self._prices = {}
+        self._pending = {}
+
+        # The market value of every position and the number of open positions, kept up to date by _fill and mark
+        self._value = 0.0
+        self._open = 0
+
+    @property
+    def symbols(self):
+        """Return the symbols known to the broker, in the order of their index in the trade ledger.
+
+        :rtype: list[str]
+        """
+        return list(self._symbol_inds)
+
+    def add_symbol(self, symbol):
+        """Register a symbol that can be traded.
+
+        :param str symbol: The symbol
+        :return: The index of the symbol in the trade ledger
+        :rtype: int
+        """
+        if symbol not in self._symbol_inds:
+            self._symbol_inds[symbol] = len(self._symbol_inds)
+            self._positions[symbol] = 0.0
+        return self._symbol_inds[symbol]
+
+    def position(self, symbol):
+        """Return the current position in a symbol.
+
+        :param str symbol: The symbol
+        :rtype: float
+        """
+        return self._positions.get(symbol, 0.0)
+
+    def pending(self, symbol):
+        """Return the orders waiting to be filled for a symbol.
+
+        :param str symbol: The symbol
+        :rtype: list[Order]
+        """
+        return self._pending.get(symbol, [])
+
+    def submit(self, symbol, qty, limit=None):
+        """Submit an order to be filled on the next candle of its symbol that opens after it's placed.
+
+        :param str symbol: The symbol to trade
+        :param float qty: The signed quantity to trade. Positive to buy and negative to sell
+        :param float limit: The worst price to accept. If None, the order is a market order
+        :rtype: Order
+        """
+        if qty == 0:
+            raise ValueError("Order quantity must not be 0")
+
+        self.add_symbol(symbol)
+        order = Order(symbol, qty, limit, self.time_ms)
+        self._pending.setdefault(symbol, []).append(order)
+        return order
+
+    def cancel_all(self, symbol):
+        """Cancel every pending order for a symbol.
+
+        :param str symbol: The symbol
+        """
+        self._pending.pop(symbol, None)
+
+    def _fill(self, order, time_ms, price):
+        symbol = order.symbol
+        commission = abs(order.qty) * self.commission
+        self.cash -= order.qty * price + commission
+
+        # Revalue the existing position at the fill price, then add the fill to it
+        old_qty = self._positions[symbol]
+        if old_qty != 0:
+            self._value += old_qty * (price - self._prices[symbol])
+        new_qty = old_qty + order.qty
+        self._value += order.qty * price
+        self._positions[symbol] = new_qty
+        self._prices[symbol] = price
+
+        if old_qty == 0:
+            self._open += 1
+        elif new_qty == 0:
+            self._open -= 1
+            if self._open == 0:
+                # Nothing is held, so drop any accumulated rounding error
+                self._value = 0.0
+
+        self.ledger.record(
+            time_ms, self._symbol_inds[symbol], order.qty, price, commission
+        )
+
+    def fill(self, symbol, time_ms, c_open, c_high, c_low):
+        """Fill the pending orders of a symbol against a new candle.
+
+        :param str symbol: The symbol of the candle
+        :param int time_ms: Time of the candle, in milliseconds since the epoch
+        :param float c_open: Open price of the candle
+        :param float c_high: High price of the candle
+        :param float c_low: Low price of the candle
+        """
+        orders = self._pending.pop(symbol, None)
+        if orders is None:
+            return
+
+        remaining = []
+        for order in orders:
+            if time_ms < order.time_ms:
+                # The candle opened before the order was placed, so filling at its open would look into the past
+                remaining.append(order)
+            elif order.limit is None:
+                # Slippage always works against the order
+                sign = 1.0 if order.qty > 0 else -1.0
+                self._fill(order, time_ms, c_open * (1.0 + sign * self.slippage))
+            elif order.qty > 0 and c_low <= order.limit:
+                self._fill(order, time_ms, min(c_open, order.limit))
+            elif order.qty < 0 and c_high >= order.limit:
+                self._fill(order, time_ms, max(c_open, order.limit))
+            else:
+                remaining.append(order)
+
+        if len(remaining) > 0:
+            self._pending[symbol] = remaining
+
+    def mark(self, symbol, price):
+        """Update the price used to value a symbol's position.
+
+        :param str symbol: The symbol
+        :param float price: The latest price
+        """
+        qty = self._positions.get(symbol, 0.0)
+        if qty != 0:
+            self._value += qty * (price - self._prices[symbol])
+        self._prices[symbol] = price
+
+    @property
+    def has_pending(self):
+        """Return True if any order is waiting to be filled.
+
+        :rtype: bool
+        """
+        return len(self._pending) > 0
+
+    @property
+    def has_positions(self):
+        """Return True if any position is open.
+
+        :rtype: bool
+        """
+        return self._open > 0
+
+    @property
+    def equity(self):
+        """Return the cash balance plus the market value of every position.
+
+        :rtype: float
+
+        .. note::
+            The market value is maintained as fills and marks arrive, so this doesn't loop over positions.
+        """
+        return self.cash + self._value
@@ -0,0 +1,328 @@
+import time
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+from tbot.candles import Candle, CandleSeries
+from tbot.symbol_manager import SymbolManager
+from tbot.util import log
+
+from .broker import SimBroker
+from .ledger import EquityLedger
+
+LOGGER = log.get_logger()
+
+
+class BacktestResult:
+    """Class to hold the ledgers and throughput of a completed backtest."""
+
+    def __init__(self, symbols, equity, trades, initial_cash, elapsed):
+        """Initialize the backtest result.
+
+        :param list[str] symbols: The traded symbols. The symbol field of each trade is an index into this list.
+        :param EquityLedger equity: The equity recorded after every bar
+        :param numpy.ndarray trades: The fills, with the fields of tbot.backtest.ledger.TRADE_DTYPE
+        :param float initial_cash: The starting cash balance
+        :param float elapsed: The wall-clock duration of the backtest, in seconds
+        """
+        self.symbols = symbols
+        self.equity = equity
+        self.trades = trades
+        self.initial_cash = initial_cash
+        self.elapsed = elapsed
+
+    @property
+    def bars(self):
+        """Return the number of bars processed.
+
+        :rtype: int
+        """
+        return len(self.equity)
+
+    @property
+    def bars_per_sec(self):
+        """Return the number of bars processed per second of wall-clock time.
+
+        :rtype: float
+        """
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bars / self.elapsed
+
+    @property
+    def final_equity(self):
+        """Return the equity after the last bar.
+
+        :rtype: float
+        """
+        if self.bars == 0:
+            return self.initial_cash
+        return float(self.equity.equity[-1])
+
+    @property
+    def total_return(self):
+        """Return the change in equity over the backtest, as a fraction of the starting cash.
+
+        :rtype: float
+        """
+        return self.final_equity / self.initial_cash - 1.0
+
+    def to_json_dict(self):
+        """Return a JSON-serializable dictionary representation of the result.
+
+        :rtype: dictionary
+        """
+        return {
+            "bars": self.bars,
+            "trades": len(self.trades),
+            "elapsed": self.elapsed,
+            "bars_per_sec": self.bars_per_sec,
+            "final_equity": self.final_equity,
+            "total_return": self.total_return,
+        }
+
+    def __str__(self):
+        """Return a string representation of the result."""
+        stats = self.to_json_dict()
+        ret_str = ""
+        ret_str += f"Bars: {stats['bars']}, "
+        ret_str += f"Trades: {stats['trades']}, "
+        ret_str += f"Elapsed: {stats['elapsed']:.3f}s, "
+        ret_str += f"Bars/sec: {stats['bars_per_sec']:.1f}, "
+        ret_str += f"Return: {stats['total_return'] * 100:.2f}%"
+        return ret_str
+
+
+class BacktestEngine:
+    """Class to run strategies against stored candles.
+
+    Candles are fed through a SymbolManager exactly as a live platform would feed them, so strategies, subscribers and
+    indicators run unchanged. The candles of every feed are merged into a single stream ordered by the time each candle
+    closes. For each candle, pending orders for its symbol are filled at its open, then the feed is updated, and then the
+    account equity is recorded. Orders are placed at the close time of the candle their strategy was updated with, and
+    only fill on candles that open at or after that time.
+
+    To keep the per-candle cost low, candles are stored as arrays until they're needed. Feeds that no subscriber listens
+    to never build Candle objects or go through the SymbolManager, order matching only runs for symbols with pending
+    orders, and positions are valued incrementally rather than by looping over every holding.
+    """
+
+    def __init__(
+        self, cash=100000.0, commission=0.0, slippage=0.0, warmup=1, max_candles=500
+    ):
+        """Initialize the backtest engine.
+
+        :param float cash: The starting cash balance
+        :param float commission: The commission charged per unit traded
+        :param float slippage: The fraction of the price lost on every market order fill
+        :param int warmup: The number of candles of each feed given to the SymbolManager as history, before trading begins
+        :param int max_candles: The number of candles each feed keeps in memory. Indicators are calculated on this window.
+        """
+        if warmup < 1:
+            raise ValueError(f"warmup must be at least 1. Got {warmup}")
+
+        self.mgr = SymbolManager()
+        self.broker = SimBroker(cash, commission=commission, slippage=slippage)
+        self.initial_cash = cash
+        self.warmup = warmup
+        self.max_candles = max_candles
+
+        self._feeds = []
+        self._columns = []
+        self._strategies = []
+
+    def add_feed(self, symbol, period, candles, columns=None):
+        """Add the candles of a feed to the backtest.
+
+        :param str symbol: The symbol name
+        :param CandlePeriod period: The candle period
+        :param candles: The candles of the feed, in ascending chronological order. Either a CandleSeries, a list of
+            candles, or a dictionary of columns in the format of CandleStore.load_arrays
+        :param dict columns: The same columns as Python lists, as returned by to_columns(). Passing them shares one
+            conversion between every backtest of the feed, such as in a parameter sweep. If None, the columns are
+            converted when the backtest runs.
+        """
+        if isinstance(candles, dict):
+            arrays = {col: np.asarray(candles[col]) for col in candles}
+        else:
+            arrays = {
+                "time": [int(c.time.timestamp() * 1000) for c in candles],
+                "open": [c.open for c in candles],
+                "high": [c.high for c in candles],
+                "low": [c.low for c in candles],
+                "close": [c.close for c in candles],
+                "volume": [c.volume for c in candles],
+            }
+            arrays = {col: np.asarray(arrays[col]) for col in arrays}
+
+        self.broker.add_symbol(symbol)
+        self._feeds.append((symbol, period, arrays))
+        self._columns.append(columns)
+
+    @property
+    def feeds(self):
+        """Return the feeds added to the backtest.
+
+        :return: A list of (symbol, period, arrays) tuples, where arrays is a dictionary of columns in the format of
+            CandleStore.load_arrays
+        :rtype: list[tuple]
+        """
+        return list(self._feeds)
+
+    def add_store_feed(self, store, symbol, period):
+        """Add a feed stored in a CandleStore to the backtest.
+
+        :param CandleStore store: The store to load candles from
+        :param str symbol: The symbol name
+        :param CandlePeriod period: The candle period
+        """
+        self.add_feed(symbol, period, store.load_arrays(symbol, period))
+
+    def add_strategy(self, strategy):
+        """Add a strategy to the backtest.
+
+        :param SymbolSubscriber strategy: The strategy. If it has a broker attribute, such as a Strategy, it is attached
+            to the simulated broker.
+        """
+        if hasattr(strategy, "broker"):
+            strategy.broker = self.broker
+        self._strategies.append(strategy)
+        self.mgr.add_subscriber(strategy)
+
+    @classmethod
+    def to_columns(cls, arrays):
+        """Convert the columns of a feed to Python lists, which the backtest loop reads from.
+
+        Indexing a list is much cheaper than indexing a NumPy array, so run() reads every candle from lists.
+
+        :param dict arrays: A dictionary of columns in the format of CandleStore.load_arrays
+        :return: A dictionary of (column -> list)
+        :rtype: dict
+        """
+        return {col: arrays[col].tolist() for col in arrays}
+
+    @classmethod
+    def _to_candle(cls, period, arrays, ind):
+        return Candle(
+            period,
+            datetime.fromtimestamp(arrays["time"][ind] / 1000, tz=pytz.utc),
+            float(arrays["open"][ind]),
+            float(arrays["high"][ind]),
+            float(arrays["low"][ind]),
+            float(arrays["close"][ind]),
+            float(arrays["volume"][ind]),
+        )
+
+    @classmethod
+    def _period_ms(cls, period):
+        # Activity-based candles have no fixed duration, so they're treated as closing when they open
+        return int(period.size * 1000) if period.is_time_based() else 0
+
+    @classmethod
+    def _close_ms(cls, period, arrays, ind):
+        return int(arrays["time"][ind]) + cls._period_ms(period)
+
+    def _schedule(self):
+        """Return the order to process the candles of every feed in.
+
+        :return: The feed index and row of every candle after the warmup, ordered by close time
+        :rtype: tuple(numpy.ndarray, numpy.ndarray)
+        """
+        feed_inds = []
+        rows = []
+        close_times = []
+        durations = []
+        for feed_ind, (_, period, arrays) in enumerate(self._feeds):
+            period_ms = self._period_ms(period)
+            row = np.arange(self.warmup, len(arrays["time"]))
+            feed_inds.append(np.full(len(row), feed_ind))
+            rows.append(row)
+            close_times.append(arrays["time"][row].astype(np.int64) + period_ms)
+            durations.append(np.full(len(row), period_ms))
+
+        if len(feed_inds) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        feed_inds = np.concatenate(feed_inds)
+        rows = np.concatenate(rows)
+
+        # Ties are broken by longer periods first, so a candle that closes with a higher-period candle is updated after
+        # it, and then by the order the feeds were added in
+        order = np.lexsort(
+            (feed_inds, -np.concatenate(durations), np.concatenate(close_times))
+        )
+        return feed_inds[order], rows[order]
+
+    def run(self):
+        """Run the backtest.
+
+        :return: The equity and trade ledgers of the backtest
+        :rtype: BacktestResult
+        """
+        wall_start = time.perf_counter()
+
+        # Give each feed its warmup history. This runs the subscribers once, like a live platform connecting.
+        for symbol, period, arrays in self._feeds:
+            history = [
+                self._to_candle(period, arrays, i)
+                for i in range(min(self.warmup, len(arrays["time"])))
+            ]
+            if len(history) > 0:
+                self.broker.time_ms = self._close_ms(period, arrays, len(history) - 1)
+            self.mgr.add_feed(
+                symbol, period, CandleSeries(period, history, self.max_candles)
+            )
+            if len(history) > 0:
+                self.broker.mark(symbol, history[-1].close)
+
+        feed_inds, rows = self._schedule()
+        equity = EquityLedger(len(rows))
+
+        feeds = []
+        for (symbol, period, arrays), cols in zip(self._feeds, self._columns):
+            if cols is None:
+                cols = self.to_columns(arrays)
+            feeds.append(
+                (
+                    symbol,
+                    period,
+                    cols,
+                    self._period_ms(period),
+                    self.mgr.has_subscribers(symbol, period),
+                )
+            )
+
+        broker = self.broker
+        update_feed = self.mgr.update_feed
+        record = equity.record
+        to_candle = self._to_candle
+        for feed_ind, row in zip(feed_inds.tolist(), rows.tolist()):
+            symbol, period, cols, period_ms, has_subscribers = feeds[feed_ind]
+            time_ms = cols["time"][row]
+
+            if broker._pending and symbol in broker._pending:
+                broker.fill(
+                    symbol,
+                    time_ms,
+                    cols["open"][row],
+                    cols["high"][row],
+                    cols["low"][row],
+                )
+            if has_subscribers:
+                # Orders placed by the subscribers are placed as the candle closes
+                broker.time_ms = time_ms + period_ms
+                update_feed(symbol, period, to_candle(period, cols, row))
+
+            broker.mark(symbol, cols["close"][row])
+            record(time_ms, broker.cash, broker.cash + broker._value)
+
+        result = BacktestResult(
+            broker.symbols,
+            equity,
+            broker.ledger.trades,
+            self.initial_cash,
+            time.perf_counter() - wall_start,
+        )
+        LOGGER.info(f"Backtest finished. {result}")
+        return result
@@ -0,0 +1,96 @@
+import numpy as np
+
+TRADE_DTYPE = np.dtype(
+    [
+        ("time", np.int64),
+        ("symbol", np.int32),
+        ("qty", np.float64),
+        ("price", np.float64),
+        ("commission", np.float64),
+    ]
+)
+
+
+class EquityLedger:
+    """Class to record account equity at every bar of a backtest.
+
+    The arrays are allocated once, at the size of the backtest, so recording a bar never allocates.
+    """
+
+    def __init__(self, capacity):
+        """Initialize the ledger.
+
+        :param int capacity: The number of bars that will be recorded
+        """
+        self.time = np.empty(capacity, dtype=np.int64)
+        self.cash = np.empty(capacity, dtype=np.float64)
+        self.equity = np.empty(capacity, dtype=np.float64)
+        self._len = 0
+
+    def __len__(self):
+        """Return the number of bars recorded."""
+        return self._len
+
+    def record(self, time_ms, cash, equity):
+        """Record the state of the account after a bar.
+
+        :param int time_ms: Time of the bar, in milliseconds since the epoch
+        :param float cash: The cash balance
+        :param float equity: The cash balance plus the market value of all positions
+        """
+        ind = self._len
+        self.time[ind] = time_ms
+        self.cash[ind] = cash
+        self.equity[ind] = equity
+        self._len = ind + 1
+
+    def trim(self):
+        """Release the unused end of the arrays once the backtest is complete."""
+        self.time = self.time[: self._len]
+        self.cash = self.cash[: self._len]
+        self.equity = self.equity[: self._len]
+
+
+class TradeLedger:
+    """Class to record the fills of a backtest in a structured array.
+
+    Storage is allocated up front and doubled when it fills, so recording a fill is amortized constant time.
+    """
+
+    def __init__(self, capacity=1024):
+        """Initialize the ledger.
+
+        :param int capacity: The number of fills to allocate storage for
+        """
+        self._trades = np.empty(max(capacity, 1), dtype=TRADE_DTYPE)
+        self._len = 0
+
+    def __len__(self):
+        """Return the number of fills recorded."""
+        return self._len
+
+    def record(self, time_ms, symbol_ind, qty, price, commission):
+        """Record a fill.
+
+        :param int time_ms: Time of the fill, in milliseconds since the epoch
+        :param int symbol_ind: The index of the symbol that was traded
+        :param float qty: The signed quantity filled. Positive for buys and negative for sells
+        :param float price: The fill price
+        :param float commission: The commission paid on the fill
+        """
+        if self._len == len(self._trades):
+            grown = np.empty(2 * len(self._trades), dtype=TRADE_DTYPE)
+            grown[: self._len] = self._trades
+            self._trades = grown
+
+        self._trades[self._len] = (time_ms, symbol_ind, qty, price, commission)
+        self._len += 1
+
+    @property
+    def trades(self):
+        """Return the recorded fills.
+
+        :return: A view of the fills, with the fields of TRADE_DTYPE
+        :rtype: numpy.ndarray
+        """
+        return self._trades[: self._len]
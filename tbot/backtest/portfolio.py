@@ -0,0 +1,316 @@
+import numpy as np
+
+
+def align(feeds):
+    """Align the close prices of several feeds on a shared timestamp index.
+
+    :param list feeds: A list of (symbol, arrays) tuples, where arrays is a dictionary of columns in the format of
+        CandleStore.load_arrays
+    :return: The union of every feed's timestamps, and a (time x symbol) array of close prices. A symbol without a candle
+        at a timestamp carries its previous close forward. Timestamps before a symbol's first candle are NaN.
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+    times = np.unique(np.concatenate([arrays["time"] for _, arrays in feeds]))
+    close = np.full((len(times), len(feeds)), np.nan)
+    for col, (_, arrays) in enumerate(feeds):
+        close[np.searchsorted(times, arrays["time"]), col] = arrays["close"]
+
+    # Forward fill each column by pointing every row at the last row that had a price
+    rows = np.where(np.isnan(close), 0, np.arange(len(times))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    close = close[rows, np.arange(len(feeds))]
+    return times, close
+
+
+class Portfolio:
+    """Class to account for positions in many symbols over a backtest.
+
+    Every quantity is a NumPy array with one row per timestamp and, where it applies, one column per symbol. The
+    whole history is computed at once, so the cost doesn't grow with a Python loop over bars or positions.
+    """
+
+    def __init__(
+        self,
+        times,
+        symbols,
+        close,
+        positions,
+        cash_flows,
+        initial_cash,
+        multipliers=None,
+        margin_rates=None,
+    ):
+        """Initialize the portfolio.
+
+        :param numpy.ndarray times: The shared timestamp index, in milliseconds since the epoch
+        :param list[str] symbols: The symbols, in column order
+        :param numpy.ndarray close: A (time x symbol) array of the prices to value positions at
+        :param numpy.ndarray positions: A (time x symbol) array of the quantity held after each timestamp
+        :param numpy.ndarray cash_flows: A (time x symbol) array of the cash paid (negative) or received (positive) for
+            trades at each timestamp, including commission
+        :param float initial_cash: The starting cash balance
+        :param numpy.ndarray multipliers: The contract multiplier of each symbol, such as for futures. If None, 1 is used.
+        :param numpy.ndarray margin_rates: The fraction of each symbol's notional value held as margin. If None, 0 is used.
+        """
+        n_symbols = len(symbols)
+        self.times = np.asarray(times)
+        self.symbols = list(symbols)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.cash_flows = np.asarray(cash_flows, dtype=np.float64)
+        self.initial_cash = initial_cash
+        self.multipliers = (
+            np.ones(n_symbols)
+            if multipliers is None
+            else np.asarray(multipliers, dtype=np.float64)
+        )
+        self.margin_rates = (
+            np.zeros(n_symbols)
+            if margin_rates is None
+            else np.asarray(margin_rates, dtype=np.float64)
+        )
+
+        expected = (len(self.times), n_symbols)
+        for name in ("close", "positions", "cash_flows"):
+            if getattr(self, name).shape != expected:
+                raise ValueError(
+                    f"{name} must have a shape of {expected}. Got {getattr(self, name).shape}"
+                )
+
+    @classmethod
+    def from_trades(
+        cls,
+        times,
+        symbols,
+        close,
+        trades,
+        initial_cash,
+        multipliers=None,
+        margin_rates=None,
+    ):
+        """Create a portfolio from a ledger of fills.
+
+        :param numpy.ndarray times: The shared timestamp index, in milliseconds since the epoch
+        :param list[str] symbols: The symbols, in column order. The symbol field of each fill is an index into this list.
+        :param numpy.ndarray close: A (time x symbol) array of the prices to value positions at
+        :param numpy.ndarray trades: The fills, with the fields of tbot.backtest.ledger.TRADE_DTYPE. Each fill is placed
+            at the last timestamp at or before its time.
+        :param float initial_cash: The starting cash balance
+        :param numpy.ndarray multipliers: See __init__
+        :param numpy.ndarray margin_rates: See __init__
+        :rtype: Portfolio
+        """
+        shape = (len(times), len(symbols))
+        mult = np.ones(len(symbols)) if multipliers is None else np.asarray(multipliers)
+
+        rows = np.maximum(np.searchsorted(times, trades["time"], side="right") - 1, 0)
+        cols = trades["symbol"]
+        fills = np.zeros(shape)
+        np.add.at(fills, (rows, cols), trades["qty"])
+        cash_flows = np.zeros(shape)
+        np.add.at(
+            cash_flows,
+            (rows, cols),
+            -trades["qty"] * trades["price"] * mult[cols] - trades["commission"],
+        )
+
+        return cls(
+            times,
+            symbols,
+            close,
+            np.cumsum(fills, axis=0),
+            cash_flows,
+            initial_cash,
+            multipliers,
+            margin_rates,
+        )
+
+    @classmethod
+    def from_positions(
+        cls,
+        times,
+        symbols,
+        close,
+        positions,
+        initial_cash,
+        commission=0.0,
+        multipliers=None,
+        margin_rates=None,
+    ):
+        """Create a portfolio from target positions, such as the output of a vectorized signal.
+
+        :param numpy.ndarray times: The shared timestamp index, in milliseconds since the epoch
+        :param list[str] symbols: The symbols, in column order
+        :param numpy.ndarray close: A (time x symbol) array of prices. Trades are filled at these prices.
+        :param numpy.ndarray positions: A (time x symbol) array of the quantity to hold after each timestamp
+        :param float initial_cash: The starting cash balance
+        :param float commission: The commission charged per unit traded
+        :param numpy.ndarray multipliers: See __init__
+        :param numpy.ndarray margin_rates: See __init__
+        :rtype: Portfolio
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        mult = np.ones(len(symbols)) if multipliers is None else np.asarray(multipliers)
+
+        fills = np.diff(positions, axis=0, prepend=0.0)
+        prices = np.nan_to_num(close)
+        cash_flows = -fills * prices * mult - np.abs(fills) * commission
+
+        return cls(
+            times,
+            symbols,
+            close,
+            positions,
+            cash_flows,
+            initial_cash,
+            multipliers,
+            margin_rates,
+        )
+
+    @classmethod
+    def from_backtest(cls, engine, result, multipliers=None, margin_rates=None):
+        """Create a portfolio from a completed backtest.
+
+        :param BacktestEngine engine: The engine that ran the backtest. The close prices come from its feeds.
+        :param BacktestResult result: The result of the backtest
+        :param numpy.ndarray multipliers: See __init__
+        :param numpy.ndarray margin_rates: See __init__
+        :rtype: Portfolio
+
+        .. note::
+            If a symbol has several feeds, the first one added to the engine is used to value it.
+        """
+        by_symbol = {}
+        for symbol, _, arrays in engine.feeds:
+            by_symbol.setdefault(symbol, arrays)
+
+        empty = {"time": np.empty(0, dtype=np.int64), "close": np.empty(0)}
+        times, close = align([(s, by_symbol.get(s, empty)) for s in result.symbols])
+        return cls.from_trades(
+            times,
+            result.symbols,
+            close,
+            result.trades,
+            result.initial_cash,
+            multipliers,
+            margin_rates,
+        )
+
+    @property
+    def market_value(self):
+        """Return the (time x symbol) array of the value of each position.
+
+        :rtype: numpy.ndarray
+        """
+        # Positions are 0 wherever the price is still unknown
+        value = self.positions * self.close * self.multipliers
+        return np.where(self.positions == 0, 0.0, value)
+
+    @property
+    def cash(self):
+        """Return the cash balance after each timestamp.
+
+        :rtype: numpy.ndarray
+        """
+        return self.initial_cash + np.cumsum(self.cash_flows.sum(axis=1))
+
+    @property
+    def equity(self):
+        """Return the cash balance plus the value of every position after each timestamp.
+
+        :rtype: numpy.ndarray
+        """
+        return self.cash + self.market_value.sum(axis=1)
+
+    @property
+    def pnl(self):
+        """Return the (time x symbol) array of the cumulative profit of each symbol, including commission.
+
+        :rtype: numpy.ndarray
+        """
+        return self.market_value + np.cumsum(self.cash_flows, axis=0)
+
+    @property
+    def margin(self):
+        """Return the margin required after each timestamp.
+
+        :rtype: numpy.ndarray
+        """
+        return (np.abs(self.market_value) * self.margin_rates).sum(axis=1)
+
+    @property
+    def gross_exposure(self):
+        """Return the total absolute value of every position as a fraction of equity.
+
+        :rtype: numpy.ndarray
+        """
+        return np.abs(self.market_value).sum(axis=1) / self.equity
+
+    @property
+    def net_exposure(self):
+        """Return the net value of every position as a fraction of equity.
+
+        :rtype: numpy.ndarray
+        """
+        return self.market_value.sum(axis=1) / self.equity
+
+    @property
+    def returns(self):
+        """Return the fractional change in equity at each timestamp. The first return is measured from the initial cash.
+
+        :rtype: numpy.ndarray
+        """
+        equity = self.equity
+        return np.diff(equity, prepend=self.initial_cash) / np.concatenate(
+            ([self.initial_cash], equity[:-1])
+        )
+
+    @property
+    def drawdown(self):
+        """Return the fractional decline of equity from its running maximum after each timestamp.
+
+        :rtype: numpy.ndarray
+        """
+        equity = self.equity
+        peak = np.maximum.accumulate(np.maximum(equity, self.initial_cash))
+        return equity / peak - 1.0
+
+    def sharpe(self, periods_per_year=252, risk_free=0.0):
+        """Return the annualized Sharpe ratio of the returns.
+
+        :param float periods_per_year: The number of timestamps in a year. 252 is typical of daily candles.
+        :param float risk_free: The annual risk-free rate
+        :rtype: float
+        """
+        excess = self.returns - risk_free / periods_per_year
+        std = excess.std(ddof=1) if len(excess) > 1 else 0.0
+        if std == 0:
+            return 0.0
+        return float(excess.mean() / std * np.sqrt(periods_per_year))
+
+    def report(self, periods_per_year=252, risk_free=0.0):
+        """Return a summary of the portfolio's performance.
+
+        :param float periods_per_year: See sharpe()
+        :param float risk_free: See sharpe()
+        :return: A JSON-serializable dictionary of statistics
+        :rtype: dict
+        """
+        if len(self.times) == 0:
+            raise ValueError("Cannot report on a portfolio with no timestamps")
+
+        equity = self.equity
+        gross = self.gross_exposure
+        return {
+            "periods": len(self.times),
+            "symbols": len(self.symbols),
+            "final_equity": float(equity[-1]),
+            "total_return": float(equity[-1]) / self.initial_cash - 1.0,
+            "max_drawdown": float(self.drawdown.min()),
+            "sharpe": self.sharpe(periods_per_year, risk_free),
+            "gross_exposure_mean": float(gross.mean()),
+            "gross_exposure_max": float(gross.max()),
+            "net_exposure_mean": float(self.net_exposure.mean()),
+            "margin_max": float(self.margin.max()),
+            "pnl": dict(zip(self.symbols, self.pnl[-1].tolist())),
+        }
@@ -0,0 +1,63 @@
+from tbot.symbol_manager import SymbolSubscriber
+
+
+class Strategy(SymbolSubscriber):
+    """Class to implement a trading strategy that places orders with a simulated broker.
+
+    A strategy is an ordinary SymbolSubscriber, so its on_update and indicators run the same way in a backtest as they
+    do live. The broker is attached by BacktestEngine.add_strategy. Orders placed during on_update are filled on the next
+    candle of the symbol they trade that opens after the updated candle closes.
+    """
+
+    def __init__(self, symbol, period):
+        """Initialize the strategy.
+
+        :param str symbol: The symbol of interest
+        :param CandlePeriod period: The time period the feed will be delimited by
+        """
+        super().__init__(symbol, period)
+        self.broker = None
+
+    @property
+    def position(self):
+        """Return the current position in this strategy's symbol.
+
+        :rtype: float
+        """
+        return self.broker.position(self.symbol)
+
+    def buy(self, qty, limit=None, symbol=None):
+        """Place an order to buy.
+
+        :param float qty: The quantity to buy
+        :param float limit: The highest price to pay. If None, a market order is placed
+        :param str symbol: The symbol to buy. If None, this strategy's symbol is used
+        :rtype: Order
+        """
+        return self.broker.submit(symbol or self.symbol, qty, limit)
+
+    def sell(self, qty, limit=None, symbol=None):
+        """Place an order to sell.
+
+        :param float qty: The quantity to sell
+        :param float limit: The lowest price to accept. If None, a market order is placed
+        :param str symbol: The symbol to sell. If None, this strategy's symbol is used
+        :rtype: Order
+        """
+        return self.broker.submit(symbol or self.symbol, -qty, limit)
+
+    def order_target(self, target, symbol=None):
+        """Place a market order that brings a position to a target quantity, replacing any pending orders.
+
+        :param float target: The signed position to hold once the order fills
+        :param str symbol: The symbol to trade. If None, this strategy's symbol is used
+        :return: The order, or None if the position is already at the target
+        :rtype: Order
+        """
+        # Any pending order would be filled on top of this one, so replace it
+        symbol = symbol or self.symbol
+        self.broker.cancel_all(symbol)
+        qty = target - self.broker.position(symbol)
+        if qty == 0:
+            return None
+        return self.broker.submit(symbol, qty)
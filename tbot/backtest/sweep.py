@@ -0,0 +1,281 @@
+import itertools
+import json
+import multiprocessing
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from tbot.candles import CandlePeriod
+from tbot.util import log
+
+from .engine import BacktestEngine
+
+LOGGER = log.get_logger()
+
+# The columns of a feed in shared memory, in the order they are laid out
+COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+
+def param_grid(**axes):
+    """Return every combination of a set of parameter values.
+
+    :param axes: The values to try for each parameter, as (name -> list of values)
+    :return: A dictionary of (name -> value) for every combination
+    :rtype: list[dict]
+
+    Example::
+
+        param_grid(fast=[5, 10], slow=[20, 50])
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+class SharedCandles:
+    """Class to place the candle arrays of many feeds in shared memory.
+
+    Each feed is stored in one block, with the int64 time column followed by the float64 price and volume columns.
+    Processes attach to the blocks by name, so the arrays are never pickled or copied between processes.
+    """
+
+    def __init__(self, feeds):
+        """Copy feeds into shared memory.
+
+        :param list feeds: A list of (symbol, period, arrays) tuples, where arrays is a dictionary of columns in the
+            format of CandleStore.load_arrays
+        """
+        self._blocks = []
+        self._spec = []
+        for symbol, period, arrays in feeds:
+            length = len(arrays["time"])
+            block = shared_memory.SharedMemory(
+                create=True, size=max(len(COLUMNS) * length * 8, 1)
+            )
+            self._blocks.append(block)
+            for col, view in self._views(block, length).items():
+                view[:] = arrays[col]
+            self._spec.append((symbol, str(period), block.name, length))
+
+    @classmethod
+    def _views(cls, block, length):
+        views = {}
+        for ind, col in enumerate(COLUMNS):
+            dtype = np.int64 if col == "time" else np.float64
+            views[col] = np.ndarray(
+                (length,), dtype=dtype, buffer=block.buf, offset=ind * length * 8
+            )
+        return views
+
+    @property
+    def spec(self):
+        """Return a small, picklable description of the shared feeds that can be passed to attach().
+
+        :rtype: list[tuple]
+        """
+        return list(self._spec)
+
+    @classmethod
+    def attach(cls, spec):
+        """Attach to feeds placed in shared memory by a parent process.
+
+        :param list[tuple] spec: The spec property of the SharedCandles that created the feeds
+        :return: The shared memory blocks, which must be kept open while the arrays are in use, and a list of
+            (symbol, period, arrays) tuples whose arrays are views into shared memory
+        :rtype: tuple(list[multiprocessing.shared_memory.SharedMemory], list[tuple])
+        """
+        blocks = []
+        feeds = []
+        for symbol, period, name, length in spec:
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            feeds.append((symbol, CandlePeriod(period), cls._views(block, length)))
+        return blocks, feeds
+
+    @property
+    def feeds(self):
+        """Return the shared feeds as (symbol, period, arrays) tuples, with arrays that are views into shared memory.
+
+        :rtype: list[tuple]
+        """
+        return [
+            (symbol, CandlePeriod(period), self._views(block, length))
+            for (symbol, period, _, length), block in zip(self._spec, self._blocks)
+        ]
+
+    def close(self):
+        """Release and destroy the shared memory blocks."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+        self._spec = []
+
+    def __enter__(self):
+        """Enter a context that destroys the shared memory on exit."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Destroy the shared memory."""
+        self.close()
+
+
+# State of a sweep worker process, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(spec, build, engine_kwargs, summarize):
+    blocks, feeds = SharedCandles.attach(spec)
+    _worker.update(
+        blocks=blocks,
+        feeds=feeds,
+        # Converted once per worker, rather than by every backtest it runs
+        columns=[BacktestEngine.to_columns(arrays) for _, _, arrays in feeds],
+        build=build,
+        engine_kwargs=engine_kwargs,
+        summarize=summarize,
+    )
+
+
+def _run_one(params):
+    engine = BacktestEngine(**_worker["engine_kwargs"])
+    for (symbol, period, arrays), columns in zip(_worker["feeds"], _worker["columns"]):
+        engine.add_feed(symbol, period, arrays, columns)
+    _worker["build"](engine, params)
+
+    result = engine.run()
+    summarize = _worker["summarize"]
+    return params, result.to_json_dict() if summarize is None else summarize(result)
+
+
+def params_key(params):
+    """Return a string that identifies a parameter combination.
+
+    :param dict params: The parameter combination
+    :rtype: str
+    """
+    return json.dumps(params, sort_keys=True)
+
+
+def load_results(path):
+    """Load the results written by a sweep.
+
+    :param pathlib.Path path: The results file of the sweep
+    :return: A list of (params, summary) tuples, in the order they finished
+    :rtype: list[tuple]
+
+    .. note::
+        A partially written last line, such as from the sweep being killed, is ignored.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+
+    results = []
+    with path.open() as results_file:
+        for line in results_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results.append((record["params"], record["summary"]))
+    return results
+
+
+class ParameterSweep:
+    """Class to run a backtest over many parameter combinations in parallel.
+
+    The candles are copied into shared memory once, and each worker process attaches to them when it starts, converting
+    them once to the Python lists the backtest loop reads. A worker builds a fresh BacktestEngine for every combination,
+    so combinations are independent of each other and throughput scales with the number of processes.
+    """
+
+    def __init__(self, feeds, build, engine_kwargs=None, summarize=None):
+        """Initialize the sweep.
+
+        :param list feeds: A list of (symbol, period, arrays) tuples, where arrays is a dictionary of columns in the
+            format of CandleStore.load_arrays
+        :param callable build: A function of (engine, params) that adds strategies to an engine for a parameter
+            combination. It must be picklable, so it should be defined at the top level of a module.
+        :param dict engine_kwargs: Keyword arguments used to create each BacktestEngine
+        :param callable summarize: A picklable function that converts a BacktestResult into a JSON-serializable summary.
+            If None, BacktestResult.to_json_dict is used.
+        """
+        self.feeds = feeds
+        self.build = build
+        self.engine_kwargs = engine_kwargs or {}
+        self.summarize = summarize
+
+    @classmethod
+    def from_store(
+        cls, store, symbols, period, build, engine_kwargs=None, summarize=None
+    ):
+        """Create a sweep over feeds stored in a CandleStore.
+
+        :param CandleStore store: The store to load candles from
+        :param list[str] symbols: The symbols to load
+        :param CandlePeriod period: The candle period
+        :param callable build: See __init__
+        :param dict engine_kwargs: See __init__
+        :param callable summarize: See __init__
+        :rtype: ParameterSweep
+        """
+        feeds = [(s, period, store.load_arrays(s, period)) for s in symbols]
+        return cls(feeds, build, engine_kwargs, summarize)
+
+    def run(self, grid, results_path=None, processes=None):
+        """Run the backtest for every parameter combination.
+
+        :param list[dict] grid: The parameter combinations to run, such as from param_grid
+        :param pathlib.Path results_path: A file to append each result to as it finishes. If the file already has results
+            for some combinations, for example because an earlier sweep was interrupted, those combinations are skipped.
+        :param int processes: The number of worker processes. If None, one per CPU is used.
+        :return: A generator of (params, summary) tuples, in the order the combinations finish
+        """
+        done = set()
+        if results_path is not None:
+            results_path = Path(results_path)
+            done = set(params_key(p) for p, _ in load_results(results_path))
+
+        todo = [p for p in grid if params_key(p) not in done]
+        if len(done) > 0:
+            LOGGER.info(
+                f"Resuming sweep. {len(grid) - len(todo)} of {len(grid)} combinations already done"
+            )
+        if len(todo) == 0:
+            return
+
+        results_file = None
+        if results_path is not None:
+            results_file = results_path.open("a")
+            # Don't append to a line that was only partially written when the sweep was interrupted
+            if results_file.tell() > 0:
+                with results_path.open("rb") as existing:
+                    existing.seek(-1, 2)
+                    if existing.read(1) != b"\n":
+                        results_file.write("\n")
+
+        with SharedCandles(self.feeds) as shared:
+            try:
+                with multiprocessing.Pool(
+                    processes,
+                    initializer=_init_worker,
+                    initargs=(
+                        shared.spec,
+                        self.build,
+                        self.engine_kwargs,
+                        self.summarize,
+                    ),
+                ) as pool:
+                    for params, summary in pool.imap_unordered(_run_one, todo):
+                        if results_file is not None:
+                            results_file.write(
+                                json.dumps({"params": params, "summary": summary})
+                                + "\n"
+                            )
+                            results_file.flush()
+                        yield params, summary
+
+            finally:
+                if results_file is not None:
+                    results_file.close()
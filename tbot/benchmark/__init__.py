@@ -0,0 +1,25 @@
+"""Reproducible benchmarks of the candle, indicator and dispatch hot paths.
+
+Every scenario runs on deterministic synthetic candles, so no market data platform is needed.
+"""
+from tbot.util.lazy import lazy_exports
+
+# The scenarios import TA-Lib, so they are only loaded when one of their names is first used
+_EXPORTS = {
+    "SCENARIOS": ".scenarios",
+    "Scenario": ".scenarios",
+    "compare": ".runner",
+    "load": ".runner",
+    "measure": ".runner",
+    "run": ".runner",
+    "save": ".runner",
+    "scenario": ".scenarios",
+    "select": ".runner",
+    "synthetic_arrays": ".synthetic",
+    "synthetic_series": ".synthetic",
+    "to_candles": ".synthetic",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
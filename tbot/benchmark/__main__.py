@@ -0,0 +1,109 @@
+"""Run the benchmark suite.
+
+Examples::
+
+    # Run every scenario and save the results as the baseline
+    python -m tbot.benchmark --output baseline.json
+
+    # Check the streaming indicators against TA-Lib
+    python -m tbot.benchmark --accuracy
+
+    # Check that the lightweight modules import without pandas, TA-Lib or the platform libraries
+    python -m tbot.benchmark --imports
+
+    # After a change, compare against the baseline. The exit code is 1 if any scenario regressed.
+    python -m tbot.benchmark --baseline baseline.json --filter talib
+"""
+import argparse
+import sys
+
+from . import accuracy, imports, runner
+
+
+def _print_result(result):
+    print(
+        f"{result['id']:<60} {result['per_op_us']:>12.2f} us/op {result['ops_per_sec']:>14.0f} ops/s",
+        flush=True,
+    )
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--filter", help="Only run scenarios whose id contains this text"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timed repetitions of each scenario"
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results to this JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=runner.DEFAULT_THRESHOLD,
+        help="Fractional slowdown that counts as a regression",
+    )
+    parser.add_argument(
+        "--accuracy",
+        action="store_true",
+        help="Check the streaming indicators against TA-Lib instead of timing",
+    )
+    parser.add_argument(
+        "--imports",
+        action="store_true",
+        help="Check which dependencies importing the lightweight modules loads instead of timing",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="List the scenarios without running them"
+    )
+    args = parser.parse_args()
+
+    if args.list:
+        for s in runner.select(args.filter):
+            print(s.id)
+        return 0
+
+    if args.accuracy:
+        checks = accuracy.check()
+        for c in checks:
+            print(
+                f"{c['name']:<10} {c['values']:>6} values, max relative error {c['max_rel_error']:.2e}, "
+                f"{c['nan_mismatch']} NaN mismatches {'ok' if c['ok'] else 'FAILED'}"
+            )
+        return 0 if all(c["ok"] for c in checks) else 1
+
+    if args.imports:
+        checks = imports.check()
+        for c in checks:
+            heavy = ", ".join(c["heavy"])
+            print(
+                f"{c['name']:<48} {c['import_ms']:>8.1f} ms "
+                f"{'ok' if c['ok'] else 'FAILED, loaded ' + heavy}"
+            )
+        return 0 if all(c["ok"] for c in checks) else 1
+
+    results = runner.run(args.filter, args.repeat, progress=_print_result)
+    if args.output:
+        runner.save(results, args.output)
+
+    if args.baseline is None:
+        return 0
+
+    comparisons = runner.compare(results, runner.load(args.baseline), args.threshold)
+    print()
+    for c in comparisons:
+        print(
+            f"{c['id']:<60} {c['baseline_us']:>12.2f} -> {c['current_us']:>12.2f} us/op "
+            f"({c['ratio']:.2f}x) {c['status'].upper() if c['status'] != 'ok' else ''}"
+        )
+
+    regressions = [c for c in comparisons if c["status"] == "regression"]
+    if len(regressions) > 0:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Accuracy checks of the streaming and matrix indicators against TA-Lib.
+
+Candles are streamed into a series the way a live feed delivers them: each candle first arrives as a provisional version
+that is then replaced by the final candle, and the series evicts old candles once it is full. The streamed results are then
+compared to TA-Lib run once on the complete data. Matrix indicators are checked column by column.
+"""
+import numpy as np
+import talib
+
+from tbot.candles import CandlePeriod, CandleSeries
+from tbot.indicators import matrix, streaming
+
+from .synthetic import synthetic_arrays, to_candles
+
+DEFAULT_TOLERANCE = 1e-9
+PERIOD = CandlePeriod("1m")
+
+
+def _vwap(arrays):
+    """Return the daily VWAP of the typical price, calculated on whole arrays."""
+    typical = (arrays["high"] + arrays["low"] + arrays["close"]) / 3.0
+    days = arrays["time"] // 86400000
+    pv = typical * arrays["volume"]
+    result = np.empty(len(days))
+    for day in np.unique(days):
+        mask = days == day
+        result[mask] = np.cumsum(pv[mask]) / np.cumsum(arrays["volume"][mask])
+    return result
+
+
+# (name, streaming indicator factory, reference function of the input arrays)
+CHECKS = [
+    ("SMA", lambda: streaming.SMA(20), lambda a: talib.SMA(a["close"], 20)),
+    ("EMA", lambda: streaming.EMA(20), lambda a: talib.EMA(a["close"], 20)),
+    ("RSI", lambda: streaming.RSI(14), lambda a: talib.RSI(a["close"], 14)),
+    (
+        "ATR",
+        lambda: streaming.ATR(14),
+        lambda a: talib.ATR(a["high"], a["low"], a["close"], 14),
+    ),
+    (
+        "BBANDS",
+        lambda: streaming.BBANDS(20, 2.0, 2.0),
+        lambda a: np.transpose(talib.BBANDS(a["close"], 20, 2.0, 2.0)),
+    ),
+    (
+        "MACD",
+        lambda: streaming.MACD(12, 26, 9),
+        lambda a: np.transpose(talib.MACD(a["close"], 12, 26, 9)),
+    ),
+    ("MAX", lambda: streaming.MAX(30, "high"), lambda a: talib.MAX(a["high"], 30)),
+    ("MIN", lambda: streaming.MIN(30, "low"), lambda a: talib.MIN(a["low"], 30)),
+    ("VWAP", lambda: streaming.VWAP("day"), _vwap),
+]
+
+
+# (name, matrix indicator factory, reference function of one symbol's close prices)
+MATRIX_CHECKS = [
+    ("matrix.SMA", lambda: matrix.RollingMean(20), lambda c: talib.SMA(c, 20)),
+    ("matrix.EMA", lambda: matrix.EMA(20), lambda c: talib.EMA(c, 20)),
+    ("matrix.RSI", lambda: matrix.RSI(14), lambda c: talib.RSI(c, 14)),
+]
+MATRIX_SYMBOLS = 10
+
+
+def _compare(name, actual, expected, tolerance):
+    nan_mismatch = int(np.count_nonzero(np.isnan(actual) != np.isnan(expected)))
+    valid = ~(np.isnan(actual) | np.isnan(expected))
+    error = np.abs(actual[valid] - expected[valid])
+    scale = np.maximum(np.abs(expected[valid]), 1.0)
+    max_error = float((error / scale).max()) if error.size else 0.0
+    return {
+        "name": name,
+        "values": int(np.count_nonzero(valid)),
+        "nan_mismatch": nan_mismatch,
+        "max_rel_error": max_error,
+        "ok": nan_mismatch == 0 and max_error <= tolerance,
+    }
+
+
+def stream(indicator, candles, provisional, max_candles):
+    """Stream candles into a series, updating an indicator after every change.
+
+    :param StreamingIndicator indicator: The indicator to update
+    :param list[Candle] candles: The final candles, in order
+    :param list[Candle] provisional: A provisional version of each candle, sent before the final one. May be None.
+    :param int max_candles: The number of candles the series keeps
+    :return: The series, after every candle has been streamed
+    :rtype: CandleSeries
+    """
+    series = CandleSeries(candles[0].period, [candles[0]], max_candles)
+    indicator._update(series)
+    for ind in range(1, len(candles)):
+        if provisional is None:
+            series.append(candles[ind])
+        else:
+            series.append(provisional[ind])
+            indicator._update(series)
+            series.replace_last(candles[ind])
+        indicator._update(series)
+    return series
+
+
+def check(n=3000, seed=0, max_candles=500, tolerance=DEFAULT_TOLERANCE):
+    """Compare every streaming indicator against its TA-Lib reference.
+
+    :param int n: The number of candles to stream
+    :param int seed: The seed of the synthetic candles
+    :param int max_candles: The number of candles the series keeps. The streamed results are compared to the end of the
+        reference.
+    :param float tolerance: The largest allowed error, relative to the magnitude of the reference value
+    :return: A JSON-serializable dictionary for each indicator, with its maximum error and whether it passed
+    :rtype: list[dict]
+    """
+    arrays = synthetic_arrays(n, PERIOD, seed)
+    candles = to_candles(PERIOD, arrays)
+
+    # Provisional candles share the time of the final candle, with different prices
+    provisional = to_candles(PERIOD, synthetic_arrays(n, PERIOD, seed + 1))
+    for p, c in zip(provisional, candles):
+        p.time = c.time
+
+    results = []
+    for name, factory, reference in CHECKS:
+        indicator = factory()
+        stream(indicator, candles, provisional, max_candles)
+
+        actual = np.asarray(indicator.data, dtype=np.float64)
+        expected = np.asarray(reference(arrays), dtype=np.float64)[-len(actual) :]
+        results.append(_compare(name, actual, expected, tolerance))
+
+    # Symbols start at different times, so the matrix indicators also handle symbols without prices yet
+    close = np.full((n, MATRIX_SYMBOLS), np.nan)
+    for col in range(MATRIX_SYMBOLS):
+        start = col * 10
+        close[start:, col] = synthetic_arrays(n - start, PERIOD, seed + col)["close"]
+    for name, factory, reference in MATRIX_CHECKS:
+        indicator = factory()
+        indicator.reset(MATRIX_SYMBOLS)
+        actual = np.array([indicator.push({"close": row}, {}) for row in close])
+        expected = np.full(close.shape, np.nan)
+        for col in range(MATRIX_SYMBOLS):
+            start = col * 10
+            expected[start:, col] = reference(close[start:, col])
+        results.append(_compare(name, actual, expected, tolerance))
+    return results
@@ -0,0 +1,74 @@
+"""Import checks of the lightweight entry points.
+
+Each import runs in a fresh interpreter, so nothing is cached from an earlier import. A check fails if the import loads
+one of the heavy dependencies that the modules are meant to defer until they are used.
+"""
+import json
+import subprocess
+import sys
+
+# Dependencies that take a long time to import
+HEAVY = ("pandas", "yfinance", "ib_insync", "flask", "talib")
+
+# (import statement, dependencies it must not load)
+CHECKS = [
+    ("from tbot.candles import *", HEAVY),
+    ("from tbot.indicators import *", HEAVY),
+    ("from tbot.indicators import streaming, talib", HEAVY),
+    ("from tbot.symbol_manager import *", HEAVY),
+    ("import tbot.benchmark", HEAVY),
+    ("import tbot.platforms.yf", ("pandas", "yfinance", "ib_insync", "flask")),
+    ("import tbot.web.api", ("pandas", "yfinance", "ib_insync")),
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(m for m in sys.modules if "." not in m)}}))
+"""
+
+
+def probe(statement):
+    """Run an import statement in a fresh interpreter.
+
+    :param str statement: The import statement, such as "import tbot.candles"
+    :return: The time the import took in seconds, and the names of the top-level modules loaded once it finished
+    :rtype: tuple(float, set)
+    """
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(statement=statement)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    return result["elapsed"], set(result["modules"])
+
+
+def check(repeat=3):
+    """Run every import in CHECKS and look for heavy dependencies.
+
+    :param int repeat: The number of times to run each import. The fastest is reported.
+    :return: A JSON-serializable dictionary for each import, with its time and whether it passed
+    :rtype: list[dict]
+    """
+    results = []
+    for statement, forbidden in CHECKS:
+        times = []
+        loaded = set()
+        for _ in range(repeat):
+            elapsed, modules = probe(statement)
+            times.append(elapsed)
+            loaded |= modules
+        heavy = sorted(loaded.intersection(forbidden))
+        results.append(
+            {
+                "name": statement,
+                "import_ms": min(times) * 1000.0,
+                "heavy": heavy,
+                "ok": len(heavy) == 0,
+            }
+        )
+    return results
@@ -0,0 +1,141 @@
+import json
+import platform
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from tbot.__version__ import __version__
+
+from .scenarios import SCENARIOS
+
+# A scenario is a regression if it is this much slower than the baseline
+DEFAULT_THRESHOLD = 0.10
+
+
+def select(pattern=None):
+    """Return the registered scenarios whose id contains a pattern.
+
+    :param str pattern: The text to search scenario ids for. If None, every scenario is returned.
+    :rtype: list[Scenario]
+    """
+    return [s for s in SCENARIOS if pattern is None or pattern in s.id]
+
+
+def measure(scenario, repeat=5):
+    """Time a scenario.
+
+    Setup runs before every repetition, so each one starts from the same state. The first repetition is discarded as a
+    warmup.
+
+    :param Scenario scenario: The scenario to time
+    :param int repeat: The number of timed repetitions
+    :return: A JSON-serializable dictionary of the timings
+    :rtype: dict
+    """
+    timings = []
+    for _ in range(repeat + 1):
+        work, ops = scenario.setup(**scenario.params)
+        start = time.perf_counter()
+        work()
+        timings.append(time.perf_counter() - start)
+
+    timings = np.array(timings[1:])
+    return {
+        "id": scenario.id,
+        "name": scenario.name,
+        "params": scenario.params,
+        "ops": ops,
+        "repeat": repeat,
+        "best": float(timings.min()),
+        "median": float(np.median(timings)),
+        "per_op_us": float(timings.min() / ops * 1e6),
+        "ops_per_sec": float(ops / timings.min()),
+    }
+
+
+def run(pattern=None, repeat=5, progress=None):
+    """Run the benchmark suite.
+
+    :param str pattern: Only run scenarios whose id contains this text. If None, every scenario is run.
+    :param int repeat: The number of timed repetitions of each scenario
+    :param callable progress: A function called with the result of each scenario as it completes
+    :return: A JSON-serializable dictionary of the environment and the result of every scenario
+    :rtype: dict
+    """
+    results = []
+    for s in select(pattern):
+        result = measure(s, repeat)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    return {
+        "meta": {
+            "tbot": __version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compare benchmark results against a baseline.
+
+    Scenarios are compared on their best time per operation, which is the least sensitive to noise from other processes.
+
+    :param dict current: The results of run()
+    :param dict baseline: The results of an earlier run(), such as one loaded with load()
+    :param float threshold: The fractional change in time per operation that counts as a regression or improvement
+    :return: A list of comparisons, one for each scenario in both results. Each has the keys "id", "baseline_us",
+        "current_us", "ratio" and "status", where status is "regression", "improvement" or "ok".
+    :rtype: list[dict]
+    """
+    baseline_by_id = {r["id"]: r for r in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        base = baseline_by_id.get(result["id"])
+        if base is None:
+            continue
+
+        ratio = result["per_op_us"] / base["per_op_us"]
+        if ratio > 1.0 + threshold:
+            status = "regression"
+        elif ratio < 1.0 - threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+
+        comparisons.append(
+            {
+                "id": result["id"],
+                "baseline_us": base["per_op_us"],
+                "current_us": result["per_op_us"],
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return comparisons
+
+
+def save(results, path):
+    """Save benchmark results as JSON.
+
+    :param dict results: The results of run()
+    :param pathlib.Path path: The file to write
+    """
+    Path(path).write_text(json.dumps(results, indent=2) + "\n")
+
+
+def load(path):
+    """Load benchmark results saved by save().
+
+    :param pathlib.Path path: The file to read
+    :rtype: dict
+    """
+    return json.loads(Path(path).read_text())
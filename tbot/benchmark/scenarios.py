@@ -0,0 +1,424 @@
+"""Benchmark scenarios for the candle, indicator and dispatch hot paths.
+
+Each scenario is a setup function that builds its inputs and returns the work to time, along with the number of
+operations that work performs. Setup is not timed. A scenario is registered once for every combination of its parameters.
+"""
+import itertools
+import tempfile
+
+import numpy as np
+import talib.abstract
+
+from tbot.backtest import BacktestEngine, Strategy
+from tbot.candles import Candle, CandlePeriod, CandleSeries, CandleStore
+from tbot.indicators import (
+    IndicatorGraph,
+    IndicatorSet,
+    TalibIndicator,
+    matrix,
+    streaming,
+)
+from tbot.indicators.qte import GannAnalysis
+from tbot.screener import Screener, Value
+from tbot.symbol_manager import (
+    MatrixEvaluator,
+    MultiTimeframeSubscriber,
+    SymbolManager,
+    SymbolSubscriber,
+)
+
+from .synthetic import synthetic_arrays, synthetic_series, to_candles
+
+PERIOD = CandlePeriod("1m")
+
+
+class Scenario:
+    """Class to represent one benchmark, with fixed parameters."""
+
+    def __init__(self, name, setup, params):
+        """Initialize the scenario.
+
+        :param str name: The name of the benchmark
+        :param callable setup: A function of the parameters that returns (work, ops), where work is a callable with no
+            arguments and ops is the number of operations it performs
+        :param dict params: The parameters to call setup with
+        """
+        self.name = name
+        self.setup = setup
+        self.params = params
+
+    @property
+    def id(self):
+        """Return a string that identifies the scenario and its parameters, such as "candle_series.append[length=500]".
+
+        :rtype: str
+        """
+        params = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}[{params}]"
+
+
+SCENARIOS = []
+
+
+def scenario(name, **axes):
+    """Register a setup function as a scenario for every combination of parameter values.
+
+    :param str name: The name of the benchmark
+    :param axes: The values to benchmark for each parameter, as (name -> list of values)
+    """
+
+    def register(setup):
+        names = list(axes)
+        for values in itertools.product(*axes.values()):
+            SCENARIOS.append(Scenario(name, setup, dict(zip(names, values))))
+        return setup
+
+    return register
+
+
+@scenario("candle_series.append", length=[500, 2500])
+def candle_series_append(length):
+    """Append candles to a full series, so each append also evicts the oldest candle."""
+    ops = 5000
+    series = synthetic_series(length)
+    candles = to_candles(PERIOD, synthetic_arrays(ops, seed=1))
+
+    def work():
+        for c in candles:
+            series.append(c)
+
+    return work, ops
+
+
+@scenario("talib.update", function=["SMA", "EMA", "RSI"], length=[500, 2500])
+def talib_update(function, length):
+    """Recalculate a TA-Lib indicator on a whole series."""
+    ops = 200
+    series = synthetic_series(length)
+    indicator = TalibIndicator(getattr(talib.abstract, function), timeperiod=14)
+
+    def work():
+        for _ in range(ops):
+            indicator.update(series)
+
+    return work, ops
+
+
+@scenario("talib.update_last", function=["SMA", "EMA"], length=[500, 2500])
+def talib_update_last(function, length):
+    """Refresh a TA-Lib indicator after the forming candle is replaced, as happens with intrabar updates."""
+    ops = 1000
+    series = synthetic_series(length)
+    indicator = TalibIndicator(getattr(talib.abstract, function), timeperiod=14)
+    indicator._update(series)
+    revisions = to_candles(PERIOD, synthetic_arrays(ops, seed=1))
+    last_time = series.last.time
+    for c in revisions:
+        c.time = last_time
+
+    def work():
+        for c in revisions:
+            series.replace_last(c)
+            indicator._update(series)
+
+    return work, ops
+
+
+# A typical set of indicators registered on one feed
+INDICATOR_SPECS = [
+    ("sma_14", "SMA", {"timeperiod": 14}),
+    ("sma_50", "SMA", {"timeperiod": 50}),
+    ("ema_20", "EMA", {"timeperiod": 20}),
+    ("rsi_14", "RSI", {"timeperiod": 14}),
+    ("bbands_20", "BBANDS", {"timeperiod": 20}),
+    ("atr_14", "ATR", {"timeperiod": 14}),
+    ("macd", "MACD", {}),
+    ("adx_14", "ADX", {"timeperiod": 14}),
+    ("cci_14", "CCI", {"timeperiod": 14}),
+    ("obv", "OBV", {}),
+]
+
+
+@scenario("indicators.per_bar", mode=["talib_indicator", "indicator_set"])
+def indicators_per_bar(mode):
+    """Append a candle, then update ten TA-Lib indicators, either separately or as one IndicatorSet."""
+    ops = 200
+    series = synthetic_series(500)
+    candles = to_candles(PERIOD, synthetic_arrays(ops, seed=1, start=series.last.time))
+    if mode == "indicator_set":
+        indicators = [
+            IndicatorSet(
+                [(n, getattr(talib.abstract, f), k) for n, f, k in INDICATOR_SPECS]
+            )
+        ]
+    else:
+        indicators = [
+            TalibIndicator(getattr(talib.abstract, f), **k)
+            for _, f, k in INDICATOR_SPECS
+        ]
+    for indicator in indicators:
+        indicator._update(series)
+
+    def work():
+        for c in candles:
+            series.append(c)
+            for indicator in indicators:
+                indicator._update(series)
+
+    return work, ops
+
+
+@scenario("indicator_graph.per_bar", mode=["adhoc", "graph"])
+def indicator_graph_per_bar(mode):
+    """Append a candle and replace it three times, updating an SMA of an RSI and an SMA of the 20 candle high each time.
+
+    "adhoc" recalculates both layers on the whole series on every update, as code written without an IndicatorGraph
+    would.
+    """
+    ops = 200
+    series = synthetic_series(500)
+    arrays = synthetic_arrays(ops, seed=1, start=series.last.time)
+    candles = to_candles(PERIOD, arrays)
+    ticks = [
+        [
+            Candle(PERIOD, c.time, c.open, max(c.open, p), min(c.open, p), p, c.volume)
+            for p in np.linspace(c.open, c.close, 4)[1:]
+        ]
+        for c in candles
+    ]
+
+    if mode == "graph":
+        graph = IndicatorGraph()
+        graph.add("rsi", TalibIndicator("RSI", timeperiod=14))
+        graph.add("rsi_sma", streaming.SMA(9), source="rsi")
+        graph.add("max", streaming.MAX(20, "high"))
+        graph.add("max_sma", streaming.SMA(5), source="max")
+
+        def update():
+            graph.update(series)
+
+    else:
+
+        def update():
+            close = np.array([c.close for c in series])
+            high = np.array([c.high for c in series])
+            talib.SMA(talib.RSI(close, 14), 9)
+            talib.SMA(talib.MAX(high, 20), 5)
+
+    update()
+
+    def work():
+        for c, c_ticks in zip(candles, ticks):
+            series.append(c_ticks[0])
+            update()
+            for t in c_ticks[1:]:
+                series.replace_last(t)
+                update()
+
+    return work, ops
+
+
+@scenario("streaming.per_bar", length=[500, 2500])
+def streaming_per_bar(length):
+    """Append a candle, then update nine streaming indicators. The cost shouldn't depend on the length of the series."""
+    ops = 1000
+    series = synthetic_series(length)
+    candles = to_candles(PERIOD, synthetic_arrays(ops, seed=1, start=series.last.time))
+    indicators = [
+        streaming.SMA(20),
+        streaming.EMA(20),
+        streaming.RSI(14),
+        streaming.ATR(14),
+        streaming.BBANDS(20),
+        streaming.MACD(),
+        streaming.MAX(30, "high"),
+        streaming.MIN(30, "low"),
+        streaming.VWAP(),
+    ]
+    for indicator in indicators:
+        indicator._update(series)
+
+    def work():
+        for c in candles:
+            series.append(c)
+            for indicator in indicators:
+                indicator._update(series)
+
+    return work, ops
+
+
+@scenario("matrix.per_bar", mode=["talib_indicator", "matrix"], symbols=[100, 500])
+def matrix_per_bar(mode, symbols):
+    """Deliver a bar for every symbol of a universe, then update an SMA, EMA and RSI of every symbol.
+
+    The indicators are either a TalibIndicator per symbol, or matrix indicators evaluated once for the whole universe.
+    """
+    ops = 20
+    mgr = SymbolManager()
+    names = [f"SYM{s}" for s in range(symbols)]
+    if mode == "matrix":
+        evaluator = MatrixEvaluator(
+            names,
+            PERIOD,
+            {
+                "sma_20": matrix.RollingMean(20),
+                "ema_20": matrix.EMA(20),
+                "rsi_14": matrix.RSI(14),
+            },
+        )
+        evaluator.attach(mgr)
+    else:
+        for symbol in names:
+            sub = _NullSubscriber(symbol, PERIOD)
+            sub.register_indicator(
+                "sma_20", TalibIndicator(talib.abstract.SMA, timeperiod=20)
+            )
+            sub.register_indicator(
+                "ema_20", TalibIndicator(talib.abstract.EMA, timeperiod=20)
+            )
+            sub.register_indicator(
+                "rsi_14", TalibIndicator(talib.abstract.RSI, timeperiod=14)
+            )
+            mgr.add_subscriber(sub)
+
+    bars = []
+    step = PERIOD.as_timedelta()
+    for s, symbol in enumerate(names):
+        series = synthetic_series(500, seed=s)
+        mgr.add_feed(symbol, PERIOD, series)
+        bars.append(
+            to_candles(
+                PERIOD, synthetic_arrays(ops, seed=s, start=series.last.time + step)
+            )
+        )
+
+    def work():
+        for ind in range(ops):
+            for symbol, candles in zip(names, bars):
+                mgr.update_feed(symbol, PERIOD, candles[ind])
+
+    return work, ops
+
+
+@scenario("gann.update", length=[500, 2500])
+def gann_update(length):
+    """Recalculate Gann bar directions, legs, ABCs and U-turns on a whole series."""
+    ops = 20
+    series = synthetic_series(length)
+    indicator = GannAnalysis()
+
+    def work():
+        for _ in range(ops):
+            indicator.update(series)
+
+    return work, ops
+
+
+class _NullSubscriber(SymbolSubscriber):
+    def on_update(self):
+        pass
+
+
+@scenario("symbol_manager.update_feed", symbols=[1, 10, 100], subscribers=[1, 10])
+def symbol_manager_update_feed(symbols, subscribers):
+    """Dispatch new candles through a symbol manager to subscribers that do nothing with them."""
+    ops = 10000
+    per_symbol = ops // symbols
+    mgr = SymbolManager()
+    updates = []
+    for s in range(symbols):
+        symbol = f"SYM{s}"
+        for _ in range(subscribers):
+            mgr.add_subscriber(_NullSubscriber(symbol, PERIOD))
+        mgr.add_feed(symbol, PERIOD, synthetic_series(500, seed=s))
+
+        candles = to_candles(PERIOD, synthetic_arrays(per_symbol, seed=s))
+        updates.extend((symbol, c) for c in candles)
+
+    def work():
+        for symbol, c in updates:
+            mgr.update_feed(symbol, PERIOD, c)
+
+    return work, len(updates)
+
+
+class _MultiTimeframeReader(MultiTimeframeSubscriber):
+    def on_update(self):
+        for timeframe in self.timeframes.values():
+            timeframe.containing()
+
+
+@scenario("multi_timeframe.per_bar", periods=[1, 3])
+def multi_timeframe_per_bar(periods):
+    """Update a multi-timeframe subscriber on every base candle, with one lookup of the containing candle per period."""
+    ops = 10000
+    higher = [CandlePeriod(p) for p in ("5m", "1h", "1d")[:periods]]
+    mgr = SymbolManager()
+    mgr.add_subscriber(_MultiTimeframeReader("SYM", PERIOD, higher))
+
+    # Higher candles that close with a base candle are delivered first, as the backtest engine does
+    updates = []
+    for p in [PERIOD] + higher:
+        arrays = synthetic_arrays(int(ops * PERIOD.size // p.size) + 1, p)
+        candles = to_candles(p, arrays)
+        mgr.add_feed("SYM", p, CandleSeries(p, candles[:1], 500))
+        close_times = arrays["time"] + int(p.size * 1000)
+        updates.extend(
+            ((t, -p.size), p, c) for t, c in zip(close_times[1:].tolist(), candles[1:])
+        )
+    updates.sort(key=lambda u: u[0])
+    updates = [(p, c) for _, p, c in updates]
+
+    def work():
+        for p, c in updates:
+            mgr.update_feed("SYM", p, c)
+
+    return work, ops
+
+
+class _FlipStrategy(Strategy):
+    def __init__(self, symbol, period):
+        super().__init__(symbol, period)
+        self._count = 0
+
+    def on_update(self):
+        self._count += 1
+        if self._count % 50 == 0:
+            self.order_target(1 if self.position <= 0 else -1)
+
+
+@scenario("backtest.run", symbols=[1, 10])
+def backtest_run(symbols):
+    """Run a backtest of a strategy without indicators, which exercises the engine's per-bar path."""
+    ops = 50000
+    engine = BacktestEngine(max_candles=100)
+    for s in range(symbols):
+        symbol = f"SYM{s}"
+        engine.add_feed(symbol, PERIOD, synthetic_arrays(ops // symbols + 1, seed=s))
+        engine.add_strategy(_FlipStrategy(symbol, PERIOD))
+
+    def work():
+        engine.run()
+
+    return work, ops
+
+
+@scenario("screener.screen", symbols=[500])
+def screener_screen(symbols):
+    """Screen a store of daily candles in one process, which exercises loading and evaluating each symbol."""
+    period = CandlePeriod("1d")
+    tmp = tempfile.TemporaryDirectory()
+    store = CandleStore(tmp.name)
+    for s in range(symbols):
+        store.save_arrays(f"SYM{s}", period, synthetic_arrays(400, period, seed=s))
+
+    screener = Screener(store, period)
+    screener.register_indicator("rsi", TalibIndicator, "RSI", timeperiod=14)
+    screener.register_indicator("sma", TalibIndicator, "SMA", timeperiod=50)
+    condition = (Value("rsi") < 30) | Value("close").crosses_above(Value("sma"))
+
+    # work holds on to the temporary directory, so it is removed once the scenario is done with
+    def work(tmp=tmp):
+        screener.screen(condition, rank_by=Value("rsi"), processes=1)
+
+    return work, symbols
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+from tbot.candles import Candle, CandlePeriod, CandleSeries
+
+# The time of the first synthetic candle, so generated data is identical between runs
+START = datetime(2020, 1, 1, tzinfo=pytz.utc)
+
+
+def synthetic_arrays(
+    n, period=CandlePeriod("1m"), seed=0, price=100.0, volatility=0.001, start=START
+):
+    """Generate OHLCV candles as a random walk.
+
+    The same arguments always produce the same candles, so benchmarks are comparable between runs and machines.
+
+    :param int n: The number of candles to generate
+    :param CandlePeriod period: The period of the candles. It must be time-based.
+    :param int seed: The seed of the random number generator
+    :param float price: The open price of the first candle
+    :param float volatility: The standard deviation of the log return of each candle
+    :param datetime.datetime start: The open time of the first candle
+    :return: A dictionary of columns in the format of CandleStore.load_arrays
+    :rtype: dict
+    """
+    period_dt = period.as_timedelta()
+    if period_dt is None:
+        raise ValueError(f"Synthetic candles need a time-based period. Got {period}")
+
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0.0, volatility, n)))
+    c_open = np.concatenate(([price], close[:-1]))
+
+    # Wicks extend past the body by a random fraction of the volatility
+    wicks = np.abs(rng.normal(0.0, volatility, (2, n)))
+    high = np.maximum(c_open, close) * (1.0 + wicks[0])
+    low = np.minimum(c_open, close) * (1.0 - wicks[1])
+    volume = np.round(rng.lognormal(7.0, 1.0, n))
+
+    period_ms = int(period_dt.total_seconds() * 1000)
+    start_ms = int(start.timestamp() * 1000)
+    return {
+        "time": start_ms + np.arange(n, dtype=np.int64) * period_ms,
+        "open": c_open,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    }
+
+
+def to_candles(period, arrays):
+    """Convert columnar candle data into a list of candles.
+
+    :param CandlePeriod period: The period of the candles
+    :param dict arrays: A dictionary of columns in the format of CandleStore.load_arrays
+    :rtype: list[Candle]
+    """
+    cols = [
+        arrays[col].tolist()
+        for col in ("time", "open", "high", "low", "close", "volume")
+    ]
+    return [
+        Candle(period, datetime.fromtimestamp(t / 1000, tz=pytz.utc), o, h, lo, c, v)
+        for t, o, h, lo, c, v in zip(*cols)
+    ]
+
+
+def synthetic_series(n, period=CandlePeriod("1m"), seed=0, max_candles=None, **kwargs):
+    """Generate a candle series as a random walk.
+
+    :param int n: The number of candles to generate
+    :param CandlePeriod period: The period of the candles. It must be time-based.
+    :param int seed: The seed of the random number generator
+    :param int max_candles: The maximum number of candles the series keeps. If None, n is used.
+    :param kwargs: Other arguments to synthetic_arrays
+    :rtype: CandleSeries
+    """
+    candles = to_candles(period, synthetic_arrays(n, period, seed, **kwargs))
+    return CandleSeries(period, candles, max_candles or max(n, 2))
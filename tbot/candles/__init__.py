@@ -1,5 +1,14 @@
-from .candle import Candle
-from .candle_period import CandlePeriod
-from .candle_series import CandleSeries
+from tbot.util.lazy import lazy_exports
 
-__all__ = ["Candle", "CandlePeriod", "CandleSeries"]
+# Submodules are imported when one of their names is first used, so only CandleStore loads NumPy
+_EXPORTS = {
+    "Candle": ".candle",
+    "CandleAggregator": ".candle_aggregator",
+    "CandlePeriod": ".candle_period",
+    "CandleSeries": ".candle_series",
+    "CandleStore": ".candle_store",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
@@ -1,8 +1,6 @@
 import traceback
 from datetime import datetime
 
-import pytz
-
 from .candle_period import CandlePeriod
 
 
@@ -73,6 +71,9 @@ class Candle:
         .. note::
             It is expected that the json_dict param is a python dict, not a JSON string
         """
+        # pytz is slow to import and only needed here
+        import pytz
+
         err = None
         c = None
         try:
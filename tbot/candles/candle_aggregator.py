@@ -0,0 +1,128 @@
+from .candle import Candle
+from .candle_period import CandlePeriod
+
+
+class CandleAggregator:
+    """Class to build candles locally from a stream of trades or smaller bars.
+
+    Every update is processed in constant time. When a candle completes, it is passed to the on_candle callback.
+
+    Time-based candles are aligned to the trading session, as in CandlePeriod.span: a "5m" candle opens on a five-minute
+    boundary from the start of the session, a "1d" candle when the session starts and a "1w" candle on Monday. Volume and
+    range candles open on the first update after the previous candle completes.
+    """
+
+    def __init__(self, period, on_candle, on_forming=None, tz=None, session_start=None):
+        """Initialize the aggregator.
+
+        :param CandlePeriod period: The period of the candles to build
+        :param callable on_candle: A function called with each completed Candle
+        :param callable on_forming: A function called with the incomplete Candle after every update that doesn't complete it.
+            If None, incomplete candles are not reported.
+        :param tzinfo tz: The timezone of the session. If None, the timezone of the updates is used.
+        :param timedelta session_start: The time of day the session starts in tz. Defaults to midnight.
+        """
+        self.period = period
+        self._on_candle = on_candle
+        self._on_forming = on_forming
+        self._kind = period.kind
+        self._size = period.size
+        self._tz = tz
+        self._session_start = session_start
+
+        self._time = None
+        self._end_ts = None
+        self._open = None
+        self._high = None
+        self._low = None
+        self._close = None
+        self._volume = 0
+
+    @property
+    def forming(self):
+        """Return the candle that is currently being built.
+
+        :return: The incomplete candle, or None if no updates have been received since the last candle completed
+        :rtype: Candle
+        """
+        if self._time is None:
+            return None
+        return self._build()
+
+    def _build(self):
+        return Candle(
+            self.period,
+            self._time,
+            self._open,
+            self._high,
+            self._low,
+            self._close,
+            self._volume,
+        )
+
+    def _start(self, time, c_open):
+        self._time = time
+        if self._kind == CandlePeriod.TIME:
+            self._time, end = self.period.span(time, self._tz, self._session_start)
+            self._end_ts = end.timestamp()
+        self._open = c_open
+        self._high = c_open
+        self._low = c_open
+        self._close = c_open
+        self._volume = 0
+
+    def _emit(self):
+        candle = self._build()
+        self._time = None
+        self._on_candle(candle)
+
+    def add_bar(self, time, c_open, c_high, c_low, c_close, c_volume):
+        """Add a bar, such as a 5-second real-time bar, to the candle being built.
+
+        :param datetime.datetime time: Time of bar open
+        :param float c_open: Open price of the bar
+        :param float c_high: High price of the bar
+        :param float c_low: Low price of the bar
+        :param float c_close: Close price of the bar
+        :param float c_volume: Trading volume during the bar
+        """
+        ts = time.timestamp()
+
+        # A time-based candle completes when an update arrives for the next candle
+        if self._time is not None and self._end_ts is not None and ts >= self._end_ts:
+            self._emit()
+
+        if self._time is None:
+            self._start(time, c_open)
+
+        if c_high > self._high:
+            self._high = c_high
+        if c_low < self._low:
+            self._low = c_low
+        self._close = c_close
+        self._volume += c_volume
+
+        # Activity-based candles complete as soon as they reach their size
+        if self._kind == CandlePeriod.VOLUME:
+            if self._volume >= self._size:
+                self._emit()
+        elif self._kind == CandlePeriod.RANGE:
+            if self._high - self._low >= self._size:
+                self._emit()
+
+        if self._on_forming is not None and self._time is not None:
+            self._on_forming(self._build())
+
+    def add_tick(self, time, price, size=0):
+        """Add a trade to the candle being built.
+
+        :param datetime.datetime time: Time of the trade
+        :param float price: Price of the trade
+        :param float size: Number of units traded
+        """
+        self.add_bar(time, price, price, price, price, size)
+
+    def flush(self):
+        """Complete the candle being built, if any, without waiting for the next update."""
+        if self._time is not None:
+            self._emit()
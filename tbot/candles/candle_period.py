@@ -1,10 +1,34 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
+
+DAY = timedelta(days=1)
+
+
+def _localize(tz, wall):
+    """Attach a timezone to a wall-clock time, which pytz timezones can't do with replace()."""
+    if tz is None:
+        return wall
+    localize = getattr(tz, "localize", None)
+    return wall.replace(tzinfo=tz) if localize is None else localize(wall)
 
 
 class CandlePeriod:
-    """Class to represent the duration of time of a candle."""
+    """Class to represent the duration of time of a candle.
+
+    Most periods are a fixed amount of time, such as "5m" or "1d". Two kinds of activity-based periods are also supported:
+
+      * Volume bars, such as "1000v", close once the given volume has traded
+      * Range bars, such as "2.5r", close once the high and low of the candle are the given distance apart
+    """
+
+    TIME = "time"
+    VOLUME = "volume"
+    RANGE = "range"
 
     dt_lookup = {
+        "5s": timedelta(seconds=5),
+        "10s": timedelta(seconds=10),
+        "15s": timedelta(seconds=15),
+        "30s": timedelta(seconds=30),
         "1m": timedelta(minutes=1),
         "2m": timedelta(minutes=2),
         "3m": timedelta(minutes=3),
@@ -21,6 +45,11 @@ class CandlePeriod:
     for key, value in dt_lookup.items():
         str_lookup[value] = key
 
+    kind_lookup = {
+        "v": VOLUME,
+        "r": RANGE,
+    }
+
     @classmethod
     def from_timedelta(cls, dt):
         """Create a CandlePeriod from a timedelta.
@@ -37,7 +66,21 @@ class CandlePeriod:
         :param str str: The duration of the CandlePeriod, represented as a string.
         """
         self._str = str
-        self._dt = self.dt_lookup[str]
+        if str in self.dt_lookup:
+            self._kind = self.TIME
+            self._dt = self.dt_lookup[str]
+            self._size = self._dt.total_seconds()
+
+        else:
+            # Activity-based periods are a positive number followed by a kind suffix
+            try:
+                self._kind = self.kind_lookup[str[-1:]]
+                self._size = float(str[:-1])
+            except (KeyError, ValueError):
+                raise KeyError(str) from None
+            if self._size <= 0:
+                raise ValueError(f"Candle period size must be positive. Got {str}")
+            self._dt = None
 
     def as_str(self):
         """Return the string representation of the CandlePeriod.
@@ -55,14 +98,105 @@ class CandlePeriod:
         """
         return self._str
 
+    def __eq__(self, other):
+        """Return True if the other object is a CandlePeriod of the same duration."""
+        if not isinstance(other, CandlePeriod):
+            return NotImplemented
+        return self._str == other._str
+
+    def __hash__(self):
+        """Return a hash of the CandlePeriod."""
+        return hash(self._str)
+
+    @property
+    def kind(self):
+        """Return the kind of the CandlePeriod.
+
+        :return: One of CandlePeriod.TIME, CandlePeriod.VOLUME or CandlePeriod.RANGE
+        :rtype: str
+        """
+        return self._kind
+
+    @property
+    def size(self):
+        """Return the size of the CandlePeriod.
+
+        :return: The number of seconds, volume or price range that completes a candle, depending on the kind of period
+        :rtype: float
+        """
+        return self._size
+
+    def is_time_based(self):
+        """Return True if candles of this period span a fixed amount of time.
+
+        :rtype: bool
+        """
+        return self._kind == self.TIME
+
     def as_timedelta(self):
         """Return the timedelta equivalent of the CandlePeriod.
 
-        :return: The timedelta equivalent of the CandlePeriod.
+        :return: The timedelta equivalent of the CandlePeriod, or None if the period is not time-based.
         :rtype: timedelta
         """
         return self._dt
 
+    def span(self, time, tz=None, session_start=None):
+        """Return the open and close times of the candle of this period that contains a time.
+
+        Candles are aligned to the trading day rather than to the Unix epoch. Each day starts at session_start in the
+        timezone tz. A "1d" candle covers one such day, a "1w" candle starts on Monday, and shorter candles are multiples
+        of the period from the start of the day, so "4h" candles of a session starting at 9:30 open at 9:30, 13:30 and so
+        on. Days are counted on the wall clock, so daily and weekly candles keep their start across daylight saving
+        changes.
+
+        :param datetime time: The time
+        :param tzinfo tz: The timezone of the session. If None, the timezone of time is used, or the local wall clock if
+            time is naive.
+        :param timedelta session_start: The time of day the session starts. Defaults to midnight. A negative value starts
+            the session on the previous day, such as -6 hours for futures that open at 18:00 the day before.
+        :return: The open and close times of the candle, in the timezone of time
+        :rtype: tuple[datetime, datetime]
+        """
+        if not self.is_time_based():
+            raise ValueError(f"Candle period {self} is not time-based")
+        if tz is None:
+            tz = time.tzinfo
+        if session_start is None:
+            session_start = timedelta(0)
+
+        # A naive time is on the local wall clock, which astimezone() understands
+        local = time if tz is None else time.astimezone(tz)
+        wall = local.replace(tzinfo=None)
+        day = datetime.combine(wall.date(), datetime.min.time()) + session_start
+        while day > wall:
+            day -= DAY
+        while day + DAY <= wall:
+            day += DAY
+
+        if self._dt >= DAY:
+            if self._dt >= timedelta(weeks=1):
+                # The session belongs to the date it starts on once session_start is taken away
+                day -= timedelta(days=(day - session_start).weekday())
+            start = _localize(tz, day)
+            end = _localize(tz, day + self._dt)
+        else:
+            # Intraday candles are counted in elapsed time, and the last one of a day ends with the day
+            day_start = _localize(tz, day)
+            day_end = _localize(tz, day + DAY)
+            elapsed = (local - day_start) // self._dt
+            start = day_start + elapsed * self._dt
+            end = min(start + self._dt, day_end)
+
+        if time.tzinfo is not None:
+            return start.astimezone(time.tzinfo), end.astimezone(time.tzinfo)
+        if tz is not None:
+            return (
+                start.astimezone().replace(tzinfo=None),
+                end.astimezone().replace(tzinfo=None),
+            )
+        return start, end
+
     def __repr__(self) -> str:
         """Return the object representation of the CandlePeriod.
 
@@ -26,8 +26,88 @@ class CandleSeries:
         self._max_candles = max_candles
         self._series = initial_candles[-max_candles:]
 
+        # Counters that let indicators tell what changed since they last ran
+        self._appends = 0
+        self._revisions = 0
+
         self._validate()
 
+    @classmethod
+    def from_dataframe(cls, period, data, max_candles=None):
+        """Create a candle series from a pandas DataFrame.
+
+        :param CandlePeriod period: The elapsed time of a candle in this series.
+        :param pandas.DataFrame data: OHLCV data indexed by candle open time, with the columns
+            "Open", "High", "Low", "Close" and "Volume". The index should already be in the desired timezone.
+        :param int max_candles: The maximum number of candles to store. If None, the length of the DataFrame is used.
+        :return: A candle series containing a candle for each row of the DataFrame
+        :rtype: CandleSeries
+
+        .. note::
+            The columns are read as whole arrays rather than row by row, so no per-row pandas objects are created.
+        """
+        if max_candles is None:
+            max_candles = max(len(data), 2)
+
+        # Only convert the rows that will be retained
+        data = data.iloc[-max_candles:]
+        times = data.index.to_pydatetime()
+        opens = data["Open"].to_numpy().tolist()
+        highs = data["High"].to_numpy().tolist()
+        lows = data["Low"].to_numpy().tolist()
+        closes = data["Close"].to_numpy().tolist()
+        volumes = data["Volume"].to_numpy().tolist()
+
+        candles = [
+            Candle(period, t, o, h, lo, c, v)
+            for t, o, h, lo, c, v in zip(times, opens, highs, lows, closes, volumes)
+        ]
+        return cls(period, candles, max_candles)
+
+    def to_dataframe(self):
+        """Return the candle series as a pandas DataFrame.
+
+        :return: OHLCV data indexed by candle open time, using the same column names accepted by from_dataframe
+        :rtype: pandas.DataFrame
+        """
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "Open": [c.open for c in self._series],
+                "High": [c.high for c in self._series],
+                "Low": [c.low for c in self._series],
+                "Close": [c.close for c in self._series],
+                "Volume": [c.volume for c in self._series],
+            },
+            index=pd.DatetimeIndex([c.time for c in self._series], name="Date"),
+        )
+
+    @property
+    def max_candles(self):
+        """Return the maximum number of candles the series stores.
+
+        :rtype: int
+        """
+        return self._max_candles
+
+    def resize(self, max_candles):
+        """Change the maximum number of candles the series stores.
+
+        :param int max_candles: The new maximum. If the series holds more candles than this, the oldest are dropped.
+            Growing the series doesn't bring back candles that were already dropped, it only keeps more of the candles
+            appended from now on.
+        """
+        if max_candles < 2:
+            raise ValueError(f"max_candles must be at least 2. Got {max_candles}")
+
+        self._max_candles = max_candles
+        excess = len(self._series) - max_candles
+        if excess > 0:
+            del self._series[:excess]
+            # Indicators must not treat the dropped candles as an append, so count this as a revision
+            self._revisions += 1
+
     @property
     def last(self):
         """Return the most recent candle in the series."""
@@ -56,9 +136,9 @@ class CandleSeries:
             if not isinstance(c, Candle):
                 raise TypeError("Not all objects in the series of type Candle")
 
-        # Check that every candle has the same timedelta as the series
+        # Check that every candle has the same period as the series
         for c in self._series:
-            if c._period_dt != self._period_dt:
+            if c.period != self.period:
                 raise ValueError(
                     f"Not all candles in the series have a period of {str(self.period)}"
                 )
@@ -72,5 +152,50 @@ class CandleSeries:
             )
 
         self._series.append(candle)
+        self._appends += 1
         while len(self._series) > self._max_candles:
             self._series.pop(0)
+
+    def replace_last(self, candle):
+        """Replace the most recent candle in the series, such as when an incomplete candle is updated.
+
+        :param Candle candle: The candle to replace the most recent candle with
+        """
+        if not isinstance(candle, Candle):
+            raise TypeError(
+                f"Attempted to replace a candle with an object that is not a Candle. Got {type(candle)}"
+            )
+        if len(self._series) == 0:
+            raise IndexError("Cannot replace the last candle of an empty series")
+
+        self._series[-1] = candle
+
+    def state(self):
+        """Return a token describing which candles in the series have changed.
+
+        Two tokens compare equal if the only change between them is a replacement of the most recent candle.
+
+        :rtype: tuple
+        """
+        return (self._appends, self._revisions)
+
+    def revise(self, candle):
+        """Replace the candle that opened at the same time as the provided candle.
+
+        :param Candle candle: The corrected candle
+        :return: The index of the replaced candle
+        :rtype: int
+        """
+        if not isinstance(candle, Candle):
+            raise TypeError(
+                f"Attempted to revise with an object that is not a Candle. Got {type(candle)}"
+            )
+
+        # Revisions are almost always to the most recent candles, so search from the end
+        for ind in range(len(self._series) - 1, -1, -1):
+            if self._series[ind].time == candle.time:
+                self._series[ind] = candle
+                self._revisions += 1
+                return ind
+
+        raise ValueError(f"No candle at {candle.time} to revise")
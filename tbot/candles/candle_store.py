@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytz
+
+from .candle import Candle
+from .candle_series import CandleSeries
+
+# Adding a timedelta to the epoch is cheaper than datetime.fromtimestamp, which matters when loading many symbols
+_EPOCH = datetime(1970, 1, 1, tzinfo=pytz.utc)
+
+
+class CandleStore:
+    """Class to persist candles on the local filesystem.
+
+    Each (symbol, period) pair is stored as a compressed NumPy archive of columns, so large numbers of symbols can be
+    loaded in bulk without parsing text.
+
+    .. note::
+        Times are stored the same way as Candle.to_json_dict, as integer milliseconds since the epoch. Loaded candles
+        have UTC timestamps.
+    """
+
+    COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+    def __init__(self, root):
+        """Initialize the candle store.
+
+        :param pathlib.Path root: The directory to store candles in. It is created if it does not exist.
+        """
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def root(self):
+        """Return the directory the candles are stored in.
+
+        :rtype: pathlib.Path
+        """
+        return self._root
+
+    def _path(self, symbol, period):
+        # Some symbols, like futures, contain characters that aren't valid in filenames
+        safe_symbol = str(symbol).replace("/", "_")
+        return self._root / f"{safe_symbol}_{str(period)}.npz"
+
+    def symbols(self, period):
+        """Return the symbols that have candles stored for a period.
+
+        :param CandlePeriod period: The candle period
+        :rtype: list[str]
+        """
+        suffix = f"_{str(period)}.npz"
+        return sorted(
+            p.name[: -len(suffix)]
+            for p in self._root.glob(f"*{suffix}")
+            if p.name.endswith(suffix)
+        )
+
+    def contains(self, symbol, period):
+        """Return True if candles are stored for the symbol and period."""
+        return self._path(symbol, period).exists()
+
+    def save_arrays(self, symbol, period, arrays):
+        """Store candles in columnar form.
+
+        :param str symbol: The symbol the candles belong to
+        :param CandlePeriod period: The period of the candles
+        :param dict arrays: A dictionary of (column -> array) containing every column in CandleStore.COLUMNS
+        """
+        np.savez_compressed(
+            self._path(symbol, period),
+            time=np.asarray(arrays["time"], dtype=np.int64),
+            open=np.asarray(arrays["open"], dtype=np.float64),
+            high=np.asarray(arrays["high"], dtype=np.float64),
+            low=np.asarray(arrays["low"], dtype=np.float64),
+            close=np.asarray(arrays["close"], dtype=np.float64),
+            volume=np.asarray(arrays["volume"], dtype=np.float64),
+        )
+
+    def save(self, symbol, series):
+        """Store a candle series.
+
+        :param str symbol: The symbol the series belongs to
+        :param CandleSeries series: The candles to store. Any candles previously stored for the symbol and period are replaced.
+        """
+        self.save_arrays(
+            symbol,
+            series.period,
+            {
+                "time": [int(c.time.timestamp() * 1000) for c in series],
+                "open": [c.open for c in series],
+                "high": [c.high for c in series],
+                "low": [c.low for c in series],
+                "close": [c.close for c in series],
+                "volume": [c.volume for c in series],
+            },
+        )
+
+    def load_arrays(self, symbol, period):
+        """Load stored candles in columnar form.
+
+        :param str symbol: The symbol to load
+        :param CandlePeriod period: The period of the candles
+        :return: A dictionary of (column -> numpy array) for every column in CandleStore.COLUMNS
+        :rtype: dict
+        """
+        with np.load(self._path(symbol, period)) as archive:
+            return {col: archive[col] for col in self.COLUMNS}
+
+    def load(self, symbol, period, max_candles=None):
+        """Load stored candles as a candle series.
+
+        :param str symbol: The symbol to load
+        :param CandlePeriod period: The period of the candles
+        :param int max_candles: The maximum number of candles to keep. If None, every stored candle is kept.
+        :rtype: CandleSeries
+        """
+        arrays = self.load_arrays(symbol, period)
+        if max_candles is None:
+            max_candles = max(len(arrays["time"]), 2)
+
+        cols = [arrays[col][-max_candles:].tolist() for col in self.COLUMNS]
+        candles = [
+            Candle(
+                period,
+                _EPOCH + timedelta(milliseconds=t),
+                o,
+                h,
+                lo,
+                c,
+                v,
+            )
+            for t, o, h, lo, c, v in zip(*cols)
+        ]
+        return CandleSeries(period, candles, max_candles)
@@ -1,9 +1,20 @@
-from .candle_indicator import CandleIndicator
-from .indicator import Indicator
-from .talib_indicator import TalibIndicator
+from tbot.util.lazy import lazy_exports
 
-__all__ = [
-    "Indicator",
-    "CandleIndicator",
-    "TalibIndicator",
-]
+# Submodules are imported when one of their names is first used
+_EXPORTS = {
+    "Indicator": ".indicator",
+    "CandleIndicator": ".candle_indicator",
+    "DerivedSeries": ".graph",
+    "HorizontalSR": ".sr",
+    "IndicatorGraph": ".graph",
+    "IndicatorSet": ".indicator_set",
+    "MatrixIndicator": ".matrix",
+    "RingBuffer": ".ring_buffer",
+    "SeriesArrays": ".ring_buffer",
+    "StreamingIndicator": ".streaming",
+    "TalibIndicator": ".talib_indicator",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
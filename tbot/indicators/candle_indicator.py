@@ -1,6 +1,9 @@
 from abc import abstractmethod
 
+import numpy as np
+
 from .indicator import Indicator
+from .ring_buffer import RingBuffer
 
 
 class CandleIndicator(Indicator):
@@ -10,10 +13,34 @@ class CandleIndicator(Indicator):
         """Initialize the indicator."""
         super().__init__()
         self._result = None
+        self._series_state = None
+        self._ring = None
 
     def _update(self, series):
+        # If only the most recent candle changed, try to refresh just the last value
+        state = series.state()
+        if state == self._series_state and self._result is not None:
+            last = self.update_last(series)
+            if last is not NotImplemented:
+                self._store_last(last)
+                return
+
+        self._series_state = state
         self._result = self.update(series)
 
+    def _result_buffer(self, series, dtype=np.float64):
+        """Return a ring buffer for one result per candle, with the same capacity as the series.
+
+        The buffer is reused between updates, so results slide along with the series instead of being reallocated.
+
+        :param CandleSeries series: The series the results are calculated on
+        :param numpy.dtype dtype: The type of the results
+        :rtype: RingBuffer
+        """
+        if self._ring is None or self._ring.capacity != series.max_candles:
+            self._ring = RingBuffer(series.max_candles, dtype=dtype)
+        return self._ring
+
     @abstractmethod
     def update(self, series):
         """Calculate the result of the indicator on the series, then save the result.
@@ -22,6 +49,21 @@ class CandleIndicator(Indicator):
         """
         pass
 
+    def update_last(self, series):
+        """Calculate the last value of the indicator after the most recent candle of the series was replaced.
+
+        Indicators that can recompute their final value from state retained by the previous update should override this.
+        By default the indicator is recalculated on the whole series.
+
+        :param CandleSeries series: The series to perform the calculation on
+        :return: The new last value of the indicator, or NotImplemented to recalculate the whole series
+        """
+        return NotImplemented
+
+    def _store_last(self, last):
+        """Replace the last value of the result with the value returned by update_last."""
+        self._result[-1] = last
+
     @property
     def last(self):
         """Return the last value in the indicator, which corresponds to the most recent point in time."""
@@ -31,5 +73,9 @@ class CandleIndicator(Indicator):
 
     @property
     def data(self):
-        """Return the full data set calculated on the underlying candles."""
+        """Return the full data set calculated on the underlying candles.
+
+        Indicators that keep their results in a ring buffer return a view of it, with one value per candle of the series.
+        The view is only valid until the next update.
+        """
         return self._result
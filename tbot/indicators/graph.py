@@ -0,0 +1,332 @@
+"""Indicators calculated on the results of other indicators.
+
+An indicator's input is either the feed, or a series of candles built from the result of another indicator, such as an
+SMA of an RSI, or GannAnalysis run on Heikin-Ashi candles. Built series are kept up to date incrementally and behave like
+any other CandleSeries, so every indicator can be used at any level without changes.
+"""
+import math
+
+from tbot.candles import Candle, CandleSeries
+
+from .indicator import Indicator
+
+PRICES = ("open", "high", "low", "close")
+
+
+def _same(a, b):
+    return a == b or (a != a and b != b)
+
+
+class DerivedSeries(CandleSeries):
+    """Class to hold a series of candles built from the result of an indicator, one candle per value.
+
+    Each candle takes its time and volume from the candle the value was calculated on. Its prices are chosen from the
+    value by fields. Candles before the first one with a close are left out, so indicators calculated on the series
+    don't start from the NaN that an indicator returns while it has too few candles. The series is aligned with its base
+    series from the most recent candle.
+
+    Like any CandleSeries, appends and revisions are counted, so indicators on the series only read what changed. Only
+    the most recent candle is compared with the value it was built from, so when an indicator recalculates earlier values,
+    such as an RSI after the oldest candle of the feed is dropped, those candles keep the values they were built with.
+    """
+
+    def __init__(self, period, fields=None):
+        """Initialize the series.
+
+        :param CandlePeriod period: The period of the base series
+        :param fields: How to read prices from each value. None uses the whole value as every price, for indicators with
+            one value per candle. A key, such as a column index or the name of a field or of an IndicatorSet function,
+            uses the value at that key as every price. A dictionary of (price -> key) sets each of "open", "high", "low"
+            and "close", and optionally "volume", from a different key. Missing prices are the close.
+        """
+        super().__init__(period, [], 2)
+        if isinstance(fields, dict):
+            unknown = set(fields) - set(PRICES + ("volume",))
+            if unknown:
+                raise ValueError(f"Unknown price fields {sorted(unknown)}")
+            if "close" not in fields:
+                raise ValueError("fields must set the close")
+        self.fields = fields
+        self._base_state = None
+
+    @classmethod
+    def _value(cls, values, ind, key):
+        if values is None:
+            raise ValueError("The base series has no values to build candles from")
+        if isinstance(values, dict):
+            if isinstance(key, tuple):
+                return values[key[0]][ind][key[1]]
+            return values[key][ind]
+        if key is None:
+            return values[ind]
+        return values[ind][key]
+
+    def _candle(self, base, values, ind):
+        """Build the candle for a value.
+
+        :param CandleSeries base: The series the values were calculated on, or whose candles are read if values is None
+        :param values: The result of the indicator, with one value per candle of base
+        :param int ind: The index of the value
+        :rtype: Candle
+        """
+        c = base[ind]
+        if isinstance(self.fields, dict):
+            close = self.fields["close"]
+            if values is None:
+                prices = [getattr(c, self.fields.get(p, close)) for p in PRICES]
+            else:
+                prices = [
+                    float(self._value(values, ind, self.fields.get(p, close)))
+                    for p in PRICES
+                ]
+            volume = c.volume
+            if "volume" in self.fields:
+                volume = self._field(c, values, ind, self.fields["volume"])
+        else:
+            prices = [self._field(c, values, ind, self.fields)] * 4
+            volume = c.volume
+        return Candle(self.period, c.time, *prices, volume)
+
+    def _field(self, candle, values, ind, key):
+        if values is None:
+            return getattr(candle, key)
+        return float(self._value(values, ind, key))
+
+    def sync(self, base, values=None):
+        """Bring the series up to date with its base series.
+
+        :param CandleSeries base: The series the values were calculated on
+        :param values: The result of an indicator calculated on base, with one value per candle, or None to build the
+            candles from the prices of base, such as to calculate an indicator on the highs
+        :return: True if any candle of the series changed
+        :rtype: bool
+        """
+        n = len(base)
+        if values is not None:
+            length = (
+                len(next(iter(values.values())))
+                if isinstance(values, dict)
+                else len(values)
+            )
+            if length != n:
+                raise ValueError(
+                    f"The indicator has {length} values for a series of {n} candles. Derived series need one value per"
+                    " candle."
+                )
+
+        state = base.state()
+        appended = None
+        if (
+            self._base_state is not None
+            and state[1] == self._base_state[1]
+            and base.max_candles == self._max_candles
+        ):
+            appended = state[0] - self._base_state[0]
+        self._base_state = state
+
+        if appended is None or appended >= n:
+            self._rebuild(base, values)
+            return True
+
+        if len(self._series) == 0:
+            # Every earlier value had no close, so only the most recent candles can start the series
+            candles = [
+                self._candle(base, values, ind)
+                for ind in range(max(n - appended - 1, 0), n)
+            ]
+            candles = candles[self._first_close(candles) :]
+            for c in candles:
+                self.append(c)
+            return len(candles) > 0
+
+        # The most recent candle may have been replaced since the last sync
+        prev = self._candle(base, values, n - appended - 1)
+        last = self._series[-1]
+        changed = not all(
+            _same(getattr(prev, p), getattr(last, p)) for p in PRICES + ("volume",)
+        )
+        if changed:
+            self.replace_last(prev)
+        if appended == 0:
+            return changed
+
+        for ind in range(n - appended, n):
+            self.append(self._candle(base, values, ind))
+        return True
+
+    @classmethod
+    def _first_close(cls, candles):
+        """Return the index of the first candle with a close, or the number of candles if there isn't one."""
+        return next(
+            (ind for ind, c in enumerate(candles) if not math.isnan(c.close)),
+            len(candles),
+        )
+
+    def _rebuild(self, base, values):
+        self._max_candles = base.max_candles
+        candles = [self._candle(base, values, ind) for ind in range(len(base))]
+        self._series = candles[self._first_close(candles) :]
+        self._revisions += 1
+
+
+class _Node:
+    """An indicator of a graph, with the series it is calculated on."""
+
+    def __init__(self, indicator, source, fields, graph):
+        self.indicator = indicator
+        self.source = source
+        self.derived = source is not None or fields is not None
+        if source is not None and fields is None:
+            fields = getattr(graph[source], "FIELDS", None)
+        self.fields = fields
+        # The derived series is built on the first update, once the period of the feed is known
+        self.input = None
+        self.dirty = True
+        self.lookback = indicator.lookback
+        if source is not None:
+            self.lookback += graph._nodes[source].lookback
+
+
+class IndicatorGraph:
+    """Class to calculate indicators that take other indicators as input, once per update of a feed.
+
+    Each indicator is calculated on the feed, or on a DerivedSeries built from the result of an indicator registered
+    before it, so registration order is a topological order of the graph. On each update, indicators are calculated in
+    that order. The result of each indicator is kept between updates, and an indicator is skipped when its input series
+    didn't change, such as an SMA of a MAX when an intrabar update doesn't set a new high. Skipping an indicator skips
+    everything calculated on it.
+
+    Example::
+
+        graph = IndicatorGraph()
+        graph.add("rsi", TalibIndicator("RSI", timeperiod=14))
+        graph.add("rsi_sma", TalibIndicator("SMA", timeperiod=9), source="rsi")
+        graph.add("ha", streaming.HeikinAshi())
+        graph.add("gann_ha", GannAnalysis(), source="ha")
+        graph.update(series)
+        graph["rsi_sma"].last
+    """
+
+    def __init__(self):
+        """Initialize the graph."""
+        self._nodes = {}
+        self._indicators = {}
+        self._feed_state = None
+        self._feed_last = None
+
+    @property
+    def indicators(self):
+        """Return the indicators of the graph.
+
+        :return: A dictionary of (name -> Indicator), in evaluation order
+        :rtype: dict
+        """
+        return self._indicators
+
+    def __getitem__(self, name):
+        """Return the indicator registered to a name."""
+        return self._indicators[name]
+
+    def __contains__(self, name):
+        """Return True if an indicator is registered to the name."""
+        return name in self._nodes
+
+    def __len__(self):
+        """Return the number of indicators in the graph."""
+        return len(self._nodes)
+
+    @property
+    def lookback(self):
+        """Return the number of feed candles before the most recent one that the indicators need.
+
+        The lookback of an indicator calculated on another indicator adds to the lookback of the other indicator.
+
+        :rtype: int
+        """
+        return max((node.lookback for node in self._nodes.values()), default=0)
+
+    def add(self, name, indicator, source=None, fields=None):
+        """Add an indicator to the graph.
+
+        :param str name: A unique name for the indicator, such as "sma_14"
+        :param Indicator indicator: The indicator
+        :param str source: The name of the indicator whose result this indicator is calculated on. If None, the indicator
+            is calculated on the feed.
+        :param fields: How to build candles from the result of the source, as for DerivedSeries. If None, the FIELDS
+            attribute of the source indicator is used if it has one, such as for HeikinAshi. With no source, a dictionary
+            of (price -> candle attribute) calculates the indicator on other prices of the feed, such as
+            {"close": "high"}.
+        """
+        if not isinstance(indicator, Indicator):
+            raise TypeError(
+                f"Param 'indicator' must be of type Indicator. Got {type(indicator)}"
+            )
+        if name in self._nodes:
+            raise ValueError(
+                f"There is already an indicator named '{name}' registered."
+            )
+        if source is not None and source not in self._nodes:
+            raise KeyError(
+                f"There is no indicator named '{source}' to use as the source of '{name}'"
+            )
+
+        self._nodes[name] = _Node(indicator, source, fields, self)
+        self._indicators[name] = indicator
+
+    def remove(self, name):
+        """Remove an indicator from the graph.
+
+        :param str name: The name of the indicator
+        """
+        dependents = [n for n, node in self._nodes.items() if node.source == name]
+        if dependents:
+            raise ValueError(f"Indicator '{name}' is the source of {dependents}")
+        del self._nodes[name]
+        del self._indicators[name]
+
+    def series(self, name):
+        """Return the series an indicator is calculated on.
+
+        :param str name: The name of the indicator
+        :return: The DerivedSeries of the indicator, or None if it is calculated on the feed itself
+        :rtype: CandleSeries
+        """
+        return self._nodes[name].input
+
+    def update(self, series):
+        """Calculate the indicators whose input changed since the last update.
+
+        :param CandleSeries series: The feed
+        """
+        if not self._nodes:
+            return
+
+        # The feed changed unless nothing was appended or revised and the last candle is the same object
+        state = series.state()
+        last = series.last if len(series) > 0 else None
+        changed = {None: state != self._feed_state or last is not self._feed_last}
+        self._feed_state = state
+        self._feed_last = last
+
+        for name, node in self._nodes.items():
+            node_changed = changed[node.source]
+            if node.derived:
+                if node.source is None:
+                    base, values = series, None
+                else:
+                    source = self._nodes[node.source]
+                    base = series if source.input is None else source.input
+                    values = source.indicator.data
+                if node.input is None:
+                    node.input = DerivedSeries(series.period, node.fields)
+                if node.dirty or node_changed:
+                    node_changed = node.input.sync(base, values)
+                inputs = node.input
+            else:
+                inputs = series
+
+            if node_changed or node.dirty:
+                node.indicator._update(inputs)
+                node.dirty = False
+                node_changed = True
+            changed[name] = node_changed
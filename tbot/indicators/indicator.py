@@ -7,3 +7,14 @@ class Indicator(ABC):
     def __init__(self):
         """Initialize the indicator."""
         pass
+
+    @property
+    def lookback(self):
+        """Return the number of candles before a candle that the indicator needs to calculate its value.
+
+        Feeds that are sized automatically keep at least this many candles plus one. Indicators that need history
+        should override this.
+
+        :rtype: int
+        """
+        return 0
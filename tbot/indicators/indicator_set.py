@@ -0,0 +1,197 @@
+import numpy as np
+
+from .candle_indicator import CandleIndicator
+from .ring_buffer import COLUMNS, RingBuffer, SeriesArrays
+from .talib_indicator import TalibIndicator, _streaming_equivalent
+
+
+class _Spec:
+    """A TA-Lib function resolved to a direct call on input arrays."""
+
+    def __init__(self, talib_fcn, ta_args, ta_kwargs):
+        import talib
+        import talib.abstract
+
+        name = talib_fcn.info["name"] if hasattr(talib_fcn, "info") else talib_fcn
+        info = talib.abstract.Function(name, *ta_args, **ta_kwargs)
+
+        # Call the function API directly, which skips the abstract API's input mapping on every call
+        self.fcn = getattr(talib, name)
+        self.params = dict(info.parameters)
+        self.outputs = len(info.output_names)
+        self.lookback = info.lookback
+        self.inputs = []
+        for names in info.input_names.values():
+            self.inputs.extend([names] if isinstance(names, str) else names)
+
+        # Inputs other than the candle columns, such as the periods of MAVP, can't be read from the series
+        unknown = [col for col in self.inputs if col not in COLUMNS]
+        if unknown:
+            raise ValueError(
+                f"{name} needs inputs {unknown} that aren't candle columns. Only functions of {list(COLUMNS)} can be"
+                " added to an IndicatorSet."
+            )
+
+        self.window = 0
+        if (
+            name in TalibIndicator.WINDOWED_FUNCTIONS
+            and self.params.get("matype", 0) == 0
+        ):
+            self.window = info.lookback + 1
+
+        # Functions that smooth over the whole series are calculated incrementally if they can be
+        self.streaming = None if self.window else _streaming_equivalent(info)
+
+    def __call__(self, inputs, window=0):
+        args = [inputs[col][-window:] if window else inputs[col] for col in self.inputs]
+        out = self.fcn(*args, **self.params)
+        return out if self.outputs == 1 else np.column_stack(out)
+
+
+class IndicatorSet(CandleIndicator):
+    """Indicator to evaluate many TA-Lib functions on the same series.
+
+    The series is converted into input arrays once per update, and every function is then run on those arrays. Inputs
+    and results are kept in ring buffers with the capacity of the series, so only appended candles are read, and
+    windowed functions, such as SMA, are only run on the candles needed for the new values. Compared to registering a TalibIndicator for each
+    function, the conversion and the Python overhead of each update are paid once per feed rather than once per function.
+
+    Functions that smooth over the whole series are calculated by their streaming equivalent if they have one, as in
+    TalibIndicator. Other functions that depend on the whole series, such as ADX, are run on every retained candle by
+    each update, including intrabar updates.
+
+    .. note::
+        The result is a dictionary of (name -> array). Functions with several outputs, such as BBANDS, have a 2-D array
+        with one column per output, like TalibIndicator.
+    """
+
+    def __init__(self, specs=()):
+        """Initialize the indicator set.
+
+        :param list specs: The functions to evaluate, as (name, talib_fcn, kwargs) tuples. More can be added with add().
+        """
+        super().__init__()
+        self._specs = {}
+        self._inputs = SeriesArrays()
+        self._buffers = {}
+
+        for name, talib_fcn, ta_kwargs in specs:
+            self.add(name, talib_fcn, **ta_kwargs)
+
+    def add(self, name, talib_fcn, *ta_args, **ta_kwargs):
+        """Add a function to the set.
+
+        :param str name: A unique name to identify the result, such as "sma_14"
+        :param callable talib_fcn: The TA-Lib abstract function, such as tbot.indicators.talib.SMA, or its name
+        :param ta_args: Positional arguments to be supplied to the underlying TA-Lib call
+        :param ta_kwargs: Keyword arguments to be supplied to the underlying TA-Lib call
+        """
+        if name in self._specs:
+            raise ValueError(f"There is already a function named '{name}' in the set.")
+
+        self._specs[name] = _Spec(talib_fcn, ta_args, ta_kwargs)
+
+        # Calculate everything on the next update, including the new function
+        self._series_state = None
+
+    @property
+    def names(self):
+        """Return the names of the functions in the set.
+
+        :rtype: list[str]
+        """
+        return list(self._specs)
+
+    @property
+    def lookback(self):
+        """Return the largest lookback of the functions in the set.
+
+        :rtype: int
+        """
+        return max((spec.lookback for spec in self._specs.values()), default=0)
+
+    def __getitem__(self, name):
+        """Return the result of a function in the set.
+
+        :param str name: The name of the function
+        :rtype: numpy.ndarray
+        """
+        return self._result[name]
+
+    def _buffer(self, name, series):
+        buf = self._buffers.get(name)
+        if buf is None or buf.capacity != series.max_candles:
+            buf = RingBuffer(series.max_candles)
+            self._buffers[name] = buf
+        return buf
+
+    def update(self, series):
+        """Calculate every function in the set on the series, then save the results.
+
+        :param CandleSeries series: The series to perform the calculation on
+        """
+        appended = self._inputs.refresh(series)
+        inputs = self._inputs.columns
+        n = len(series)
+
+        result = {}
+        for name, spec in self._specs.items():
+            if spec.streaming is not None:
+                spec.streaming._update(series)
+                result[name] = spec.streaming.data
+                continue
+
+            buf = self._buffer(name, series)
+            if spec.window and appended and len(buf) + appended >= n:
+                # Also recalculate the previous last value, since its candle may have been replaced before the append
+                out = spec(inputs, spec.window + appended)
+                buf[-1] = out[-appended - 1]
+                buf.extend(out[-appended:])
+                # As in a recalculation, values whose window starts before the oldest candle of the series are NaN
+                buf[: spec.window - 1] = np.nan
+            else:
+                buf.fill(spec(inputs))
+            result[name] = buf.view
+
+        return result
+
+    def update_last(self, series):
+        """Calculate the last value of every function after the most recent candle of the series was replaced.
+
+        :param CandleSeries series: The series to perform the calculation on
+        :return: A dictionary of (name -> last value)
+
+        .. note::
+            Windowed functions, such as SMA, are only run on the candles needed for the last value, and functions with a
+            streaming equivalent only recalculate the last value. Other functions are run on the retained inputs of the
+            previous update.
+        """
+        if len(self._inputs) != len(series):
+            return NotImplemented
+
+        self._inputs.set_last(series.last)
+        inputs = self._inputs.columns
+
+        values = {}
+        for name, spec in self._specs.items():
+            if spec.streaming is not None:
+                spec.streaming._update(series)
+                values[name] = spec.streaming.last
+            else:
+                values[name] = spec(inputs, spec.window)[-1]
+        return values
+
+    def _store_last(self, last):
+        for name, value in last.items():
+            self._result[name][-1] = value
+
+    @property
+    def last(self):
+        """Return the most recent value of every function in the set.
+
+        :return: A dictionary of (name -> last value)
+        :rtype: dict
+        """
+        if self._result is None:
+            return None
+        return {name: values[-1] for name, values in self._result.items()}
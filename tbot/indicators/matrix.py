@@ -0,0 +1,285 @@
+"""Indicators evaluated on many symbols at once.
+
+Prices of many feeds are stacked into (time x symbol) arrays, and each indicator updates one row of symbols per candle
+with a handful of NumPy operations. The cost of a bar is a few array operations no matter how many symbols there are,
+instead of one Python and TA-Lib call per symbol.
+
+Results follow TA-Lib's conventions where TA-Lib has the same function. A symbol contributes NaN until its first candle,
+and the indicator's value for that symbol stays NaN until it has seen enough candles.
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+PRICES = ("open", "high", "low", "close", "volume")
+
+
+def stack(feeds):
+    """Stack the candles of several feeds into (time x symbol) arrays.
+
+    :param list[CandleSeries] feeds: The feeds, in column order
+    :return: The union of every feed's candle times in milliseconds since the epoch, and a dictionary of
+        (price -> (time x symbol) array) for each name in PRICES. A symbol without a candle at a time carries its previous
+        prices forward. Times before a symbol's first candle are NaN.
+    :rtype: tuple(numpy.ndarray, dict)
+    """
+    times = [
+        np.array([int(c.time.timestamp() * 1000) for c in feed], dtype=np.int64)
+        for feed in feeds
+    ]
+    union = np.unique(np.concatenate(times)) if times else np.empty(0, np.int64)
+    shape = (len(union), len(feeds))
+    prices = {name: np.full(shape, np.nan) for name in PRICES}
+
+    for col, feed in enumerate(feeds):
+        rows = np.searchsorted(union, times[col])
+        for name in PRICES:
+            prices[name][rows, col] = [getattr(c, name) for c in feed]
+
+    # Forward fill each column by pointing every row at the last row that had a price
+    rows = np.where(np.isnan(prices["close"]), 0, np.arange(len(union))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    cols = np.arange(len(feeds))
+    return union, {name: values[rows, cols] for name, values in prices.items()}
+
+
+class MatrixIndicator(ABC):
+    """Base class for indicators that update every symbol at once.
+
+    Subclasses implement push(), which adds one row of symbols to the state and returns the row of values for it. The
+    input of an indicator is either a price, such as "close", or the result of another indicator evaluated before it
+    on the same row, which lets indicators be chained, such as the rank of an RSI.
+    """
+
+    def __init__(self, source="close"):
+        """Initialize the indicator.
+
+        :param str source: The price, or the name of an earlier indicator, to calculate the indicator on
+        """
+        self.source = source
+
+    def _input(self, prices, values):
+        if self.source in prices:
+            return prices[self.source]
+        return values[self.source]
+
+    @abstractmethod
+    def reset(self, n_symbols):
+        """Clear the state of the indicator, so the next push() is the first row.
+
+        :param int n_symbols: The number of symbols in each row
+        """
+        pass
+
+    @abstractmethod
+    def push(self, prices, values):
+        """Add a row to the state.
+
+        :param dict prices: The prices of every symbol at the row, as (price -> 1-D array)
+        :param dict values: The results of the indicators evaluated before this one at the row, as (name -> 1-D array)
+        :return: The value of the indicator for every symbol at the row
+        :rtype: numpy.ndarray
+        """
+        pass
+
+
+class _RollingWindow:
+    """Running sum and sum of squares of the last n rows, ignoring NaN."""
+
+    def __init__(self, n, n_symbols):
+        self.n = n
+        self._values = np.zeros((n, n_symbols))
+        self._valid = np.zeros((n, n_symbols), dtype=np.int64)
+        self._pos = 0
+        self.count = np.zeros(n_symbols, dtype=np.int64)
+        self.sum = np.zeros(n_symbols)
+        self.sumsq = np.zeros(n_symbols)
+
+    def push(self, x):
+        valid = ~np.isnan(x)
+        x = np.where(valid, x, 0.0)
+        old = self._values[self._pos]
+
+        # Add, then subtract the values leaving the window, in the same order as TA-Lib
+        self.sum += x
+        self.sum -= old
+        self.sumsq += x * x
+        self.sumsq -= old * old
+        self.count += valid
+        self.count -= self._valid[self._pos]
+
+        self._values[self._pos] = x
+        self._valid[self._pos] = valid
+        self._pos = (self._pos + 1) % self.n
+
+    @property
+    def full(self):
+        return self.count == self.n
+
+
+class RollingMean(MatrixIndicator):
+    """Simple moving average of every symbol."""
+
+    def __init__(self, timeperiod=30, source="close"):
+        """Initialize the indicator.
+
+        :param int timeperiod: The number of rows to average
+        :param str source: See MatrixIndicator
+        """
+        super().__init__(source)
+        self.timeperiod = timeperiod
+        self._window = None
+
+    def reset(self, n_symbols):
+        """Clear the state of the indicator."""
+        self._window = _RollingWindow(self.timeperiod, n_symbols)
+
+    def push(self, prices, values):
+        """Add a row and return the average ending at it."""
+        w = self._window
+        w.push(self._input(prices, values))
+        return np.where(w.full, w.sum / w.n, np.nan)
+
+
+class ZScore(MatrixIndicator):
+    """Distance of every symbol from its moving average, in (population) standard deviations."""
+
+    def __init__(self, timeperiod=20, source="close"):
+        """Initialize the indicator.
+
+        :param int timeperiod: The number of rows to calculate the average and standard deviation over
+        :param str source: See MatrixIndicator
+        """
+        super().__init__(source)
+        self.timeperiod = timeperiod
+        self._window = None
+
+    def reset(self, n_symbols):
+        """Clear the state of the indicator."""
+        self._window = _RollingWindow(self.timeperiod, n_symbols)
+
+    def push(self, prices, values):
+        """Add a row and return the z-score of it."""
+        x = self._input(prices, values)
+        w = self._window
+        w.push(x)
+        mean = w.sum / w.n
+        std = np.sqrt(np.maximum(w.sumsq / w.n - mean * mean, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(std > 0.0, (x - mean) / std, 0.0)
+        return np.where(w.full, z, np.nan)
+
+
+class EMA(MatrixIndicator):
+    """Exponential moving average of every symbol, seeded with the simple average of its first values like TA-Lib."""
+
+    def __init__(self, timeperiod=30, source="close"):
+        """Initialize the indicator.
+
+        :param int timeperiod: The period of the average. The first value is the simple average of this many rows.
+        :param str source: See MatrixIndicator
+        """
+        super().__init__(source)
+        self.timeperiod = timeperiod
+        self.k = 2.0 / (timeperiod + 1)
+        self._count = None
+        self._seed = None
+        self._value = None
+
+    def reset(self, n_symbols):
+        """Clear the state of the indicator."""
+        self._count = np.zeros(n_symbols, dtype=np.int64)
+        self._seed = np.zeros(n_symbols)
+        self._value = np.full(n_symbols, np.nan)
+
+    def push(self, prices, values):
+        """Add a row and return the average at it."""
+        n = self.timeperiod
+        x = self._input(prices, values)
+        valid = ~np.isnan(x)
+        running = valid & (self._count >= n)
+        seeding = valid & (self._count < n)
+
+        np.add(self._seed, x, out=self._seed, where=seeding)
+        self._count += seeding
+        seeded = seeding & (self._count == n)
+        np.divide(self._seed, n, out=self._value, where=seeded)
+
+        self._value = np.where(
+            running, (x - self._value) * self.k + self._value, self._value
+        )
+        return self._value.copy()
+
+
+class RSI(MatrixIndicator):
+    """Relative strength index of every symbol, using Wilder's smoothing."""
+
+    def __init__(self, timeperiod=14, source="close"):
+        """Initialize the indicator.
+
+        :param int timeperiod: The smoothing period
+        :param str source: See MatrixIndicator
+        """
+        super().__init__(source)
+        self.timeperiod = timeperiod
+        self._prev = None
+        self._count = None
+        self._gain = None
+        self._loss = None
+
+    def reset(self, n_symbols):
+        """Clear the state of the indicator."""
+        self._prev = np.full(n_symbols, np.nan)
+        self._count = np.zeros(n_symbols, dtype=np.int64)
+        self._gain = np.zeros(n_symbols)
+        self._loss = np.zeros(n_symbols)
+
+    def push(self, prices, values):
+        """Add a row and return the RSI at it."""
+        n = self.timeperiod
+        x = self._input(prices, values)
+        diff = x - self._prev
+        self._prev = np.where(np.isnan(x), self._prev, x)
+
+        valid = ~np.isnan(diff)
+        up = np.where(valid & (diff > 0), diff, 0.0)
+        down = np.where(valid & (diff < 0), -diff, 0.0)
+        running = valid & (self._count >= n)
+        seeding = valid & (self._count < n)
+
+        # Sum the first n changes, then smooth
+        self._gain = np.where(running, self._gain * (n - 1), self._gain) + up
+        self._loss = np.where(running, self._loss * (n - 1), self._loss) + down
+        self._count += seeding
+        average = running | (seeding & (self._count == n))
+        self._gain = np.where(average, self._gain / n, self._gain)
+        self._loss = np.where(average, self._loss / n, self._loss)
+
+        total = self._gain + self._loss
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(np.abs(total) < 1e-8, 0.0, 100.0 * (self._gain / total))
+        return np.where(self._count >= n, rsi, np.nan)
+
+
+class Rank(MatrixIndicator):
+    """Percentile rank of every symbol among the symbols at the same row.
+
+    The lowest value ranks 0 and the highest ranks 1. Symbols without a value are NaN and aren't counted.
+    """
+
+    def reset(self, n_symbols):
+        """Clear the state of the indicator."""
+        pass
+
+    def push(self, prices, values):
+        """Rank a row."""
+        x = self._input(prices, values)
+        valid = ~np.isnan(x)
+        n_valid = np.count_nonzero(valid)
+
+        # NaN sorts last, so valid values take the ranks 0 to n_valid - 1
+        ranks = np.empty(len(x))
+        ranks[np.argsort(x, kind="stable")] = np.arange(len(x))
+        ranks /= max(n_valid - 1, 1)
+        ranks[~valid] = np.nan
+        return ranks
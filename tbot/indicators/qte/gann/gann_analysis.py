@@ -1,27 +1,89 @@
+import numpy as np
+
 from tbot.indicators.candle_indicator import CandleIndicator
 
 from .gann_dir import GannDir
 
 
 class GannAnalysis(CandleIndicator):
-    """Indicator to perform Gann Bar Counting, Leg Analysis, and ABC Detection using the methods on the Quant Trade Edge Channel."""
-
+    """Indicator to perform Gann Bar Counting, Leg Analysis, and ABC Detection using the methods on the Quant Trade Edge Channel.
+
+    The result is a NumPy structured array with one row per candle and the fields of RESULT_DTYPE. Each field holds a
+    GannDir value, or NONE where there is no ABC or U-turn. The legs are available separately through the legs property,
+    and as_dicts() returns the result in the older format of one dictionary per candle.
+
+    .. note::
+        Bar directions and legs depend on every earlier candle, so every update runs the analysis on the whole series,
+        including intrabar updates that only replace the most recent candle. Prefer not to register it on subscribers
+        that set INTRABAR. The result is kept in a ring buffer that slides with the series, but the analysis itself
+        still builds its bar directions and legs from scratch, so each update costs time and temporary memory in
+        proportion to the length of the series.
+    """
+
+    # A stricter number of consecutive inside bars to make a Hoagie, which can be passed as hoagie_min_inside_bars. Until
+    # then, each bar is compared with the one before it. By default a single inside bar starts a Hoagie.
     HOAGIE_MIN_INSIDE_BARS = 2
 
-    def __init__(self):
-        """Initialize the indicator."""
+    # Code stored in the abc and uturn fields of candles without an ABC or U-turn
+    NONE = 0
+
+    RESULT_DTYPE = np.dtype(
+        [("direction", np.int8), ("abc", np.int8), ("uturn", np.int8)]
+    )
+    LEG_DTYPE = np.dtype(
+        [
+            ("dir", np.int8),
+            ("start", np.int64),
+            ("end", np.int64),
+            ("high", np.float64),
+            ("low", np.float64),
+        ]
+    )
+
+    def __init__(self, lookback=200, hoagie_min_inside_bars=1):
+        """Initialize the indicator.
+
+        :param int lookback: The number of candles the analysis needs. Bar directions and legs depend on every earlier
+            candle, so this is the history kept for the legs, ABCs and U-turns to settle rather than an exact minimum.
+        :param int hoagie_min_inside_bars: The number of consecutive inside bars that make a Hoagie. The default of 1
+            starts a Hoagie on the first inside bar. Pass HOAGIE_MIN_INSIDE_BARS to wait for a run of inside bars.
+        """
         super().__init__()
+        if hoagie_min_inside_bars < 1:
+            raise ValueError(
+                f"hoagie_min_inside_bars must be at least 1. Got {hoagie_min_inside_bars}"
+            )
+        self._lookback = lookback
+        self.hoagie_min_inside_bars = hoagie_min_inside_bars
+        self._legs = np.empty(0, dtype=self.LEG_DTYPE)
+        self._last_abc = None
+        self._last_uturn = None
+
+    @property
+    def lookback(self):
+        """Return the number of candles the analysis needs.
+
+        :rtype: int
+        """
+        return self._lookback
 
     @classmethod
-    def _calc_dirs(cls, series):
+    def _calc_dirs(cls, series, min_inside_bars=1):
         """Calculate the bar directions of each candle using the Gann With Hoagie bar counting method.
 
+        A Hoagie starts once min_inside_bars consecutive bars are inside the bar before the first of them. Until the
+        Hoagie is broken, bars are compared with that outer bar rather than with the previous bar.
+
         :returns: A list of bar directions
         """
         bar_dirs = []
         hoagie_active = False
         hoagie_candle = None
 
+        # The bar before the current run of inside bars, and the number of bars in the run
+        outer_candle = None
+        inside_bars = 0
+
         # Label the first direction based on close direction
         if series[0].open < series[0].close:
             bar_dirs.append(GannDir.UP)
@@ -37,20 +99,29 @@ class GannAnalysis(CandleIndicator):
                 # Up bar
                 if (curr.high > prev.high) and (curr.low > prev.low):
                     bar_dirs.append(GannDir.UP)
+                    outer_candle = None
 
                 # Down bar
                 elif (curr.low < prev.low) and (curr.high < prev.high):
                     bar_dirs.append(GannDir.DOWN)
+                    outer_candle = None
 
-                # Inside bar
+                # Inside bar. A bar inside the previous inside bar is also inside the outer bar.
                 elif (curr.high <= prev.high) and (curr.low >= prev.low):
                     bar_dirs.append(bar_dirs[-1])
-                    hoagie_active = True
-                    hoagie_candle = prev
+                    if outer_candle is None:
+                        outer_candle = prev
+                        inside_bars = 0
+                    inside_bars += 1
+                    if inside_bars >= min_inside_bars:
+                        hoagie_active = True
+                        hoagie_candle = outer_candle
+                        outer_candle = None
 
                 # Outside bar
                 else:
                     bar_dirs.append(bar_dirs[-1])
+                    outer_candle = None
 
             # We're within a potential Hoagie
             else:
@@ -142,7 +213,8 @@ class GannAnalysis(CandleIndicator):
         return legs
 
     @classmethod
-    def _calc_abcs(cls, series, legs):
+    def _calc_abcs(cls, series, legs, abcs):
+        """Mark the ABCs in abcs, which has one value per candle."""
         abc_up_inds = []
         abc_down_inds = []
         if len(legs) > 2:
@@ -162,17 +234,20 @@ class GannAnalysis(CandleIndicator):
                         abc_down_inds.append(C["end"])
 
         # Flatten ABC locations into an array the same size as the data series
-        abcs = [None] * len(series)
+        abcs[:] = cls.NONE
         for ind in abc_up_inds:
             abcs[ind] = GannDir.UP
         for ind in abc_down_inds:
             abcs[ind] = GannDir.DOWN
-        return abcs
 
     @classmethod
-    def _calc_uturns(cls, series, legs):
+    def _calc_uturns(cls, series, legs, uturns):
+        """Mark the U-turns in uturns, which has one value per candle."""
         uturn_up_inds = []
         uturn_down_inds = []
+        uturns[:] = cls.NONE
+        if len(legs) == 0:
+            return
 
         crit_high = None
         crit_low = None
@@ -265,27 +340,91 @@ class GannAnalysis(CandleIndicator):
                             curr_trend = GannDir.UP
 
         # Flatten uturn locations into an array the same size as the data series
-        uturns = [None] * len(series)
         for ind in uturn_up_inds:
             uturns[ind] = GannDir.UP
         for ind in uturn_down_inds:
             uturns[ind] = GannDir.DOWN
-        return uturns
+
+    @classmethod
+    def _last_marked(cls, marks):
+        """Return the (index, GannDir) of the last candle with a mark, or None."""
+        inds = np.flatnonzero(marks)
+        if len(inds) == 0:
+            return None
+        return int(inds[-1]), GannDir(marks[inds[-1]])
 
     def update(self, series):
         """Calculate the result of the indicator on the series, then save the result.
 
         :param CandleSeries series: The series to perform the calculation on
         """
-        bar_dirs = self._calc_dirs(series)
+        # The result is written into a ring buffer, which only grows until the series is full
+        n = len(series)
+        buffer = self._result_buffer(series, self.RESULT_DTYPE)
+        if len(buffer) > n:
+            buffer.clear()
+        if len(buffer) < n:
+            buffer.extend(np.zeros(n - len(buffer), dtype=self.RESULT_DTYPE))
+        result = buffer.view
+
+        if n == 0:
+            self._legs = np.empty(0, dtype=self.LEG_DTYPE)
+            self._last_abc = None
+            self._last_uturn = None
+            return result
+
+        bar_dirs = self._calc_dirs(series, self.hoagie_min_inside_bars)
         legs = self._calc_legs(series, bar_dirs)
-        abcs = self._calc_abcs(series, legs)
-        uturns = self._calc_uturns(series, legs)
+        result["direction"] = bar_dirs
+        self._calc_abcs(series, legs, result["abc"])
+        self._calc_uturns(series, legs, result["uturn"])
+
+        self._legs = np.array(
+            [(g["dir"], g["start"], g["end"], g["high"], g["low"]) for g in legs],
+            dtype=self.LEG_DTYPE,
+        )
+        self._last_abc = self._last_marked(result["abc"])
+        self._last_uturn = self._last_marked(result["uturn"])
+        return result
 
-        result = []
-        for i in range(len(bar_dirs)):
-            result.append(
-                {"direction": bar_dirs[i], "abc": abcs[i], "uturn": uturns[i]}
-            )
+    @property
+    def legs(self):
+        """Return the completed legs of the series.
 
-        return result
+        :return: A structured array with one row per leg and the fields of LEG_DTYPE. start and end are candle indices.
+        :rtype: numpy.ndarray
+        """
+        return self._legs
+
+    def last_abc(self):
+        """Return the most recent ABC.
+
+        :return: The (candle index, GannDir) of the most recent ABC, or None if there isn't one
+        :rtype: tuple
+        """
+        return self._last_abc
+
+    def last_uturn(self):
+        """Return the most recent U-turn.
+
+        :return: The (candle index, GannDir) of the most recent U-turn, or None if there isn't one
+        :rtype: tuple
+        """
+        return self._last_uturn
+
+    def as_dicts(self):
+        """Return the result as a list with a dictionary per candle.
+
+        This is the format update() returned before the result became a structured array. Each dictionary has the keys
+        "direction", "abc" and "uturn", holding a GannDir or None.
+
+        :rtype: list[dict]
+        """
+        if self._result is None:
+            return None
+
+        to_dir = {self.NONE: None, GannDir.UP: GannDir.UP, GannDir.DOWN: GannDir.DOWN}
+        return [
+            {"direction": to_dir[d], "abc": to_dir[a], "uturn": to_dir[u]}
+            for d, a, u in self._result.tolist()
+        ]
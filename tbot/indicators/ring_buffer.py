@@ -0,0 +1,207 @@
+import numpy as np
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+class RingBuffer:
+    """Class to hold the most recent values of a sequence, up to a fixed capacity, in a preallocated array.
+
+    Appending to a full buffer drops the oldest value. The values are always readable as one contiguous array, oldest
+    first, without copying: the backing array holds twice the capacity, and the values are only moved back to the start
+    of it once it runs out of room, which happens once every capacity appends.
+    """
+
+    def __init__(self, capacity, shape=None, dtype=np.float64):
+        """Initialize the buffer.
+
+        :param int capacity: The maximum number of values to hold
+        :param tuple shape: The shape of each value, such as () for scalars or (3,) for rows of three. If None, it is
+            taken from the first value added.
+        :param numpy.dtype dtype: The type of the values
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1. Got {capacity}")
+
+        self.capacity = capacity
+        self.dtype = dtype
+        self._data = None if shape is None else np.empty((2 * capacity,) + shape, dtype)
+        self._start = 0
+        self._end = 0
+
+    def _allocate(self, value):
+        if self._data is None:
+            self._data = np.empty((2 * self.capacity,) + np.shape(value), self.dtype)
+
+    def _make_room(self, n):
+        """Move the values to the start of the backing array if n more don't fit after them."""
+        if self._end + n > len(self._data):
+            keep = self._end - self._start
+            self._data[:keep] = self._data[self._start : self._end]
+            self._start = 0
+            self._end = keep
+
+    @property
+    def view(self):
+        """Return the values, oldest first.
+
+        :return: A view of the backing array. It is only valid until the next append, extend or fill.
+        :rtype: numpy.ndarray
+        """
+        if self._data is None:
+            return np.empty(0, self.dtype)
+        return self._data[self._start : self._end]
+
+    def append(self, value):
+        """Add a value, dropping the oldest value if the buffer is full.
+
+        :param value: The value to add
+        """
+        if self._data is None or self._end == len(self._data):
+            self._allocate(value)
+            self._make_room(1)
+
+        end = self._end
+        self._data[end] = value
+        self._end = end + 1
+        if end - self._start >= self.capacity:
+            self._start += 1
+
+    def set_last(self, value):
+        """Replace the most recent value.
+
+        :param value: The new value
+        """
+        if self._end == self._start:
+            raise IndexError("Cannot replace the last value of an empty buffer")
+        self._data[self._end - 1] = value
+
+    def extend(self, values):
+        """Add several values in order, dropping the oldest values if the buffer is full.
+
+        :param numpy.ndarray values: The values to add, as an array whose first axis is the values
+        """
+        n = len(values)
+        if n == 0:
+            return
+        self._allocate(values[0])
+        if n >= self.capacity:
+            self._data[: self.capacity] = values[-self.capacity :]
+            self._start = 0
+            self._end = self.capacity
+            return
+
+        self._make_room(n)
+        self._data[self._end : self._end + n] = values
+        self._end += n
+        self._start = max(self._start, self._end - self.capacity)
+
+    def fill(self, values):
+        """Replace every value with the most recent values of an array.
+
+        :param numpy.ndarray values: The values, as an array whose first axis is the values
+        """
+        self.clear()
+        self.extend(values)
+
+    def clear(self):
+        """Remove every value. The backing array is kept."""
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        """Return the number of values in the buffer."""
+        return self._end - self._start
+
+    def __getitem__(self, ind):
+        """Return the value, or slice of values, at an index. Index 0 is the oldest value."""
+        return self.view[ind]
+
+    def __setitem__(self, ind, value):
+        """Replace the value, or slice of values, at an index."""
+        self.view[ind] = value
+
+    def __array__(self, dtype=None, copy=None):
+        """Return the values as a NumPy array."""
+        if dtype is None:
+            return self.view
+        return self.view.astype(dtype)
+
+
+class SeriesArrays:
+    """Class to keep the OHLCV columns of a candle series in ring buffers that slide along with it.
+
+    After candles are appended to the series, only those candles are read. The buffers have the same capacity as the
+    series, so row i of every column is always candle i of the series.
+    """
+
+    def __init__(self):
+        """Initialize the arrays."""
+        self._buffers = None
+        self._columns = None
+        self._state = None
+
+    @property
+    def columns(self):
+        """Return every column.
+
+        :return: A dictionary of (name -> array) for each name in COLUMNS. The arrays are only valid until the next
+            refresh.
+        :rtype: dict
+        """
+        if self._columns is None:
+            self._columns = {col: buf.view for col, buf in self._buffers.items()}
+        return self._columns
+
+    def __len__(self):
+        """Return the number of candles in the arrays."""
+        return 0 if self._buffers is None else len(self._buffers["close"])
+
+    def refresh(self, series):
+        """Bring the arrays up to date with the series.
+
+        :param CandleSeries series: The series to read
+        :return: The number of candles appended since the last refresh, or None if every candle was read again
+        :rtype: int
+        """
+        state = series.state()
+        prev_state = self._state
+        self._state = state
+
+        if (
+            self._buffers is None
+            or self._buffers["close"].capacity != series.max_candles
+        ):
+            self._buffers = {col: RingBuffer(series.max_candles, ()) for col in COLUMNS}
+            prev_state = None
+
+        appended = None
+        if prev_state is not None and state[1] == prev_state[1]:
+            appended = state[0] - prev_state[0]
+
+        n = len(series)
+        if appended is None or appended >= n or len(self) == 0:
+            for col, buf in self._buffers.items():
+                buf.fill(np.fromiter((getattr(c, col) for c in series), np.float64, n))
+            self._columns = None
+            return None
+
+        # The last candle that was read may have been replaced since, so read it again
+        self.set_last(series[n - appended - 1])
+        for c in series[n - appended :]:
+            for col, buf in self._buffers.items():
+                buf.append(getattr(c, col))
+        self._columns = None
+        return appended
+
+    def set_last(self, candle):
+        """Replace the most recent row with the prices of a candle.
+
+        :param Candle candle: The candle
+        """
+        # Write through the cached column views, since this runs on every intrabar update
+        columns = self.columns
+        columns["open"][-1] = candle.open
+        columns["high"][-1] = candle.high
+        columns["low"][-1] = candle.low
+        columns["close"][-1] = candle.close
+        columns["volume"][-1] = candle.volume
@@ -0,0 +1,158 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .candle_indicator import CandleIndicator
+
+
+class HorizontalSR(CandleIndicator):
+    """Indicator to find horizontal support and resistance levels.
+
+    Swing highs and swing lows are found by comparing each candle against the candles on either side of it. The prices of
+    those pivots are then sorted and grouped into clusters of nearby prices. Every cluster with enough pivots becomes a
+    level, at the mean price of the cluster.
+
+    .. note::
+        Unlike most indicators, the result is not one value per candle. Both data and last return the array of levels,
+        in ascending order, so it isn't kept in a ring buffer. The levels still depend on which candles the series
+        holds. Like the leading values of windowed indicators, a pivot only counts while its whole window is in the
+        series, so the levels match a fresh calculation on the retained candles. Each update only reads the candles that
+        aren't settled yet, and the levels are only recalculated when a pivot is found or dropped.
+    """
+
+    def __init__(self, window=5, tolerance=0.01, min_touches=2):
+        """Initialize the indicator.
+
+        :param int window: The number of candles on each side of a candle that it must be higher (or lower) than to be a pivot
+        :param float tolerance: The largest gap between neighboring pivot prices in the same cluster, as a fraction of price
+        :param int min_touches: The minimum number of pivots in a cluster for it to become a level
+        """
+        super().__init__()
+        if window < 1:
+            raise ValueError(f"window must be at least 1. Got {window}")
+
+        self.window = window
+        self.tolerance = tolerance
+        self.min_touches = min_touches
+
+        # Pivots found so far, as (pivot time, is high) -> price
+        self._pivots = {}
+        self._checked_time = None
+        self._revisions = None
+        self._clustered = None
+
+    @property
+    def lookback(self):
+        """Return the number of candles needed on both sides of a pivot.
+
+        :rtype: int
+        """
+        return 2 * self.window
+
+    @classmethod
+    def _find_pivots(cls, values, window, highs):
+        """Return the indices of the swing highs (or lows) in values.
+
+        Only candles with a full window on both sides are considered.
+        """
+        if len(values) < 2 * window + 1:
+            return np.empty(0, dtype=np.intp)
+
+        windows = sliding_window_view(values, 2 * window + 1)
+        centers = values[window:-window]
+        if highs:
+            is_pivot = centers >= windows.max(axis=1)
+        else:
+            is_pivot = centers <= windows.min(axis=1)
+        return np.flatnonzero(is_pivot) + window
+
+    def _first_unchecked(self, series):
+        """Return the index of the first candle that hasn't been checked for a pivot yet."""
+        if self._checked_time is None:
+            return 0
+        for ind in range(len(series) - 1, -1, -1):
+            if series[ind].time <= self._checked_time:
+                return ind + 1
+        return 0
+
+    def cluster(self, prices):
+        """Group pivot prices into levels.
+
+        :param numpy.ndarray prices: The prices of the pivots
+        :return: The levels, in ascending order
+        :rtype: numpy.ndarray
+        """
+        if len(prices) == 0:
+            return np.empty(0, dtype=np.float64)
+
+        # After sorting, a cluster ends wherever the gap to the next price is too large
+        prices = np.sort(prices)
+        breaks = np.flatnonzero(np.diff(prices) > self.tolerance * prices[:-1]) + 1
+        starts = np.concatenate(([0], breaks))
+        counts = np.diff(np.append(starts, len(prices)))
+        levels = np.add.reduceat(prices, starts) / counts
+        return levels[counts >= self.min_touches]
+
+    def update(self, series):
+        """Calculate the result of the indicator on the series, then save the result.
+
+        :param CandleSeries series: The series to perform the calculation on
+
+        .. note::
+            Only candles that weren't checked by a previous update, plus the window before them, are scanned for pivots.
+            Pivots are discarded once the candles on their left start to leave the series, as a fresh calculation
+            wouldn't find them. A candle is only checked once the candles on
+            its right don't include the most recent one, which may still be forming, so intrabar updates also only
+            rescan the last few candles.
+        """
+        # A revised candle could change any pivot, so start over
+        revisions = series.state()[1]
+        if revisions != self._revisions:
+            self._pivots = {}
+            self._checked_time = None
+            self._revisions = revisions
+
+        w = self.window
+        first = self._first_unchecked(series)
+        start = max(first - w, 0)
+        candles = series[start:]
+
+        # Drop pivots without a full window on their left any more, since the candles before them have left the series,
+        # and those about to be scanned again. A rescan never finds them again, as it needs a full window too.
+        removed = {}
+        if len(series) > 0:
+            oldest = series[w].time if len(series) > w else None
+            end = series[first].time if first < len(series) else None
+            for k in [
+                k
+                for k in self._pivots
+                if oldest is None or k[0] < oldest or (end is not None and k[0] >= end)
+            ]:
+                removed[k] = self._pivots.pop(k)
+        added = {}
+
+        highs = np.fromiter((c.high for c in candles), np.float64, len(candles))
+        lows = np.fromiter((c.low for c in candles), np.float64, len(candles))
+        for is_high, values in ((True, highs), (False, lows)):
+            for ind in self._find_pivots(values, w, is_high):
+                if start + ind >= first:
+                    added[(candles[ind].time, is_high)] = values[ind]
+        self._pivots.update(added)
+
+        # Every candle whose window doesn't reach the most recent candle has now been checked
+        if len(candles) > w + 1:
+            self._checked_time = candles[-w - 2].time
+
+        # Most updates only find the same pivots again, so the levels only need clustering when the pivots changed
+        if (
+            added == removed
+            and self._result is not None
+            and revisions == self._clustered
+        ):
+            return self._result
+        self._clustered = revisions
+        return self.cluster(np.fromiter(self._pivots.values(), np.float64))
+
+    @property
+    def last(self):
+        """Return the current support and resistance levels, in ascending order."""
+        return self._result
@@ -0,0 +1,656 @@
+"""Indicators that update in constant time per candle.
+
+Each indicator keeps a fixed amount of state and only reads the candles appended since its last update, so the cost of
+an update doesn't depend on the length of the series. Results follow TA-Lib's conventions: the same default periods, the
+same seeding, and NaN until the indicator has enough candles. None of these indicators need TA-Lib.
+"""
+import math
+from abc import abstractmethod
+from collections import deque
+
+from .candle_indicator import CandleIndicator
+
+NAN = float("nan")
+
+
+class StreamingIndicator(CandleIndicator):
+    """Base class for indicators that update incrementally.
+
+    Subclasses implement push(), which adds a candle to the state and returns the value for it, and pop(), which undoes
+    the most recent push(). Replacing the most recent candle of the series, as intrabar updates do, is a pop() followed by
+    a push(). Only appends are handled incrementally. If a candle is revised, the indicator starts over from the first
+    candle of the series.
+    """
+
+    def __init__(self):
+        """Initialize the indicator."""
+        super().__init__()
+        self._seen = None
+        self._pushed = None
+
+    @abstractmethod
+    def reset(self):
+        """Clear the state of the indicator, so the next push() is the first candle."""
+        pass
+
+    @abstractmethod
+    def push(self, candle):
+        """Add a candle to the state.
+
+        :param Candle candle: The next candle of the series
+        :return: The value of the indicator at the candle
+        """
+        pass
+
+    @abstractmethod
+    def pop(self):
+        """Undo the most recent push()."""
+        pass
+
+    def update(self, series):
+        """Add the candles appended to the series since the last update, then save the result.
+
+        :param CandleSeries series: The series to perform the calculation on
+        """
+        state = series.state()
+        appended = None
+        if self._seen is not None and state[1] == self._seen[1]:
+            appended = state[0] - self._seen[0]
+        self._seen = state
+
+        buffer = self._result_buffer(series)
+        if (
+            appended is None
+            or appended > len(series)
+            or len(buffer) + appended < len(series)
+        ):
+            self.reset()
+            buffer.clear()
+            candles = series
+        else:
+            candles = series[len(series) - appended :]
+            # The most recent candle may have been replaced since it was pushed, without an update in between
+            prev = (
+                series[len(series) - appended - 1] if appended < len(series) else None
+            )
+            if prev is not None and prev is not self._pushed:
+                self.pop()
+                buffer.set_last(self.push(prev))
+
+        # The buffer has the capacity of the series, so it keeps one value per candle in the series
+        for c in candles:
+            buffer.append(self.push(c))
+        if len(series) > 0:
+            self._pushed = series.last
+        return buffer.view
+
+    def update_last(self, series):
+        """Recalculate the last value after the most recent candle of the series was replaced.
+
+        :param CandleSeries series: The series to perform the calculation on
+        :return: The new last value of the indicator
+        """
+        if self._result is None or len(self._result) == 0:
+            return NotImplemented
+
+        self.pop()
+        self._pushed = series.last
+        return self.push(series.last)
+
+
+class _ScalarState:
+    """Mixin to undo a push() by restoring a few attributes saved at its start."""
+
+    _STATE = ()
+
+    def _save(self):
+        self._undo = tuple(getattr(self, name) for name in self._STATE)
+
+    def _restore(self):
+        for name, value in zip(self._STATE, self._undo):
+            setattr(self, name, value)
+
+
+class _RollingSum(_ScalarState):
+    """Running sum and sum of squares of the last n values."""
+
+    _STATE = ("_pos", "_count", "sum", "sumsq", "_replaced")
+
+    def __init__(self, n):
+        self.n = n
+        self.reset()
+
+    def reset(self):
+        self._values = [0.0] * self.n
+        self._pos = 0
+        self._count = 0
+        self._replaced = 0.0
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    @property
+    def full(self):
+        return self._count >= self.n
+
+    def push(self, value):
+        self._save()
+        old = self._values[self._pos]
+        self._replaced = old
+
+        # Add, then subtract the value leaving the window, in the same order as TA-Lib
+        self.sum += value
+        self.sumsq += value * value
+        if self._count >= self.n:
+            self.sum -= old
+            self.sumsq -= old * old
+
+        self._values[self._pos] = value
+        self._pos = (self._pos + 1) % self.n
+        self._count += 1
+
+    def pop(self):
+        replaced = self._replaced
+        self._restore()
+        self._values[self._pos] = replaced
+
+
+class _Ema(_ScalarState):
+    """Exponential moving average seeded with the simple average of its first n values, like TA-Lib."""
+
+    _STATE = ("_count", "_seed", "value")
+
+    def __init__(self, n):
+        self.n = n
+        self.k = 2.0 / (n + 1)
+        self.reset()
+
+    def reset(self):
+        self._count = 0
+        self._seed = 0.0
+        self.value = NAN
+
+    def seed(self, value):
+        """Start the average at a value, instead of averaging the first n values."""
+        self._count = self.n
+        self.value = value
+
+    def push(self, x):
+        self._save()
+        if self._count < self.n:
+            self._seed += x
+            self._count += 1
+            if self._count == self.n:
+                self.value = self._seed / self.n
+        else:
+            self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+    def pop(self):
+        self._restore()
+
+
+class SMA(StreamingIndicator):
+    """Simple moving average of the close."""
+
+    def __init__(self, timeperiod=30):
+        """Initialize the indicator.
+
+        :param int timeperiod: The number of candles to average
+        """
+        super().__init__()
+        self._sum = _RollingSum(timeperiod)
+
+    @property
+    def lookback(self):
+        """Return the number of candles before the first value, like TA-Lib."""
+        return self._sum.n - 1
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._sum.reset()
+
+    def push(self, candle):
+        """Add a candle and return the average ending at it."""
+        self._sum.push(candle.close)
+        return self._sum.sum / self._sum.n if self._sum.full else NAN
+
+    def pop(self):
+        """Undo the most recent push()."""
+        self._sum.pop()
+
+
+class EMA(StreamingIndicator):
+    """Exponential moving average of the close."""
+
+    def __init__(self, timeperiod=30):
+        """Initialize the indicator.
+
+        :param int timeperiod: The period of the average. The first value is the simple average of this many candles.
+        """
+        super().__init__()
+        self._ema = _Ema(timeperiod)
+
+    @property
+    def lookback(self):
+        """Return the number of candles before the first value, like TA-Lib."""
+        return self._ema.n - 1
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._ema.reset()
+
+    def push(self, candle):
+        """Add a candle and return the average at it."""
+        return self._ema.push(candle.close)
+
+    def pop(self):
+        """Undo the most recent push()."""
+        self._ema.pop()
+
+
+class RSI(StreamingIndicator, _ScalarState):
+    """Relative strength index of the close, using Wilder's smoothing."""
+
+    _STATE = ("_count", "_prev_close", "_gain", "_loss")
+
+    def __init__(self, timeperiod=14):
+        """Initialize the indicator.
+
+        :param int timeperiod: The smoothing period
+        """
+        super().__init__()
+        self.timeperiod = timeperiod
+        self.reset()
+
+    @property
+    def lookback(self):
+        """Return the number of candles before the first value, like TA-Lib."""
+        return self.timeperiod
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._count = 0
+        self._prev_close = None
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def push(self, candle):
+        """Add a candle and return the RSI at it."""
+        self._save()
+        n = self.timeperiod
+        close = candle.close
+        prev_close = self._prev_close
+        self._prev_close = close
+        self._count += 1
+        if prev_close is None:
+            return NAN
+
+        diff = close - prev_close
+        if self._count <= n + 1:
+            # Sum the first n changes
+            if diff < 0:
+                self._loss -= diff
+            else:
+                self._gain += diff
+            if self._count < n + 1:
+                return NAN
+            self._gain /= n
+            self._loss /= n
+        else:
+            self._gain *= n - 1
+            self._loss *= n - 1
+            if diff < 0:
+                self._loss -= diff
+            else:
+                self._gain += diff
+            self._gain /= n
+            self._loss /= n
+
+        total = self._gain + self._loss
+        if -1e-8 < total < 1e-8:
+            return 0.0
+        return 100.0 * (self._gain / total)
+
+    def pop(self):
+        """Undo the most recent push()."""
+        self._restore()
+
+
+class ATR(StreamingIndicator, _ScalarState):
+    """Average true range, using Wilder's smoothing."""
+
+    _STATE = ("_count", "_prev_close", "_atr")
+
+    def __init__(self, timeperiod=14):
+        """Initialize the indicator.
+
+        :param int timeperiod: The smoothing period
+        """
+        super().__init__()
+        self.timeperiod = timeperiod
+        self.reset()
+
+    @property
+    def lookback(self):
+        """Return the number of candles before the first value, like TA-Lib."""
+        return self.timeperiod
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._count = 0
+        self._prev_close = None
+        self._atr = 0.0
+
+    def push(self, candle):
+        """Add a candle and return the ATR at it."""
+        self._save()
+        n = self.timeperiod
+        prev_close = self._prev_close
+        self._prev_close = candle.close
+        self._count += 1
+        if prev_close is None:
+            return NAN
+
+        true_range = max(candle.high, prev_close) - min(candle.low, prev_close)
+        if self._count <= n + 1:
+            # The first value is the simple average of the first n true ranges
+            self._atr += true_range
+            if self._count < n + 1:
+                return NAN
+            self._atr /= n
+        else:
+            self._atr = (self._atr * (n - 1) + true_range) / n
+        return self._atr
+
+    def pop(self):
+        """Undo the most recent push()."""
+        self._restore()
+
+
+class BBANDS(StreamingIndicator):
+    """Bollinger bands of the close, around a simple moving average.
+
+    Each value is an (upper, middle, lower) tuple, stored as one row of the data.
+    """
+
+    def __init__(self, timeperiod=5, nbdevup=2.0, nbdevdn=2.0):
+        """Initialize the indicator.
+
+        :param int timeperiod: The number of candles in the average and standard deviation
+        :param float nbdevup: The number of standard deviations from the middle band to the upper band
+        :param float nbdevdn: The number of standard deviations from the middle band to the lower band
+        """
+        super().__init__()
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+        self._sum = _RollingSum(timeperiod)
+
+    @property
+    def lookback(self):
+        """Return the number of candles before the first value, like TA-Lib."""
+        return self._sum.n - 1
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._sum.reset()
+
+    def push(self, candle):
+        """Add a candle and return the bands at it."""
+        self._sum.push(candle.close)
+        if not self._sum.full:
+            return (NAN, NAN, NAN)
+
+        n = self._sum.n
+        mean = self._sum.sum / n
+        variance = self._sum.sumsq / n - mean * mean
+        stddev = math.sqrt(variance) if variance > 1e-8 else 0.0
+        return (mean + self.nbdevup * stddev, mean, mean - self.nbdevdn * stddev)
+
+    def pop(self):
+        """Undo the most recent push()."""
+        self._sum.pop()
+
+
+class MACD(StreamingIndicator, _ScalarState):
+    """Moving average convergence/divergence of the close.
+
+    Each value is a (macd, signal, histogram) tuple, stored as one row of the data. Like TA-Lib, the fast average starts
+    on the same candle as the slow one, and every output is NaN until the signal line has its first value.
+    """
+
+    _STATE = ("_count",)
+
+    def __init__(self, fastperiod=12, slowperiod=26, signalperiod=9):
+        """Initialize the indicator.
+
+        :param int fastperiod: The period of the fast average
+        :param int slowperiod: The period of the slow average
+        :param int signalperiod: The period of the average of the MACD line
+        """
+        super().__init__()
+        if slowperiod < fastperiod:
+            fastperiod, slowperiod = slowperiod, fastperiod
+
+        self._fast = _Ema(fastperiod)
+        self._slow = _Ema(slowperiod)
+        self._signal = _Ema(signalperiod)
+        self._fast_seed = _RollingSum(fastperiod)
+        self.reset()
+
+    @property
+    def lookback(self):
+        """Return the number of candles before the first value, like TA-Lib."""
+        return self._slow.n + self._signal.n - 2
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._count = 0
+        self._fast.reset()
+        self._slow.reset()
+        self._signal.reset()
+        self._fast_seed.reset()
+
+    def push(self, candle):
+        """Add a candle and return the MACD at it."""
+        self._save()
+        close = candle.close
+        self._count += 1
+        slow = self._slow.push(close)
+
+        # Until the slow average has its first value, only track the sum of the last fast period of closes
+        if self._count < self._slow.n:
+            self._fast_seed.push(close)
+            self._fast._save()
+            return (NAN, NAN, NAN)
+        if self._count == self._slow.n:
+            self._fast_seed.push(close)
+            self._fast._save()
+            self._fast.seed(self._fast_seed.sum / self._fast.n)
+            fast = self._fast.value
+        else:
+            fast = self._fast.push(close)
+
+        macd = fast - slow
+        signal = self._signal.push(macd)
+        if math.isnan(signal):
+            return (NAN, NAN, NAN)
+        return (macd, signal, macd - signal)
+
+    def pop(self):
+        """Undo the most recent push()."""
+        self._restore()
+        count = self._count + 1
+        self._slow.pop()
+        self._fast.pop()
+        if count <= self._slow.n:
+            self._fast_seed.pop()
+        if count >= self._slow.n:
+            self._signal.pop()
+
+
+class _RollingExtreme(StreamingIndicator):
+    """Rolling maximum or minimum, kept in a monotonic deque of (index, value) pairs."""
+
+    def __init__(self, timeperiod, price, highest):
+        super().__init__()
+        self.timeperiod = timeperiod
+        self.price = price
+        self._highest = highest
+        self.reset()
+
+    @property
+    def lookback(self):
+        """Return the number of candles before the first value, like TA-Lib."""
+        return self.timeperiod - 1
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._window = deque()
+        self._count = 0
+        self._undo = None
+
+    def push(self, candle):
+        """Add a candle and return the extreme of the window ending at it."""
+        value = getattr(candle, self.price)
+        window = self._window
+
+        # Values that can never be the extreme again are dropped from the back
+        dropped = []
+        if self._highest:
+            while window and window[-1][1] <= value:
+                dropped.append(window.pop())
+        else:
+            while window and window[-1][1] >= value:
+                dropped.append(window.pop())
+        window.append((self._count, value))
+
+        expired = None
+        if window[0][0] <= self._count - self.timeperiod:
+            expired = window.popleft()
+
+        self._undo = (dropped, expired)
+        self._count += 1
+        if self._count < self.timeperiod:
+            return NAN
+        return window[0][1]
+
+    def pop(self):
+        """Undo the most recent push()."""
+        dropped, expired = self._undo
+        self._count -= 1
+        if expired is not None:
+            self._window.appendleft(expired)
+        self._window.pop()
+        self._window.extend(reversed(dropped))
+
+
+class MAX(_RollingExtreme):
+    """Highest value over a rolling window."""
+
+    def __init__(self, timeperiod=30, price="close"):
+        """Initialize the indicator.
+
+        :param int timeperiod: The number of candles in the window
+        :param str price: The candle attribute to use, such as "close" or "high"
+        """
+        super().__init__(timeperiod, price, highest=True)
+
+
+class MIN(_RollingExtreme):
+    """Lowest value over a rolling window."""
+
+    def __init__(self, timeperiod=30, price="close"):
+        """Initialize the indicator.
+
+        :param int timeperiod: The number of candles in the window
+        :param str price: The candle attribute to use, such as "close" or "low"
+        """
+        super().__init__(timeperiod, price, highest=False)
+
+
+class VWAP(StreamingIndicator, _ScalarState):
+    """Volume-weighted average of the typical price, (high + low + close) / 3."""
+
+    _STATE = ("_session", "_pv", "_volume")
+
+    def __init__(self, session="day"):
+        """Initialize the indicator.
+
+        :param str session: "day" to start a new average on each calendar day of the candle times, or None to average
+            every candle since the start of the series
+        """
+        super().__init__()
+        if session not in ("day", None):
+            raise ValueError(f"session must be 'day' or None. Got {session}")
+        self.session = session
+        self.reset()
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._session = None
+        self._pv = 0.0
+        self._volume = 0.0
+
+    def push(self, candle):
+        """Add a candle and return the VWAP at it."""
+        self._save()
+        if self.session == "day":
+            session = candle.time.date()
+            if session != self._session:
+                self._session = session
+                self._pv = 0.0
+                self._volume = 0.0
+
+        typical = (candle.high + candle.low + candle.close) / 3.0
+        self._pv += typical * candle.volume
+        self._volume += candle.volume
+        if self._volume <= 0:
+            return NAN
+        return self._pv / self._volume
+
+    def pop(self):
+        """Undo the most recent push()."""
+        self._restore()
+
+
+class HeikinAshi(StreamingIndicator, _ScalarState):
+    """Heikin-Ashi candles, as rows of (open, high, low, close).
+
+    Use it as the source of another indicator in an IndicatorGraph to calculate that indicator on Heikin-Ashi candles.
+    """
+
+    # The columns of each row, as DerivedSeries fields
+    FIELDS = {"open": 0, "high": 1, "low": 2, "close": 3}
+
+    _STATE = ("_open", "_close")
+
+    def __init__(self):
+        """Initialize the indicator."""
+        super().__init__()
+        self.reset()
+
+    def reset(self):
+        """Clear the state of the indicator."""
+        self._open = None
+        self._close = None
+
+    def push(self, candle):
+        """Add a candle and return its Heikin-Ashi candle."""
+        self._save()
+        if self._open is None:
+            ha_open = (candle.open + candle.close) / 2.0
+        else:
+            ha_open = (self._open + self._close) / 2.0
+        ha_close = (candle.open + candle.high + candle.low + candle.close) / 4.0
+        self._open = ha_open
+        self._close = ha_close
+        return (
+            ha_open,
+            max(candle.high, ha_open, ha_close),
+            min(candle.low, ha_open, ha_close),
+            ha_close,
+        )
+
+    def pop(self):
+        """Undo the most recent push()."""
+        self._restore()
@@ -1,7 +1,28 @@
-import sys
+"""TA-Lib's abstract functions, such as SMA, as attributes of this module.
 
-import talib.abstract
+TA-Lib is only imported when a function is first looked up, so importing this module is free.
+"""
 
-# Manually set TAlib's indicators as functions in this module
-for fcn_name in talib.abstract.__TA_FUNCTION_NAMES__:
-    setattr(sys.modules[__name__], fcn_name, getattr(talib.abstract, fcn_name))
+
+def _abstract():
+    import talib.abstract
+
+    return talib.abstract
+
+
+def __getattr__(name):
+    # Dunder lookups come from the import system and tools such as pickle, and must not import TA-Lib
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    abstract = _abstract()
+    if name in abstract.__TA_FUNCTION_NAMES__:
+        fcn = getattr(abstract, name)
+        # Cache the function, so later lookups don't go through this hook
+        globals()[name] = fcn
+        return fcn
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_abstract().__TA_FUNCTION_NAMES__))
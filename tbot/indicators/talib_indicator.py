@@ -1,42 +1,152 @@
 import numpy as np
 
+from . import streaming
 from .candle_indicator import CandleIndicator
+from .ring_buffer import SeriesArrays
+
+
+def _streaming_equivalent(fcn):
+    """Return the streaming indicator that calculates a TA-Lib function incrementally, or None if there isn't one.
+
+    :param talib.abstract.Function fcn: The function, with its parameters set
+    :rtype: StreamingIndicator
+    """
+    import talib.abstract
+
+    name = fcn.info["name"]
+    if name not in TalibIndicator.STREAMING_FUNCTIONS:
+        return None
+    # The streaming indicators only read the default prices, such as the close
+    if fcn.input_names != talib.abstract.Function(name).input_names:
+        return None
+    return getattr(streaming, name)(**fcn.parameters)
 
 
 class TalibIndicator(CandleIndicator):
-    """Class to wrap calls to TA-Lib in a CandleFeed-compatible object."""
+    """Class to wrap calls to TA-Lib in a CandleFeed-compatible object.
+
+    .. note::
+        Functions that smooth over the whole series, such as EMA and RSI, are calculated by their equivalent in
+        tbot.indicators.streaming if there is one. It keeps the smoothing state before the most recent candle, so appends
+        and intrabar updates cost the same whatever the length of the series. Values are kept once calculated, so they
+        are smoothed from the first candle the indicator saw rather than from the oldest candle still in the series. Other functions that depend on the
+        whole series, such as ADX or KAMA, are recalculated on the whole series by every update, including intrabar
+        updates, so prefer not to register them on subscribers that set INTRABAR.
+    """
+
+    # TA-Lib functions whose last value only depends on the last (lookback + 1) candles.
+    # Functions that smooth with an EMA or accumulate over the whole series are not included.
+    WINDOWED_FUNCTIONS = frozenset(
+        [
+            "AROON",
+            "AROONOSC",
+            "AVGPRICE",
+            "BBANDS",
+            "BETA",
+            "BOP",
+            "CCI",
+            "CORREL",
+            "LINEARREG",
+            "LINEARREG_ANGLE",
+            "LINEARREG_INTERCEPT",
+            "LINEARREG_SLOPE",
+            "MAX",
+            "MEDPRICE",
+            "MIDPOINT",
+            "MIDPRICE",
+            "MIN",
+            "MINMAX",
+            "MOM",
+            "ROC",
+            "ROCP",
+            "ROCR",
+            "ROCR100",
+            "SMA",
+            "STDDEV",
+            "SUM",
+            "TRANGE",
+            "TRIMA",
+            "TSF",
+            "TYPPRICE",
+            "VAR",
+            "WCLPRICE",
+            "WILLR",
+            "WMA",
+        ]
+    )
+
+    # TA-Lib functions that depend on the whole series, but have an equivalent in tbot.indicators.streaming
+    STREAMING_FUNCTIONS = frozenset(["ATR", "EMA", "MACD", "RSI"])
 
     def __init__(self, talib_fcn, *ta_args, **ta_kwargs):
         """Initialize the indicator.
 
-        :param callable talib_fcn: The TA-lib function to use for the underlying indicator arithmetic
+        :param callable talib_fcn: The TA-lib function to use for the underlying indicator arithmetic, such as
+            tbot.indicators.talib.SMA, or its name. Passing the name keeps the arguments picklable, such as for worker
+            processes.
         :param ta_args: Positional arguments to be supplied to the underlying TA-lib call
         :param ta_kwargs: Keyword arguments to be supplied to the underlying TA-lib call
         """
         super().__init__()
+        if isinstance(talib_fcn, str):
+            from . import talib
+
+            talib_fcn = getattr(talib, talib_fcn)
         self._fcn = talib_fcn
         self._ta_args = ta_args
         self._ta_kwargs = ta_kwargs
+        self._inputs = SeriesArrays()
+        self._window = None
+        self._streaming = None
+        self._lookback = None
 
-    def update(self, series):
-        """Calculate the result of the indicator on the series, then save th result.
+    @property
+    def lookback(self):
+        """Return the lookback of the TA-Lib function, as reported by the abstract API.
 
-        :param CandleSeries series: The series to perform the calculation on
+        .. note::
+            For functions that smooth with an EMA, such as RSI, this is the number of candles before the first value.
+            Earlier values still affect later ones, so keep a margin on top of it.
+
+        :rtype: int
         """
-        # Convert the CandleSeries into the TA Lib abstract format
-        ta_candles = {"open": [], "high": [], "low": [], "close": []}
-        for c in series:
-            ta_candles["open"].append(c.open)
-            ta_candles["high"].append(c.high)
-            ta_candles["low"].append(c.low)
-            ta_candles["close"].append(c.close)
-
-        # Convert to numpy float array
-        ta_candles["open"] = np.asarray(ta_candles["open"], dtype=np.float64)
-        ta_candles["high"] = np.asarray(ta_candles["high"], dtype=np.float64)
-        ta_candles["low"] = np.asarray(ta_candles["low"], dtype=np.float64)
-        ta_candles["close"] = np.asarray(ta_candles["close"], dtype=np.float64)
+        if self._lookback is None:
+            import talib.abstract
+
+            info = getattr(self._fcn, "info", None)
+            if info is None:
+                self._lookback = 0
+            else:
+                fcn = talib.abstract.Function(
+                    info["name"], *self._ta_args, **self._ta_kwargs
+                )
+                self._lookback = fcn.lookback
+        return self._lookback
 
+    def _window_length(self):
+        """Return the number of candles needed to calculate the last value, or 0 if the whole series is needed."""
+        if self._window is None:
+            self._window = 0
+            info = getattr(self._fcn, "info", None)
+            if info is not None:
+                import talib.abstract
+
+                # Use a private copy so the parameters of the shared abstract function aren't modified
+                fcn = talib.abstract.Function(
+                    info["name"], *self._ta_args, **self._ta_kwargs
+                )
+                # Moving average types other than SMA are not windowed
+                if (
+                    info["name"] in self.WINDOWED_FUNCTIONS
+                    and fcn.parameters.get("matype", 0) == 0
+                ):
+                    self._window = fcn.lookback + 1
+                else:
+                    self._streaming = _streaming_equivalent(fcn)
+
+        return self._window
+
+    def _call(self, ta_candles):
         # Run TA-Lib
         result = self._fcn(ta_candles, *self._ta_args, **self._ta_kwargs)
 
@@ -49,3 +159,57 @@ class TalibIndicator(CandleIndicator):
         # The result is likely in the correct format already
         else:
             return result
+
+    def update(self, series):
+        """Calculate the result of the indicator on the series, then save th result.
+
+        :param CandleSeries series: The series to perform the calculation on
+
+        .. note::
+            Results are kept in a ring buffer with the capacity of the series. After candles are appended, windowed
+            functions, such as SMA, are only run on the candles needed for the new values. The result is the same as
+            running the function on the whole series, so values whose window starts before the oldest candle of the
+            series are NaN.
+        """
+        window = self._window_length()
+        if self._streaming is not None:
+            self._streaming._update(series)
+            return self._streaming.data
+
+        # Bring the TA-Lib inputs up to date, reading only the appended candles if possible
+        appended = self._inputs.refresh(series)
+        inputs = self._inputs.columns
+        buffer = self._result_buffer(series)
+
+        if window > 0 and appended and len(buffer) + appended >= len(series):
+            # Also recalculate the previous last value, since its candle may have been replaced before the append
+            out = self._call({k: v[-(window + appended) :] for k, v in inputs.items()})
+            buffer[-1] = out[-appended - 1]
+            buffer.extend(out[-appended:])
+            # As in a recalculation, values whose window starts before the oldest candle of the series are NaN
+            buffer[: window - 1] = np.nan
+        else:
+            buffer.fill(self._call(inputs))
+
+        return buffer.view
+
+    def update_last(self, series):
+        """Calculate the last value of the indicator after the most recent candle of the series was replaced.
+
+        :param CandleSeries series: The series to perform the calculation on
+        :return: The new last value of the indicator
+
+        .. note::
+            Windowed functions, such as SMA, are only run on the candles needed for the last value, and functions with a
+            streaming equivalent only recalculate the last value. Other functions return NotImplemented, so the whole
+            series is recalculated.
+        """
+        window = self._window_length()
+        if self._streaming is not None:
+            self._streaming._update(series)
+            return self._streaming.last
+        if window == 0 or len(self._inputs) != len(series):
+            return NotImplemented
+
+        self._inputs.set_last(series.last)
+        return self._call({k: v[-window:] for k, v in self._inputs.columns.items()})[-1]
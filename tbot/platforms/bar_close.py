@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+from tbot.util import log
+
+LOGGER = log.get_logger()
+
+
+def _same_values(a, b):
+    return (
+        a.open == b.open
+        and a.high == b.high
+        and a.low == b.low
+        and a.close == b.close
+        and a.volume == b.volume
+    )
+
+
+class BarCloseScheduler:
+    """Class to publish bars when their period ends, rather than when the next bar first updates.
+
+    The platform reports every update to the bar that is forming through track(). A timer fires at the end of the bar's
+    period plus a grace window, and publishes the latest state of the bar if the platform hasn't already confirmed it.
+    When the platform later confirms the bar through close(), the confirmed values are compared with what was published
+    and the bar is revised if they differ.
+
+    .. note::
+        Timers are scheduled on an asyncio event loop, so the callbacks run on the same thread as the platform's updates.
+    """
+
+    def __init__(self, on_close, on_revise, grace=1.0, loop=None):
+        """Initialize the scheduler.
+
+        :param callable on_close: A function called as on_close(key, candle) when a bar is published
+        :param callable on_revise: A function called as on_revise(key, candle) when a published bar is corrected
+        :param float grace: The number of seconds to wait after the end of a bar's period before publishing it
+        :param asyncio.AbstractEventLoop loop: The event loop to schedule timers on. If None, the current event loop is used.
+        """
+        self._on_close = on_close
+        self._on_revise = on_revise
+        self.grace = grace
+        self._loop = loop
+        self._forming = {}
+        self._timers = {}
+        self._published = {}
+
+    def _get_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def _cancel(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _publish(self, key, candle):
+        self._published[key] = candle
+        self._on_close(key, candle)
+
+    def _on_timer(self, key):
+        self._timers.pop(key, None)
+        candle = self._forming.pop(key, None)
+        if candle is not None:
+            self._publish(key, candle)
+
+    def track(self, key, candle):
+        """Record the latest state of the bar that is forming.
+
+        :param key: A hashable identifier of the feed the bar belongs to
+        :param Candle candle: The forming bar. It must have a time-based period.
+        :return: False if the bar was already published, in which case the update is ignored
+        :rtype: bool
+        """
+        # Late updates to a bar that was already published are reconciled by close()
+        published = self._published.get(key)
+        if published is not None and published.time >= candle.time:
+            return False
+
+        prev = self._forming.get(key)
+        self._forming[key] = candle
+
+        # Schedule a timer the first time we see a bar
+        if prev is None or prev.time != candle.time:
+            self._cancel(key)
+            close_ts = candle.time.timestamp() + candle.period.size + self.grace
+            delay = max(close_ts - time.time(), 0.0)
+            self._timers[key] = self._get_loop().call_later(delay, self._on_timer, key)
+
+        return True
+
+    def close(self, key, candle):
+        """Confirm the final values of a bar.
+
+        :param key: A hashable identifier of the feed the bar belongs to
+        :param Candle candle: The completed bar, as reported by the platform
+        """
+        forming = self._forming.get(key)
+        if forming is not None and forming.time == candle.time:
+            self._cancel(key)
+            del self._forming[key]
+
+        published = self._published.get(key)
+        if published is not None and published.time == candle.time:
+            if not _same_values(published, candle):
+                LOGGER.debug(f"Revising bar {key} at {candle.time}")
+                self._published[key] = candle
+                self._on_revise(key, candle)
+        elif published is None or published.time < candle.time:
+            self._publish(key, candle)
+
+    def cancel_all(self):
+        """Cancel every pending timer without publishing."""
+        for key in list(self._timers):
+            self._cancel(key)
+        self._forming.clear()
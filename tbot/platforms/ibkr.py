@@ -3,16 +3,23 @@ from functools import partial
 
 from ib_insync import IB, ContFuture
 
-from tbot.candles import Candle
+from tbot.candles import Candle, CandleAggregator
+
+from .bar_close import BarCloseScheduler
 
 CLIENT_ID = 78258
 CLIENT_PORT = 4002
+BAR_CLOSE_GRACE = 1.0
 
 
 class IBWrapper:
     """A wrapper class around ib_insync."""
 
     period_lookup = {
+        "5s": "5 secs",
+        "10s": "10 secs",
+        "15s": "15 secs",
+        "30s": "30 secs",
         "1m": "1 min",
         "2m": "2 mins",
         "3m": "3 mins",
@@ -27,6 +34,10 @@ class IBWrapper:
     }
 
     lookback = {
+        "5s": "3600 S",
+        "10s": "7200 S",
+        "15s": "14400 S",
+        "30s": "28800 S",
         "1m": "1 D",
         "2m": "2 D",
         "3m": "3 D",
@@ -39,17 +50,29 @@ class IBWrapper:
         "1w": "3 Y",
     }
 
-    def __init__(self, mgr):
+    def __init__(self, mgr, bar_close_grace=BAR_CLOSE_GRACE, intrabar=False):
         """Initialize the IB API.
 
         :param SymbolManager mgr: A reference to the symbol manager
+        :param float bar_close_grace: The number of seconds after the end of a live bar's period to publish it, even if
+            IB hasn't started the next bar yet. If None, live bars are only published once IB starts the next bar.
+        :param bool intrabar: If True, every update to a forming bar is sent to the symbol manager as a provisional update
         """
         self.ib = IB()
         self.ib.connect("127.0.0.1", CLIENT_PORT, clientId=CLIENT_ID, readonly=True)
         self.mgr = mgr
+        self.intrabar = intrabar
+
+        self._bar_close = None
+        if bar_close_grace is not None:
+            self._bar_close = BarCloseScheduler(
+                self._on_bar_close, self._on_bar_revise, grace=bar_close_grace
+            )
 
     def disconnect(self):
         """Disconnect from the IB API."""
+        if self._bar_close is not None:
+            self._bar_close.cancel_all()
         self.ib.disconnect()
 
     def future_lookup(self, symbol, exchange=""):
@@ -104,35 +127,49 @@ class IBWrapper:
 
         return candles
 
+    @classmethod
+    def _to_candle(cls, period, bar):
+        return Candle(
+            period,
+            datetime.fromtimestamp(bar.date.timestamp()),
+            bar.open,
+            bar.high,
+            bar.low,
+            bar.close,
+            bar.volume,
+        )
+
+    def _on_bar_close(self, key, candle):
+        symbol, period = key
+        self.mgr.update_feed(symbol, period, candle)
+
+    def _on_bar_revise(self, key, candle):
+        symbol, period = key
+        self.mgr.revise_feed(symbol, period, candle)
+
     def on_bar_update(self, symbol, period, bar_list, has_new):
         """Process a bar update from reqHistoricalData streaming."""
-        if has_new:
-            # This should be what's returned/sent out the door
-            last_bar = bar_list[-2]
-            candle_raw = {
-                "time": last_bar.date.timestamp(),
-                "period": period.as_str(),
-                "open": last_bar.open,
-                "high": last_bar.high,
-                "low": last_bar.low,
-                "close": last_bar.close,
-                "volume": last_bar.volume,
-            }
-
-            # I did this in another step because it should move into sym manager
-            candle = Candle(
-                period,
-                datetime.fromtimestamp(candle_raw["time"]),
-                candle_raw["open"],
-                candle_raw["high"],
-                candle_raw["low"],
-                candle_raw["close"],
-                candle_raw["volume"],
-            )
-            self.mgr.update_feed(symbol, period, candle)
+        key = (symbol, period)
+        forming = self._to_candle(period, bar_list[-1])
+
+        # Without a scheduler, a bar is only published once IB starts the next one
+        if self._bar_close is None:
+            if has_new:
+                self.mgr.update_feed(
+                    symbol, period, self._to_candle(period, bar_list[-2])
+                )
+            tracked = True
+
+        else:
+            if has_new:
+                self._bar_close.close(key, self._to_candle(period, bar_list[-2]))
+            tracked = self._bar_close.track(key, forming)
+
+        if self.intrabar and tracked:
+            self.mgr.update_feed(symbol, period, forming, provisional=True)
 
     def live_data(self, symbol, period, exchange=""):
-        """Return historical data for a symbol.
+        """Return historical data for a symbol, then stream new candles to the symbol manager as they complete.
 
         :param str symbol: The symbol name
         :param CandlePeriod period: The candle period
@@ -154,7 +191,11 @@ class IBWrapper:
             keepUpToDate=True,
         )
 
-        for b in bars:
+        # The last bar is still forming, and will be published once it completes
+        if self._bar_close is not None and len(bars) > 0:
+            self._bar_close.track((symbol, period), self._to_candle(period, bars[-1]))
+
+        for b in bars[:-1]:
             candles.append(
                 {
                     "time": b.date.timestamp(),
@@ -170,6 +211,73 @@ class IBWrapper:
 
         return candles
 
+    def on_realtime_update(self, aggregators, bar_list, has_new):
+        """Process a 5 second bar from reqRealTimeBars streaming."""
+        if has_new:
+            bar = bar_list[-1]
+            bar_time = datetime.fromtimestamp(bar.time.timestamp())
+            for agg in aggregators:
+                agg.add_bar(
+                    bar_time, bar.open_, bar.high, bar.low, bar.close, bar.volume
+                )
+
+    def on_tick_update(self, aggregators, ticker):
+        """Process trades from reqTickByTickData streaming."""
+        for tick in ticker.tickByTicks:
+            tick_time = datetime.fromtimestamp(tick.time.timestamp())
+            for agg in aggregators:
+                agg.add_tick(tick_time, tick.price, tick.size)
+
+    def realtime_data(
+        self,
+        symbol,
+        periods,
+        exchange="",
+        use_ticks=False,
+        tz=None,
+        session_start=None,
+    ):
+        """Stream candles for a symbol that are built locally from real-time data.
+
+        :param str symbol: The symbol name
+        :param list[CandlePeriod] periods: The candle periods to build. Any period is supported, including sub-minute,
+            volume and range periods.
+        :param str exchange: The exchange the symbol is listed on
+        :param bool use_ticks: If True, candles are built from every trade. Otherwise they are built from 5 second bars.
+        :param tzinfo tz: The timezone of the exchange session that candles are aligned to. If None, the local timezone is
+            used.
+        :param timedelta session_start: The time of day the exchange session starts in tz. Defaults to midnight.
+        :return: The aggregators building each period, in the same order as periods
+
+        .. note::
+            A single IB subscription is shared by every period. Completed candles are sent to the symbol manager, so a
+            feed must already be registered for each (symbol, period).
+        """
+        contract = self.future_lookup(symbol, exchange=exchange)
+        aggregators = []
+        for p in periods:
+            on_forming = None
+            if self.intrabar:
+                on_forming = partial(self.mgr.update_feed, symbol, p, provisional=True)
+            aggregators.append(
+                CandleAggregator(
+                    p,
+                    partial(self.mgr.update_feed, symbol, p),
+                    on_forming,
+                    tz=tz,
+                    session_start=session_start,
+                )
+            )
+
+        if use_ticks:
+            ticker = self.ib.reqTickByTickData(contract, "AllLast")
+            ticker.updateEvent += partial(self.on_tick_update, aggregators)
+        else:
+            bars = self.ib.reqRealTimeBars(contract, 5, "TRADES", False)
+            bars.updateEvent += partial(self.on_realtime_update, aggregators)
+
+        return aggregators
+
     def event_loop(self):
         """Run the IB event loop to process live data.
 
@@ -0,0 +1,230 @@
+import heapq
+import time
+
+import numpy as np
+
+from tbot.util import log
+
+LOGGER = log.get_logger()
+
+
+class ReplayStats:
+    """Class to hold the throughput and latency measurements of a replay."""
+
+    def __init__(self, elapsed, latencies):
+        """Initialize the replay statistics.
+
+        :param float elapsed: The wall-clock duration of the replay, in seconds
+        :param numpy.ndarray latencies: The time spent dispatching each bar through the symbol manager, in seconds
+        """
+        self.elapsed = elapsed
+        self.latencies = latencies
+
+    @property
+    def bars(self):
+        """Return the number of bars replayed.
+
+        :rtype: int
+        """
+        return len(self.latencies)
+
+    @property
+    def bars_per_sec(self):
+        """Return the number of bars replayed per second of wall-clock time.
+
+        :rtype: float
+        """
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bars / self.elapsed
+
+    def latency(self, percentile):
+        """Return a percentile of the per-bar latency.
+
+        :param float percentile: The percentile to return, from 0 to 100
+        :return: The latency, in seconds
+        :rtype: float
+        """
+        if self.bars == 0:
+            return 0.0
+        return float(np.percentile(self.latencies, percentile))
+
+    def to_json_dict(self):
+        """Return a JSON-serializable dictionary representation of the statistics.
+
+        :rtype: dictionary
+        """
+        return {
+            "bars": self.bars,
+            "elapsed": self.elapsed,
+            "bars_per_sec": self.bars_per_sec,
+            "latency_mean": float(np.mean(self.latencies)) if self.bars else 0.0,
+            "latency_p50": self.latency(50),
+            "latency_p99": self.latency(99),
+            "latency_max": float(np.max(self.latencies)) if self.bars else 0.0,
+        }
+
+    def __str__(self):
+        """Return a string representation of the statistics."""
+        stats = self.to_json_dict()
+        ret_str = ""
+        ret_str += f"Bars: {stats['bars']}, "
+        ret_str += f"Elapsed: {stats['elapsed']:.3f}s, "
+        ret_str += f"Bars/sec: {stats['bars_per_sec']:.1f}, "
+        ret_str += f"Latency mean: {stats['latency_mean'] * 1e6:.1f}us, "
+        ret_str += f"p99: {stats['latency_p99'] * 1e6:.1f}us, "
+        ret_str += f"max: {stats['latency_max'] * 1e6:.1f}us"
+        return ret_str
+
+
+class ReplayPlatform:
+    """A data platform that replays stored candles into a symbol manager.
+
+    This mirrors the interface of IBWrapper, so it can stand in for a live IB Gateway when running benchmarks and soak tests.
+    Candles from every loaded feed are merged into a single stream ordered by the time each candle closes.
+    """
+
+    def __init__(self, mgr, store=None, speed=None, warmup=500):
+        """Initialize the replay platform.
+
+        :param SymbolManager mgr: A reference to the symbol manager
+        :param CandleStore store: The store to load candles from when a feed is requested. May be None if every feed is
+            supplied through load()
+        :param float speed: The replay speed relative to real time. 1.0 replays in real time, 10.0 replays ten times
+            faster. If None, candles are replayed as fast as possible.
+        :param int warmup: The number of candles of each feed returned as history by live_data instead of being replayed
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError(f"speed must be greater than 0. Got {speed}")
+
+        self.mgr = mgr
+        self.store = store
+        self.speed = speed
+        self.warmup = warmup
+        self._pending = {}
+        self._feeds = []
+        self._stopped = False
+        self.stats = None
+
+    def disconnect(self):
+        """Stop any replay that is in progress."""
+        self.stop()
+
+    def stop(self):
+        """Stop the replay after the bar currently being dispatched."""
+        self._stopped = True
+
+    def load(self, symbol, period, candles):
+        """Supply the candles to use for a feed instead of reading them from the store.
+
+        :param str symbol: The symbol name
+        :param CandlePeriod period: The candle period
+        :param list[Candle] candles: The candles of the feed, in ascending chronological order
+        """
+        self._pending[(symbol, str(period))] = list(candles)
+
+    def _candles(self, symbol, period):
+        key = (symbol, str(period))
+        if key not in self._pending:
+            if self.store is None:
+                raise KeyError(f"No candles loaded for {symbol} {period}")
+            self._pending[key] = list(self.store.load(symbol, period))
+        return self._pending[key]
+
+    @classmethod
+    def _to_dict(cls, candle):
+        return {
+            "time": candle.time.timestamp(),
+            "period": candle.period.as_str(),
+            "open": candle.open,
+            "high": candle.high,
+            "low": candle.low,
+            "close": candle.close,
+            "volume": candle.volume,
+        }
+
+    def historical_data(self, symbol, period, exchange=""):
+        """Return historical data for a symbol.
+
+        :param str symbol: The symbol name
+        :param CandlePeriod period: The candle period
+        :param str exchange: Unused. Accepted for compatibility with IBWrapper
+        :return: A list of every stored candle, in dictionary format
+        """
+        return [self._to_dict(c) for c in self._candles(symbol, period)]
+
+    def live_data(self, symbol, period, exchange=""):
+        """Return the warmup history for a symbol and queue the rest of its candles for replay.
+
+        :param str symbol: The symbol name
+        :param CandlePeriod period: The candle period
+        :param str exchange: Unused. Accepted for compatibility with IBWrapper
+        :return: A list of the first candles of the feed, in dictionary format
+        """
+        candles = self._candles(symbol, period)
+        self._feeds.append((symbol, period, candles[self.warmup :]))
+        return [self._to_dict(c) for c in candles[: self.warmup]]
+
+    def _stream(self):
+        """Merge the queued feeds into a single stream ordered by candle close time."""
+
+        def feed_iter(feed_ind, symbol, period, candles):
+            # Activity-based candles have no fixed duration, so they're ordered by open time
+            period_s = period.size if period.is_time_based() else 0.0
+            for c in candles:
+                yield (
+                    c.time.timestamp() + period_s,
+                    -period_s,
+                    feed_ind,
+                    symbol,
+                    period,
+                    c,
+                )
+
+        # Ties are broken by longer periods first, then by the order the feeds were added in
+        return heapq.merge(
+            *[feed_iter(i, *feed) for i, feed in enumerate(self._feeds)],
+            key=lambda item: item[:3],
+        )
+
+    def event_loop(self):
+        """Replay every queued candle into the symbol manager.
+
+        :return: The throughput and latency of the replay
+        :rtype: ReplayStats
+
+        .. note::
+            This blocks until every queued candle has been replayed or stop() is called.
+        """
+        self._stopped = False
+        total = sum(len(feed[2]) for feed in self._feeds)
+        latencies = np.empty(total, dtype=np.float64)
+        count = 0
+
+        update_feed = self.mgr.update_feed
+        perf_counter = time.perf_counter
+        wall_start = perf_counter()
+        sim_start = None
+
+        for close_ts, _, _, symbol, period, candle in self._stream():
+            if self._stopped:
+                break
+
+            # Pace the replay against the wall clock
+            if self.speed is not None:
+                if sim_start is None:
+                    sim_start = close_ts
+                target = wall_start + (close_ts - sim_start) / self.speed
+                delay = target - perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            start = perf_counter()
+            update_feed(symbol, period, candle)
+            latencies[count] = perf_counter() - start
+            count += 1
+
+        self._feeds = []
+        self.stats = ReplayStats(perf_counter() - wall_start, latencies[:count])
+        LOGGER.info(f"Replay finished. {self.stats}")
+        return self.stats
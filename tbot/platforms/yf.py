@@ -1,14 +1,16 @@
 from datetime import datetime, timedelta
 
 import pytz
-import yfinance as yf
 
-from tbot.candles import Candle, CandlePeriod, CandleSeries
+from tbot.candles import CandlePeriod, CandleSeries
 from tbot.util import log
+from tbot.util.cache import TTLCache
 
 log.disable_sublogger("yfinance")
 log.disable_sublogger("peewee")
 
+LOGGER = log.get_logger()
+
 periods = {
     timedelta(minutes=1): "1m",
     timedelta(minutes=5): "5m",
@@ -27,41 +29,54 @@ lookback = {
     timedelta(weeks=1): timedelta(days=3 * 365),
 }
 
+# Default cache settings. Entries are sized by their number of candles.
+CACHE_TTL = 60.0
+CACHE_MAX_CANDLES = 250000
 
-def get_market_ohlc(symbol, period, end_dt, tz_str=None):
-    """Return YFinance's market OHLC for the symbol.
+_cache = TTLCache(CACHE_TTL, CACHE_MAX_CANDLES, sizeof=len)
+_downloader = None
 
-    :param str symbol: The symbol to request
-    :param timedelta period: The candle period
-    :param datetime end_dt: The most recent date to receive candles for
-    :param str tz_str: pytz string specifying timezone to return the data in.  If None, the computer's local timezone will be used
+
+def set_downloader(downloader):
+    """Replace the function used to download data from yfinance.
+
+    :param callable downloader: A function with the same signature and return type as yfinance.download. If None,
+        yfinance.download is restored.
 
     .. note::
-        The start of the series is determined by the candle period. The lookback table is defined as follows
+        This is intended to let tests and benchmarks run without network access.
+    """
+    global _downloader
+    _downloader = downloader
 
-    .. code-block::
 
-        lookback = {
-            timedelta(minutes=1): timedelta(days=1),
-            timedelta(minutes=5): timedelta(days=5),
-            timedelta(minutes=15): timedelta(days=5),
-            timedelta(hours=1): timedelta(days=20),
-            timedelta(days=1): timedelta(days=365),
-            timedelta(weeks=1): timedelta(days=3 * 365),
-        }
+def _download(*args, **kwargs):
+    """Download data with the configured downloader, importing yfinance only when it is needed."""
+    if _downloader is not None:
+        return _downloader(*args, **kwargs)
+
+    import yfinance
+
+    return yfinance.download(*args, **kwargs)
+
 
+def configure_cache(ttl=CACHE_TTL, max_candles=CACHE_MAX_CANDLES):
+    """Replace the shared download cache with an empty one using new settings.
+
+    :param float ttl: The number of seconds a downloaded series remains valid
+    :param int max_candles: The total number of candles the cache may hold before evicting the least recently used series
     """
-    # Download hourly candles from yfinance
-    end_dt += timedelta(days=1)
-    data = yf.download(
-        [symbol],
-        interval=periods[period],
-        start=(end_dt - lookback[period]).date(),
-        end=(end_dt.date()),
-    )
-    if len(data) == 0:
-        raise RuntimeError(f"No data returned for {symbol}")
+    global _cache
+    _cache = TTLCache(ttl, max_candles, sizeof=len)
+
+
+def clear_cache():
+    """Remove all downloaded series from the shared cache."""
+    _cache.clear()
+
 
+def _localize(data, period, tz_str):
+    """Apply the requested timezone to the index of downloaded data."""
     # YFinance doesn't seem to use timezone on daily or larger candles.
     # The workaround is to remove any timezone it returns, then use US/Eastern, which is what yahoo
     # finance website is reporting its intraday data with. Then, the code below will convert from US/Eastern
@@ -81,18 +96,117 @@ def get_market_ohlc(symbol, period, end_dt, tz_str=None):
         else:
             data = data.tz_localize(pytz.timezone(tz_str))
 
-    # Convert to the candles data structure
-    candles = []
-    for index, row in data.iterrows():
-        candles.append(
-            Candle(
-                CandlePeriod.from_timedelta(period),
-                index.to_pydatetime(),
-                row["Open"],
-                row["High"],
-                row["Low"],
-                row["Close"],
-                row["Volume"],
-            )
-        )
-    return CandleSeries(CandlePeriod.from_timedelta(period), candles, len(candles))
+    return data
+
+
+def _split_symbols(data, symbols):
+    """Split a multi-symbol download into one DataFrame per symbol."""
+    split = {}
+    for symbol in symbols:
+        if data.columns.nlevels > 1:
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            symbol_data = data[symbol]
+        else:
+            # Older yfinance releases return flat columns when a single symbol is requested
+            symbol_data = data
+
+        # A batch download is aligned on the union of every symbol's timestamps, so drop the padding
+        symbol_data = symbol_data.dropna(subset=["Open", "High", "Low", "Close"])
+        if len(symbol_data) > 0:
+            split[symbol] = symbol_data
+
+    return split
+
+
+def _copy_series(series):
+    """Return a copy of a cached series that callers are free to modify."""
+    return CandleSeries(series.period, list(series), series.max_candles)
+
+
+def get_market_ohlc_batch(symbols, period, end_dt, tz_str=None, use_cache=True):
+    """Return YFinance's market OHLC for many symbols, downloading them in a single request.
+
+    :param list[str] symbols: The symbols to request
+    :param timedelta period: The candle period
+    :param datetime end_dt: The most recent date to receive candles for
+    :param str tz_str: pytz string specifying timezone to return the data in.  If None, the computer's local timezone will be used
+    :param bool use_cache: If True, series are served from and stored in the shared download cache
+    :return: A dictionary of (symbol -> CandleSeries). Symbols that yfinance returned no data for are omitted.
+    :rtype: dict
+
+    .. note::
+        Cache entries are keyed by (symbol, period, end date, timezone), so only the symbols that are missing from the
+        cache are downloaded. See get_market_ohlc for how the start of each series is determined.
+    """
+    candle_period = CandlePeriod.from_timedelta(period)
+    keys = {s: (s, period, end_dt.date(), tz_str) for s in symbols}
+
+    result = {}
+    if use_cache:
+        for symbol, key in keys.items():
+            series = _cache.get(key)
+            if series is not None:
+                result[symbol] = _copy_series(series)
+    missing = [s for s in keys if s not in result]
+    if len(missing) == 0:
+        return result
+
+    # Download all the missing symbols together
+    end_dt += timedelta(days=1)
+    data = _download(
+        missing,
+        interval=periods[period],
+        start=(end_dt - lookback[period]).date(),
+        end=(end_dt.date()),
+        group_by="ticker",
+        progress=False,
+    )
+    if len(data) == 0:
+        LOGGER.warning(f"No data returned for {missing}")
+        return result
+
+    # The timezone is applied once for the whole batch
+    data = _localize(data, period, tz_str)
+
+    for symbol, symbol_data in _split_symbols(data, missing).items():
+        series = CandleSeries.from_dataframe(candle_period, symbol_data)
+        if use_cache:
+            _cache.put(keys[symbol], series)
+            series = _copy_series(series)
+        result[symbol] = series
+
+    return result
+
+
+def get_market_ohlc(symbol, period, end_dt, tz_str=None, use_cache=True):
+    """Return YFinance's market OHLC for the symbol.
+
+    :param str symbol: The symbol to request
+    :param timedelta period: The candle period
+    :param datetime end_dt: The most recent date to receive candles for
+    :param str tz_str: pytz string specifying timezone to return the data in.  If None, the computer's local timezone will be used
+    :param bool use_cache: If True, the series is served from and stored in the shared download cache
+
+    .. note::
+        The start of the series is determined by the candle period. The lookback table is defined as follows
+
+    .. code-block::
+
+        lookback = {
+            timedelta(minutes=1): timedelta(days=1),
+            timedelta(minutes=5): timedelta(days=5),
+            timedelta(minutes=15): timedelta(days=5),
+            timedelta(hours=1): timedelta(days=20),
+            timedelta(days=1): timedelta(days=365),
+            timedelta(weeks=1): timedelta(days=3 * 365),
+        }
+
+    """
+    result = get_market_ohlc_batch(
+        [symbol], period, end_dt, tz_str=tz_str, use_cache=use_cache
+    )
+    if symbol not in result:
+        raise RuntimeError(f"No data returned for {symbol}")
+
+    return result[symbol]
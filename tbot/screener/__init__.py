@@ -0,0 +1,33 @@
+"""Screen many symbols in a CandleStore for declarative conditions on their indicators."""
+from .conditions import (
+    All,
+    Any,
+    BinaryOp,
+    Compare,
+    Condition,
+    Constant,
+    Context,
+    Crosses,
+    CrossesLevel,
+    Expression,
+    Not,
+    Value,
+)
+from .screener import Match, Screener
+
+__all__ = [
+    "All",
+    "Any",
+    "BinaryOp",
+    "Compare",
+    "Condition",
+    "Constant",
+    "Context",
+    "Crosses",
+    "CrossesLevel",
+    "Expression",
+    "Match",
+    "Not",
+    "Screener",
+    "Value",
+]
@@ -0,0 +1,314 @@
+"""Declarative screening conditions.
+
+Conditions are built from expressions of indicator values and candle prices, and combined with &, | and ~. They are
+plain objects that can be pickled, so a screen can be sent to worker processes. Example::
+
+    (Value("rsi") < 30) & (Value("gann", "direction") == GannDir.UP)
+"""
+import operator
+from abc import ABC, abstractmethod
+
+PRICES = ("open", "high", "low", "close", "volume")
+NAN = float("nan")
+
+
+class Context:
+    """Class to hold what conditions are evaluated on: one symbol's series and its updated indicators."""
+
+    def __init__(self, symbol, series, indicators):
+        """Initialize the context.
+
+        :param str symbol: The symbol being screened
+        :param CandleSeries series: The symbol's candles
+        :param dict indicators: The symbol's indicators, as (name -> Indicator), already updated on the series
+        """
+        self.symbol = symbol
+        self.series = series
+        self.indicators = indicators
+
+
+def _as_expression(value):
+    return value if isinstance(value, Expression) else Constant(value)
+
+
+class Expression(ABC):
+    """Base class for a number calculated for a symbol, such as an indicator value.
+
+    Comparing an expression with another expression or a number gives a condition. Arithmetic gives a new expression.
+    """
+
+    @abstractmethod
+    def evaluate(self, ctx, ago=0):
+        """Calculate the expression.
+
+        :param Context ctx: The symbol to calculate the expression for
+        :param int ago: The number of candles before the most recent one to calculate the expression at
+        :return: The value, or NaN if it isn't available
+        :rtype: float
+        """
+        pass
+
+    def _compare(self, other, op):
+        return Compare(self, op, _as_expression(other))
+
+    def __lt__(self, other):
+        """Return a condition that this expression is less than another."""
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        """Return a condition that this expression is less than or equal to another."""
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        """Return a condition that this expression is greater than another."""
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        """Return a condition that this expression is greater than or equal to another."""
+        return self._compare(other, operator.ge)
+
+    def __eq__(self, other):
+        """Return a condition that this expression equals another."""
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other):
+        """Return a condition that this expression doesn't equal another."""
+        return self._compare(other, operator.ne)
+
+    __hash__ = object.__hash__
+
+    def __add__(self, other):
+        """Return the sum of this expression and another."""
+        return BinaryOp(self, operator.add, _as_expression(other))
+
+    def __sub__(self, other):
+        """Return the difference of this expression and another."""
+        return BinaryOp(self, operator.sub, _as_expression(other))
+
+    def __mul__(self, other):
+        """Return the product of this expression and another."""
+        return BinaryOp(self, operator.mul, _as_expression(other))
+
+    def __truediv__(self, other):
+        """Return the quotient of this expression and another. Division by zero gives NaN."""
+        return BinaryOp(self, operator.truediv, _as_expression(other))
+
+    def crosses_above(self, other):
+        """Return a condition that is true if this expression moved from at or below another one to above it.
+
+        :param other: An expression or number
+        :rtype: Condition
+        """
+        return Crosses(self, _as_expression(other), above=True)
+
+    def crosses_below(self, other):
+        """Return a condition that is true if this expression moved from at or above another one to below it.
+
+        :param other: An expression or number
+        :rtype: Condition
+        """
+        return Crosses(self, _as_expression(other), above=False)
+
+
+class Constant(Expression):
+    """A fixed number."""
+
+    def __init__(self, value):
+        """Initialize the constant.
+
+        :param float value: The number
+        """
+        self.value = value
+
+    def evaluate(self, ctx, ago=0):
+        """Return the number."""
+        return self.value
+
+
+class Value(Expression):
+    """A candle price or an indicator value of the symbol."""
+
+    def __init__(self, name, field=None, ago=0):
+        """Initialize the value.
+
+        :param str name: A price, such as "close", or the name of a registered indicator
+        :param field: For indicators with several outputs, the output to use. This is a column index for outputs such as
+            BBANDS, or a field name for structured results such as GannAnalysis.
+        :param int ago: The number of candles before the most recent one to read the value at
+        """
+        self.name = name
+        self.field = field
+        self.ago = ago
+
+    def evaluate(self, ctx, ago=0):
+        """Read the value, or NaN if the series or indicator is too short."""
+        ind = -1 - self.ago - ago
+        try:
+            if self.name in PRICES:
+                return getattr(ctx.series[ind], self.name)
+            value = ctx.indicators[self.name].data[ind]
+            if self.field is not None:
+                value = value[self.field]
+            return float(value)
+        except IndexError:
+            return NAN
+
+
+class BinaryOp(Expression):
+    """An arithmetic combination of two expressions."""
+
+    def __init__(self, left, op, right):
+        """Initialize the operation.
+
+        :param Expression left: The left operand
+        :param callable op: The operator, such as operator.add
+        :param Expression right: The right operand
+        """
+        self.left = left
+        self.op = op
+        self.right = right
+
+    def evaluate(self, ctx, ago=0):
+        """Calculate the operation, or NaN if it is undefined."""
+        try:
+            return self.op(self.left.evaluate(ctx, ago), self.right.evaluate(ctx, ago))
+        except ZeroDivisionError:
+            return NAN
+
+
+class Condition(ABC):
+    """Base class for a test of a symbol. Conditions are combined with & (and), | (or) and ~ (not)."""
+
+    @abstractmethod
+    def evaluate(self, ctx):
+        """Test the symbol.
+
+        :param Context ctx: The symbol to test
+        :rtype: bool
+        """
+        pass
+
+    def __and__(self, other):
+        """Return a condition that this condition and another are both true."""
+        return All(self, other)
+
+    def __or__(self, other):
+        """Return a condition that this condition or another is true."""
+        return Any(self, other)
+
+    def __invert__(self):
+        """Return a condition that this condition is false."""
+        return Not(self)
+
+
+class Compare(Condition):
+    """A comparison of two expressions. Comparisons with NaN are false."""
+
+    def __init__(self, left, op, right):
+        """Initialize the comparison.
+
+        :param Expression left: The left side
+        :param callable op: The comparison, such as operator.lt
+        :param Expression right: The right side
+        """
+        self.left = left
+        self.op = op
+        self.right = right
+
+    def evaluate(self, ctx):
+        """Compare the expressions on the most recent candle."""
+        return bool(self.op(self.left.evaluate(ctx), self.right.evaluate(ctx)))
+
+
+class Crosses(Condition):
+    """A test that one expression crossed another between the previous candle and the most recent one."""
+
+    def __init__(self, left, right, above=True):
+        """Initialize the test.
+
+        :param Expression left: The expression that crosses
+        :param Expression right: The expression that is crossed
+        :param bool above: True to test for crossing from below to above, False for the opposite
+        """
+        self.left = left
+        self.right = right
+        self.above = above
+
+    def evaluate(self, ctx):
+        """Test for the cross."""
+        prev = self.left.evaluate(ctx, 1) - self.right.evaluate(ctx, 1)
+        curr = self.left.evaluate(ctx) - self.right.evaluate(ctx)
+        if self.above:
+            return prev <= 0 < curr
+        return prev >= 0 > curr
+
+
+class CrossesLevel(Condition):
+    """A test that the most recent candle traded through any of a set of price levels, such as the levels of Notes."""
+
+    def __init__(self, levels):
+        """Initialize the test.
+
+        :param list[float] levels: The price levels
+        """
+        self.levels = sorted(levels)
+
+    def evaluate(self, ctx):
+        """Test whether a level lies between the low and high of the most recent candle."""
+        if len(ctx.series) == 0:
+            return False
+        last = ctx.series.last
+        # The first level at or above the low is the only one that can be in the candle's range
+        lo, hi = 0, len(self.levels)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.levels[mid] < last.low:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < len(self.levels) and self.levels[lo] <= last.high
+
+
+class All(Condition):
+    """A test that every one of several conditions is true."""
+
+    def __init__(self, *conditions):
+        """Initialize the test.
+
+        :param conditions: The conditions
+        """
+        self.conditions = conditions
+
+    def evaluate(self, ctx):
+        """Test each condition, stopping at the first false one."""
+        return all(c.evaluate(ctx) for c in self.conditions)
+
+
+class Any(Condition):
+    """A test that at least one of several conditions is true."""
+
+    def __init__(self, *conditions):
+        """Initialize the test.
+
+        :param conditions: The conditions
+        """
+        self.conditions = conditions
+
+    def evaluate(self, ctx):
+        """Test each condition, stopping at the first true one."""
+        return any(c.evaluate(ctx) for c in self.conditions)
+
+
+class Not(Condition):
+    """The opposite of a condition."""
+
+    def __init__(self, condition):
+        """Initialize the test.
+
+        :param Condition condition: The condition to negate
+        """
+        self.condition = condition
+
+    def evaluate(self, ctx):
+        """Negate the condition."""
+        return not self.condition.evaluate(ctx)
@@ -0,0 +1,230 @@
+import math
+import multiprocessing
+import os
+
+from tbot.candles import CandleStore
+from tbot.util import log
+
+from .conditions import Context, Value
+
+LOGGER = log.get_logger()
+
+DEFAULT_MARGIN = 100
+DEFAULT_CHUNK_SIZE = 250
+
+
+class Match:
+    """Class to represent a symbol that passed a screen."""
+
+    __slots__ = ("symbol", "score", "values")
+
+    def __init__(self, symbol, score, values):
+        """Initialize the match.
+
+        :param str symbol: The symbol
+        :param float score: The value the matches are ranked by, or None if they aren't ranked
+        :param dict values: The reported values of the symbol, as (label -> value)
+        """
+        self.symbol = symbol
+        self.score = score
+        self.values = values
+
+    def to_json_dict(self):
+        """Return the match as a JSON-serializable dictionary.
+
+        :rtype: dict
+        """
+        return {"symbol": self.symbol, "score": self.score, "values": self.values}
+
+    def __repr__(self):
+        """Return a string representation of the match."""
+        return f"Match({self.symbol!r}, score={self.score!r})"
+
+
+class _ScreenJob:
+    """Everything a process needs to screen a chunk of symbols. It is picklable, so it can be sent to workers."""
+
+    def __init__(
+        self, root, period, max_candles, indicators, condition, rank_by, report
+    ):
+        self.root = root
+        self.period = period
+        self.max_candles = max_candles
+        self.indicators = indicators
+        self.condition = condition
+        self.rank_by = rank_by
+        self.report = report
+
+    def run(self, symbols):
+        store = CandleStore(self.root)
+        matches = []
+        for symbol in symbols:
+            try:
+                series = store.load(symbol, self.period, self.max_candles)
+            except (OSError, KeyError, ValueError):
+                LOGGER.warning(f"Could not load {symbol} {self.period}. Skipping it")
+                continue
+            if len(series) == 0:
+                continue
+
+            indicators = {}
+            for name, (factory, args, kwargs) in self.indicators.items():
+                indicator = factory(*args, **kwargs)
+                indicator._update(series)
+                indicators[name] = indicator
+
+            ctx = Context(symbol, series, indicators)
+            if not self.condition.evaluate(ctx):
+                continue
+
+            score = None if self.rank_by is None else self.rank_by.evaluate(ctx)
+            values = {label: expr.evaluate(ctx) for label, expr in self.report.items()}
+            matches.append(Match(symbol, score, values))
+        return matches
+
+
+# State of a screener worker process, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(job):
+    _worker["job"] = job
+
+
+def _screen_chunk(symbols):
+    return _worker["job"].run(symbols)
+
+
+class Screener:
+    """Class to screen many symbols in a CandleStore for a condition.
+
+    Each symbol is loaded from the store with only the candles its indicators need, the registered indicators are
+    calculated on it, and the condition is tested on the most recent candle. Symbols are screened in chunks, spread over
+    worker processes, and the matches are ranked.
+
+    Example::
+
+        screener = Screener(store, CandlePeriod("1d"))
+        screener.register_indicator("rsi", TalibIndicator, "RSI", timeperiod=14)
+        screener.register_indicator("gann", GannAnalysis)
+        matches = screener.screen(
+            (Value("rsi") < 30) & (Value("gann", "direction") == GannDir.UP), rank_by=Value("rsi"), descending=False
+        )
+    """
+
+    def __init__(self, store, period, margin=DEFAULT_MARGIN):
+        """Initialize the screener.
+
+        :param CandleStore store: The store to load candles from
+        :param CandlePeriod period: The period of the candles to screen
+        :param int margin: The number of candles to load beyond the largest lookback of the indicators
+        """
+        self.store = store
+        self.period = period
+        self.margin = margin
+        self._indicators = {}
+        self._lookback = 0
+
+    def register_indicator(self, name, factory, *args, **kwargs):
+        """Register an indicator to calculate on every symbol.
+
+        :param str name: A unique name to refer to the indicator in conditions, such as "rsi"
+        :param callable factory: A picklable callable that returns a new indicator, such as an Indicator class
+        :param args: Positional arguments of the factory. For TalibIndicator, pass the name of the TA-Lib function rather
+            than the function, since the functions can't be pickled.
+        :param kwargs: Keyword arguments of the factory
+        """
+        if name in self._indicators:
+            raise ValueError(
+                f"There is already an indicator named '{name}' registered."
+            )
+
+        # Build one indicator up front, to check the arguments and read its lookback
+        self._lookback = max(self._lookback, factory(*args, **kwargs).lookback)
+        self._indicators[name] = (factory, args, kwargs)
+
+    @property
+    def max_candles(self):
+        """Return the number of candles loaded for each symbol.
+
+        :rtype: int
+        """
+        return max(self._lookback + 1 + self.margin, 2)
+
+    def screen(
+        self,
+        condition,
+        symbols=None,
+        rank_by=None,
+        descending=True,
+        limit=None,
+        report=None,
+        processes=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+    ):
+        """Screen symbols for a condition.
+
+        :param Condition condition: The condition a symbol must pass
+        :param list[str] symbols: The symbols to screen. If None, every symbol in the store with candles of the period.
+        :param Expression rank_by: The expression to rank matches by. If None, matches are ordered by symbol.
+        :param bool descending: True to rank the largest values first
+        :param int limit: The maximum number of matches to return. If None, every match is returned.
+        :param report: The values to report for each match, as a dictionary of (label -> Expression), or a list of
+            indicator names
+        :param int processes: The number of worker processes. If None, one per CPU is used. With one process, the screen
+            runs in the calling process.
+        :param int chunk_size: The number of symbols each worker screens at a time
+        :return: The matches, best first. Matches without a score are last.
+        :rtype: list[Match]
+        """
+        if symbols is None:
+            symbols = self.store.symbols(self.period)
+        if report is None:
+            report = {}
+        elif not isinstance(report, dict):
+            report = {name: Value(name) for name in report}
+
+        job = _ScreenJob(
+            self.store.root,
+            self.period,
+            self.max_candles,
+            self._indicators,
+            condition,
+            rank_by,
+            report,
+        )
+        chunks = [
+            symbols[ind : ind + chunk_size]
+            for ind in range(0, len(symbols), chunk_size)
+        ]
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = min(processes, len(chunks))
+
+        matches = []
+        if processes <= 1:
+            for chunk in chunks:
+                matches.extend(job.run(chunk))
+        else:
+            with multiprocessing.Pool(
+                processes, initializer=_init_worker, initargs=(job,)
+            ) as pool:
+                for chunk_matches in pool.imap_unordered(_screen_chunk, chunks):
+                    matches.extend(chunk_matches)
+
+        return self._rank(matches, rank_by is not None, descending)[:limit]
+
+    @classmethod
+    def _rank(cls, matches, ranked, descending):
+        matches.sort(key=lambda m: m.symbol)
+        if not ranked:
+            return matches
+
+        def unscored(m):
+            return m.score is None or (
+                isinstance(m.score, float) and math.isnan(m.score)
+            )
+
+        scored = [m for m in matches if not unscored(m)]
+        scored.sort(key=lambda m: m.score, reverse=descending)
+        return scored + [m for m in matches if unscored(m)]
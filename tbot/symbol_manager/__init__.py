@@ -1,4 +1,17 @@
-from .symbol_manager import SymbolManager
-from .symbol_sub import SymbolSubscriber
+from tbot.util.lazy import lazy_exports
 
-__all__ = ["SymbolSubscriber", "SymbolManager"]
+# Submodules are imported when one of their names is first used, so only the modules that need NumPy load it
+_EXPORTS = {
+    "FeedView": ".multi_timeframe",
+    "MatrixEvaluator": ".matrix_evaluator",
+    "MatrixSubscriber": ".matrix_evaluator",
+    "MultiTimeframeSubscriber": ".multi_timeframe",
+    "SymbolSubscriber": ".symbol_sub",
+    "SymbolManager": ".symbol_manager",
+    "Timeframe": ".multi_timeframe",
+    "TimeframeIndex": ".multi_timeframe",
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
@@ -0,0 +1,227 @@
+import numpy as np
+
+from tbot.indicators.matrix import PRICES, stack
+from tbot.indicators.ring_buffer import RingBuffer
+
+from .symbol_sub import SymbolSubscriber
+
+
+class MatrixSubscriber(SymbolSubscriber):
+    """Class to receive updates for a symbol from a matrix evaluator, along with the symbol's matrix indicator values.
+
+    Register it with MatrixEvaluator.add_subscriber() instead of with the symbol manager. It is updated once every
+    symbol of the evaluator has a candle for the bar, after the matrix indicators are calculated.
+    """
+
+    def __init__(self, symbol, period):
+        """Initialize the subscriber.
+
+        :param str symbol: The symbol of interest
+        :param CandlePeriod period: The time period the feed will be delimited by
+        """
+        super().__init__(symbol, period)
+        self._evaluator = None
+        self._column = None
+
+    @property
+    def matrix(self):
+        """Return the most recent value of every matrix indicator for this subscriber's symbol.
+
+        :return: A dictionary of (name -> value)
+        :rtype: dict
+        """
+        return {
+            name: values[-1, self._column]
+            for name, values in self._evaluator.values.items()
+        }
+
+    def matrix_history(self, name):
+        """Return the recent values of a matrix indicator for this subscriber's symbol, oldest first.
+
+        :param str name: The name of the indicator
+        :return: A read-only view of the symbol's column. It is only valid until the next evaluation.
+        :rtype: numpy.ndarray
+        """
+        return self._evaluator.values[name][:, self._column]
+
+
+class _ColumnFeed(SymbolSubscriber):
+    """Receives one symbol's feed from the symbol manager on behalf of the evaluator."""
+
+    def __init__(self, evaluator, symbol, period, column):
+        super().__init__(symbol, period)
+        self._evaluator = evaluator
+        self._column = column
+
+    def process_update(self, new_feed, provisional=False):
+        self._evaluator._receive(self._column, new_feed)
+
+    def on_update(self):
+        pass
+
+
+class MatrixEvaluator:
+    """Class to evaluate matrix indicators on many symbols once per bar.
+
+    The evaluator subscribes to the feed of every symbol. When every symbol has a candle for a bar, or a later bar
+    starts, the bar's prices are stacked into one row and every indicator is calculated for all symbols at once. A symbol
+    without a candle for the bar carries its previous prices forward. Subscribers of each symbol are then handed their
+    symbol's column.
+
+    .. note::
+        Only final candles are evaluated. If a bar that was already evaluated changes, such as a revised candle, every
+        indicator is calculated again from the feeds. The history of results is kept in ring buffers, so each bar
+        appends one row per indicator rather than shifting the whole history.
+    """
+
+    def __init__(self, symbols, period, indicators, history=50):
+        """Initialize the evaluator.
+
+        :param list[str] symbols: The symbols to evaluate, in column order
+        :param CandlePeriod period: The period of the feeds
+        :param dict indicators: The indicators, as (name -> MatrixIndicator). They are evaluated in order, so an
+            indicator can use the result of an earlier one as its source.
+        :param int history: The number of rows of results to keep for each indicator
+        """
+        if history < 1:
+            raise ValueError(f"history must be at least 1. Got {history}")
+
+        self.symbols = list(symbols)
+        self.period = period
+        self.indicators = dict(indicators)
+        self.history = history
+        self._columns = {symbol: col for col, symbol in enumerate(self.symbols)}
+        self._subscribers = [[] for _ in self.symbols]
+
+        n = len(self.symbols)
+        self._feeds = [None] * n
+        self._last_time = None
+        self._pending_time = None
+        self._pending = {name: np.full(n, np.nan) for name in PRICES}
+        self._received = np.zeros(n, dtype=bool)
+        self._times = RingBuffer(history, (), np.int64)
+        self._values = {name: RingBuffer(history, (n,)) for name in self.indicators}
+
+        # Read-only views of the buffers, refreshed after every evaluation
+        self.times = None
+        self.values = None
+        self._clear()
+        self._refresh_views()
+
+    def attach(self, symbol_manager):
+        """Subscribe to the feed of every symbol.
+
+        :param SymbolManager symbol_manager: The symbol manager that holds the feeds. The evaluator must be attached
+            before the feeds are added.
+        """
+        for col, symbol in enumerate(self.symbols):
+            symbol_manager.add_subscriber(_ColumnFeed(self, symbol, self.period, col))
+
+    def add_subscriber(self, subscriber):
+        """Hand a symbol's results to a subscriber after every evaluation.
+
+        :param MatrixSubscriber subscriber: The subscriber. Its symbol must be one of the evaluator's symbols.
+        """
+        if not isinstance(subscriber, MatrixSubscriber):
+            raise TypeError(
+                f"Param 'subscriber' must be of type MatrixSubscriber. Got {type(subscriber)}"
+            )
+        try:
+            col = self._columns[subscriber.symbol]
+        except KeyError:
+            raise KeyError(f"{subscriber.symbol} is not evaluated by this evaluator")
+
+        subscriber._evaluator = self
+        subscriber._column = col
+        self._subscribers[col].append(subscriber)
+
+    def row(self, name):
+        """Return the most recent value of an indicator for every symbol, such as to screen or rank them.
+
+        :param str name: The name of the indicator
+        :rtype: numpy.ndarray
+        """
+        return self.values[name][-1]
+
+    def _receive(self, col, feed):
+        first = self._feeds[col] is None
+        self._feeds[col] = feed
+        if first:
+            if all(f is not None for f in self._feeds):
+                self._prime()
+            return
+
+        c = feed.last
+        time = int(c.time.timestamp() * 1000)
+        if self._last_time is not None and time <= self._last_time:
+            self._prime()
+            return
+
+        if self._pending_time is not None and time > self._pending_time:
+            self._flush()
+        self._pending_time = time
+        for name in PRICES:
+            self._pending[name][col] = getattr(c, name)
+        self._received[col] = True
+        if self._received.all():
+            self._flush()
+
+    def _clear(self):
+        """Fill the history with rows of NaN at time 0, so it always has the same number of rows."""
+        n = len(self.symbols)
+        self._times.fill(np.zeros(self.history, dtype=np.int64))
+        for values in self._values.values():
+            values.fill(np.full((self.history, n), np.nan))
+
+    def _refresh_views(self):
+        self.times = self._times.view
+        self.times.flags.writeable = False
+        self.values = {}
+        for name, values in self._values.items():
+            view = values.view
+            view.flags.writeable = False
+            self.values[name] = view
+
+    def _reset(self):
+        n = len(self.symbols)
+        for indicator in self.indicators.values():
+            indicator.reset(n)
+        self._clear()
+        self._last_time = None
+
+    def _evaluate(self, time, prices):
+        """Calculate every indicator on a row of prices and append the results to the history."""
+        results = {}
+        for name, indicator in self.indicators.items():
+            results[name] = indicator.push(prices, results)
+
+        self._times.append(time)
+        for name, values in self._values.items():
+            values.append(results[name])
+        self._last_time = time
+
+    def _prime(self):
+        """Calculate every indicator on the whole history of the feeds."""
+        self._reset()
+        times, prices = stack(self._feeds)
+        for row, time in enumerate(times):
+            self._evaluate(time, {name: values[row] for name, values in prices.items()})
+
+        for name in PRICES:
+            self._pending[name][:] = prices[name][-1] if len(times) else np.nan
+        self._pending_time = None
+        self._received[:] = False
+        self._publish()
+
+    def _flush(self):
+        """Evaluate the pending row, then start the next one from its prices."""
+        self._evaluate(self._pending_time, self._pending)
+        self._pending_time = None
+        self._received[:] = False
+        self._publish()
+
+    def _publish(self):
+        self._refresh_views()
+        for col, subscribers in enumerate(self._subscribers):
+            for subscriber in subscribers:
+                subscriber.process_update(self._feeds[col])
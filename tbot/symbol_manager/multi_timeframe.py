@@ -0,0 +1,396 @@
+import weakref
+
+import numpy as np
+
+from tbot.indicators.ring_buffer import RingBuffer, SeriesArrays
+
+from .symbol_sub import SymbolSubscriber
+
+# The OHLCV columns of each feed, shared by every view of it
+_feed_arrays = weakref.WeakKeyDictionary()
+
+
+def _times(candles, n):
+    """Return the open times of candles in milliseconds since the epoch."""
+    return np.fromiter((int(c.time.timestamp() * 1000) for c in candles), np.int64, n)
+
+
+class FeedView:
+    """Class to read a candle series without copying it or being able to change it.
+
+    The view reads the series the symbol manager updates, so it always shows the most recent candles, including a
+    candle that is still forming. The columns of a series are the only copy, and there is one per series, shared by every
+    view of it.
+    """
+
+    def __init__(self, series=None):
+        """Initialize the view.
+
+        :param CandleSeries series: The series to view, or None until the feed is added to the symbol manager
+        """
+        self._series = series
+        self._columns = None
+
+    def _set(self, series):
+        self._series = series
+        self._columns = None
+
+    @property
+    def period(self):
+        """Return the period of the candles.
+
+        :rtype: CandlePeriod
+        """
+        return None if self._series is None else self._series.period
+
+    @property
+    def last(self):
+        """Return the most recent candle."""
+        return self._series.last
+
+    @property
+    def columns(self):
+        """Return the OHLCV columns of the series.
+
+        The columns are kept in ring buffers that are brought up to date incrementally, the first time any view of the
+        series reads them after an update.
+
+        :return: A dictionary of (name -> array) for each name in tbot.indicators.ring_buffer.COLUMNS. The arrays are
+            read-only, and only valid until the next update.
+        :rtype: dict
+        """
+        if self._columns is None:
+            arrays = _feed_arrays.get(self._series)
+            if arrays is None:
+                arrays = _feed_arrays[self._series] = SeriesArrays()
+            arrays.refresh(self._series)
+            self._columns = {}
+            for col, values in arrays.columns.items():
+                # Only this view is read-only, the ring buffer underneath still has to be written to
+                values = values.view()
+                values.flags.writeable = False
+                self._columns[col] = values
+        return self._columns
+
+    def __len__(self):
+        """Return the number of candles in the series."""
+        return 0 if self._series is None else len(self._series)
+
+    def __iter__(self):
+        """Return an iterator over the candles, oldest first."""
+        return iter(() if self._series is None else self._series)
+
+    def __getitem__(self, ind):
+        """Return the candle, or list of candles, at an index."""
+        if self._series is None:
+            raise IndexError("The feed has not been added to the symbol manager yet")
+        return self._series[ind]
+
+
+class TimeframeIndex:
+    """Class to map each candle of a base feed to the candle of a higher-period feed that contains it.
+
+    The index is kept alongside the base feed in a ring buffer, and holds a running count of higher candles for each base
+    candle, so it stays valid as both feeds slide. Looking up a base candle takes constant time. When the feeds are
+    updated, only the new candles are mapped, plus the base candles that a new higher candle turns out to contain.
+
+    A base candle is contained by the last higher candle that opened at or before it. For time-based higher periods,
+    the base candle must also open before the higher candle ends.
+    """
+
+    def __init__(self, period):
+        """Initialize the index.
+
+        :param CandlePeriod period: The period of the higher feed
+        """
+        self.period = period
+        self._span = int(period.size * 1000) if period.is_time_based() else None
+
+        self._base_times = None
+        self._base_state = None
+        self._targets = None
+        self._higher_times = None
+        self._higher_state = None
+        self._higher_total = 0
+
+    @classmethod
+    def _sync(cls, series, times, state):
+        """Bring a buffer of open times up to date with a series.
+
+        :return: The buffer, the state of the series, and the number of candles appended, or None if every candle was
+            read again
+        :rtype: tuple
+        """
+        new_state = series.state()
+        n = len(series)
+        appended = None
+        if (
+            times is not None
+            and times.capacity == series.max_candles
+            and state[1] == new_state[1]
+        ):
+            appended = new_state[0] - state[0]
+
+        if appended is None or appended >= n or (len(times) == 0 and n > 0):
+            times = RingBuffer(series.max_candles, (), np.int64)
+            times.extend(_times(series, n))
+            return times, new_state, None
+
+        if appended == 1:
+            times.append(int(series[n - 1].time.timestamp() * 1000))
+        elif appended > 1:
+            times.extend(_times(series[n - appended :], appended))
+        return times, new_state, appended
+
+    @property
+    def _first(self):
+        """Return the running count of the oldest higher candle in the feed."""
+        if self._higher_times is None:
+            return 0
+        return self._higher_total - len(self._higher_times)
+
+    def _locate(self, times):
+        """Return the running count of the higher candle containing each time, or -1 if there isn't one."""
+        if self._higher_times is None or len(self._higher_times) == 0:
+            return np.full(len(times), -1, np.int64)
+
+        higher = self._higher_times.view
+        ind = np.searchsorted(higher, times, side="right") - 1
+        found = ind >= 0
+        if self._span is not None:
+            found &= times < higher[np.maximum(ind, 0)] + self._span
+        return np.where(found, ind + self._first, -1)
+
+    def _locate_one(self, time):
+        """Return the running count of the higher candle containing a time, like _locate."""
+        # A new base candle almost always belongs to the most recent higher candle, or one that hasn't arrived yet
+        if self._higher_times is not None and len(self._higher_times) > 0:
+            last = int(self._higher_times.view[-1])
+            if time >= last:
+                if self._span is not None and time >= last + self._span:
+                    return -1
+                return self._higher_total - 1
+        return int(self._locate(np.array([time], np.int64))[0])
+
+    def update_base(self, series):
+        """Map the base candles added since the last update.
+
+        :param CandleSeries series: The base feed
+        """
+        self._base_times, self._base_state, appended = self._sync(
+            series, self._base_times, self._base_state
+        )
+        if appended is None:
+            self._targets = RingBuffer(self._base_times.capacity, (), np.int64)
+            self._targets.extend(self._locate(self._base_times.view))
+        elif appended == 1:
+            self._targets.append(self._locate_one(int(self._base_times.view[-1])))
+        elif appended > 1:
+            self._targets.extend(self._locate(self._base_times.view[-appended:]))
+
+    def update_higher(self, series):
+        """Take in the higher candles added since the last update.
+
+        :param CandleSeries series: The higher-period feed
+        """
+        self._higher_times, self._higher_state, appended = self._sync(
+            series, self._higher_times, self._higher_state
+        )
+        if appended is None:
+            self._higher_total = len(series)
+            if self._targets is not None:
+                self._targets.fill(self._locate(self._base_times.view))
+        elif appended > 0:
+            self._higher_total += appended
+            if self._targets is not None:
+                # Base candles that arrived before the higher candle containing them were mapped without it
+                base = self._base_times.view
+                start = np.searchsorted(base, self._higher_times.view[-appended])
+                if start < len(base):
+                    self._targets[start:] = self._locate(base[start:])
+
+    def __len__(self):
+        """Return the number of base candles in the index."""
+        return 0 if self._targets is None else len(self._targets)
+
+    def __getitem__(self, ind):
+        """Return the index in the higher feed of the candle containing a base candle.
+
+        :param int ind: The index of the base candle in the base feed
+        :return: The index of the containing candle in the higher feed, or -1 if the higher feed doesn't have it, such as
+            when it hasn't completed yet or has been dropped from the feed
+        :rtype: int
+        """
+        if self._targets is None:
+            raise IndexError("The index is empty")
+        target = int(self._targets.view[ind])
+        pos = target - self._first
+        return pos if target >= 0 and pos >= 0 else -1
+
+    @property
+    def positions(self):
+        """Return the index in the higher feed of the candle containing every base candle, as for __getitem__.
+
+        :rtype: numpy.ndarray
+        """
+        if self._targets is None:
+            return np.empty(0, np.int64)
+        targets = self._targets.view
+        pos = targets - self._first
+        return np.where((targets >= 0) & (pos >= 0), pos, -1)
+
+
+class Timeframe(SymbolSubscriber):
+    """Class to follow one higher-period feed on behalf of a MultiTimeframeSubscriber.
+
+    Indicators can be registered on it like on any subscriber, and are calculated on the higher-period feed.
+    """
+
+    def __init__(self, owner, symbol, period):
+        """Initialize the timeframe.
+
+        :param MultiTimeframeSubscriber owner: The subscriber this timeframe belongs to
+        :param str symbol: The symbol of interest
+        :param CandlePeriod period: The higher period
+        """
+        super().__init__(symbol, period)
+        self.INTRABAR = owner.INTRABAR
+        self._owner = owner
+        self._view = FeedView()
+        self._index = TimeframeIndex(period)
+
+    @property
+    def view(self):
+        """Return a read-only view of the higher-period feed.
+
+        :rtype: FeedView
+        """
+        return self._view
+
+    @property
+    def index(self):
+        """Return the map from base candles to the higher candles that contain them.
+
+        :return: The index, brought up to date with the higher feed, which may have a forming candle the timeframe was
+            not notified of
+        :rtype: TimeframeIndex
+        """
+        self._sync()
+        return self._index
+
+    def containing(self, ago=0):
+        """Return the higher candle that contains a base candle.
+
+        :param int ago: The number of base candles before the most recent one
+        :return: The candle, or None if the higher feed doesn't have it
+        :rtype: Candle
+        """
+        try:
+            pos = self.index[-1 - ago]
+        except IndexError:
+            return None
+        return None if pos < 0 else self._feed[pos]
+
+    def _sync(self):
+        if self._feed is not None:
+            self._index.update_higher(self._feed)
+
+    def process_update(self, new_feed, provisional=False):
+        """Ingest an update of the higher-period feed from the symbol manager."""
+        self._view._set(new_feed)
+        super().process_update(new_feed, provisional)
+
+    def on_update(self):
+        """Map the new higher candles. The owner is only notified of base candles."""
+        self._sync()
+
+
+class MultiTimeframeSubscriber(SymbolSubscriber):
+    """Class to receive updates for a symbol on a base period, with aligned views of the symbol on higher periods.
+
+    on_update() runs once per update of the base feed. Each higher period is a Timeframe, which has a read-only view of
+    its feed, the indicators registered on it, and an index from each base candle to the higher candle that contains it.
+    The views read the feeds held by the symbol manager. Only their columns are copied, once per feed however many views
+    read them.
+
+    Add the subscriber to the symbol manager like any other. It subscribes to its higher-period feeds itself.
+
+    Example::
+
+        class Strategy(MultiTimeframeSubscriber):
+            def __init__(self, symbol):
+                super().__init__(symbol, CandlePeriod("3m"), [CandlePeriod("15m"), CandlePeriod("1d")])
+                self.timeframe("1d").register_indicator("sma", TalibIndicator(talib.SMA, 20))
+
+            def on_update(self):
+                daily = self.timeframe("1d")
+                ind = daily.index[-1]
+                if ind >= 0 and self.feed.last.close > daily.indicators["sma"].data[ind]:
+                    ...
+
+    .. note::
+        A higher candle is only in its feed once the platform has delivered it. When a base candle and a higher candle
+        close at the same time, the backtest engine and replay platform deliver the higher candle first, so the base
+        update already sees it.
+    """
+
+    def __init__(self, symbol, period, periods):
+        """Initialize the subscriber.
+
+        :param str symbol: The symbol of interest
+        :param CandlePeriod period: The base period. on_update runs once for every update of this feed.
+        :param list[CandlePeriod] periods: The higher periods
+        """
+        super().__init__(symbol, period)
+        self._view = FeedView()
+        self._timeframes = {}
+        for p in periods:
+            if str(p) == str(period) or str(p) in self._timeframes:
+                raise ValueError(f"Period {p} is requested more than once")
+            self._timeframes[str(p)] = Timeframe(self, symbol, p)
+
+    @property
+    def view(self):
+        """Return a read-only view of the base feed.
+
+        :rtype: FeedView
+        """
+        return self._view
+
+    @property
+    def timeframes(self):
+        """Return the higher periods.
+
+        :return: A dictionary of (period string -> Timeframe)
+        :rtype: dict
+        """
+        return self._timeframes
+
+    def timeframe(self, period):
+        """Return one of the higher periods.
+
+        :param period: The period, as a CandlePeriod or a string such as "1d"
+        :rtype: Timeframe
+        """
+        try:
+            return self._timeframes[str(period)]
+        except KeyError:
+            raise KeyError(f"{period} is not one of the periods of this subscriber")
+
+    def process_update(self, new_feed, provisional=False):
+        """Ingest an update of the base feed from the symbol manager."""
+        self._view._set(new_feed)
+        for timeframe in self._timeframes.values():
+            timeframe._sync()
+            timeframe._index.update_base(new_feed)
+        super().process_update(new_feed, provisional)
+
+    def _attach(self, symbol_manager):
+        super()._attach(symbol_manager)
+        for timeframe in self._timeframes.values():
+            symbol_manager.add_subscriber(timeframe)
+
+    def _detach(self, symbol_manager):
+        for timeframe in self._timeframes.values():
+            symbol_manager.remove_subscriber(timeframe)
+        super()._detach(symbol_manager)
@@ -1,5 +1,12 @@
+import threading
+
+
 class SymbolManager:
-    """Class to hold data for symbols that will be updated during the lifetime of an application."""
+    """Class to hold data for symbols that will be updated during the lifetime of an application.
+
+    Feeds and subscriptions can be changed from any thread, such as web request handlers, while another thread updates
+    the feeds. Subscribers are notified on the thread that updated the feed, with the manager locked.
+    """
 
     @classmethod
     def _to_key(cls, symbol, period):
@@ -10,17 +17,27 @@ class SymbolManager:
         """
         return f"{str(symbol)}_{str(period)}"
 
-    def __init__(self):
-        """Initialize the symbol manager."""
+    def __init__(self, margin=None):
+        """Initialize the symbol manager.
+
+        :param int margin: If not None, feeds are sized automatically to the lookback of their subscribers plus this many
+            candles. A feed grows when a subscriber or indicator needs more candles than it keeps. If None, feeds keep the
+            size they were added with.
+        """
         super().__init__()
+        self.margin = margin
         self._symbols = {}
-        self._subscribers = []
+        self._subscribers = {}
+        self._provisional = set()
+        # Reentrant, since subscribers may subscribe to other feeds or register indicators while being notified
+        self._lock = threading.RLock()
 
-    def _invoke_subscribers(self, feed_key):
-        for subscriber in self._subscribers:
-            sub_key = self._to_key(subscriber.symbol, subscriber.period)
-            if feed_key == sub_key:
-                subscriber.process_update(self._symbols[feed_key])
+    def _invoke_subscribers(self, feed_key, provisional=False):
+        feed = self._symbols[feed_key]
+        for subscriber in self._subscribers.get(feed_key, ()):
+            if provisional and not subscriber.INTRABAR:
+                continue
+            subscriber.process_update(feed, provisional)
 
     def add_feed(self, symbol, period, initial_feed_data):
         """Register a feed to a symbol.
@@ -30,11 +47,14 @@ class SymbolManager:
         :param list[Candle] initial_feed_data: The initial data of the feed, as a list of candles.
         """
         key = self._to_key(symbol, period)
-        if key in self._symbols:
-            raise ValueError(f"Feed for {key} is already registered")
+        with self._lock:
+            if key in self._symbols:
+                raise ValueError(f"Feed for {key} is already registered")
 
-        self._symbols[key] = initial_feed_data
-        self._invoke_subscribers(key)
+            self._symbols[key] = initial_feed_data
+            if self.margin is not None:
+                initial_feed_data.resize(self.feed_size(symbol, period))
+            self._invoke_subscribers(key)
 
     def remove_feed(self, symbol, period):
         """Remove a feed from the symbol manager.
@@ -43,29 +63,122 @@ class SymbolManager:
         :param str period: The name of the feed to remove.
         """
         key = self._to_key(symbol, period)
-        try:
-            del self._symbols[key]
+        with self._lock:
+            self._provisional.discard(key)
+            self._symbols.pop(key, None)
 
-        except KeyError:
-            pass
-
-    def update_feed(self, symbol, period, update):
+    def update_feed(self, symbol, period, update, provisional=False):
         """Update a feed.
 
         :param str symbol: The name of the symbol
         :param str period: The name of the feed
         :param object update: The update to add to the feed
+        :param bool provisional: True if the update is a candle that is still forming. Only subscribers that accept
+            intrabar updates are notified of provisional updates.
+
+        .. note::
+            If the most recent candle in the feed is provisional and opened at the same time as the update, the update
+            replaces it instead of being appended. This is how a forming candle is updated, then finalized.
+        """
+        key = self._to_key(symbol, period)
+        with self._lock:
+            feed = self._symbols[key]
+            if key in self._provisional and feed.last.time == update.time:
+                feed.replace_last(update)
+            else:
+                feed.append(update)
+
+            if provisional:
+                self._provisional.add(key)
+            else:
+                self._provisional.discard(key)
+
+            self._invoke_subscribers(key, provisional)
+
+    def revise_feed(self, symbol, period, revision):
+        """Replace a candle that was previously added to a feed.
+
+        :param str symbol: The name of the symbol
+        :param str period: The name of the feed
+        :param Candle revision: The corrected candle. It replaces the candle in the feed with the same time.
+        """
+        key = self._to_key(symbol, period)
+        with self._lock:
+            self._symbols[key].revise(revision)
+            self._invoke_subscribers(key)
+
+    def feed_size(self, symbol, period):
+        """Return the number of candles a feed needs to keep for its subscribers.
+
+        :param str symbol: The name of the symbol
+        :param str period: The name of the feed
+        :return: The largest lookback of the feed's subscribers, plus the most recent candle and the margin
+        :rtype: int
         """
         key = self._to_key(symbol, period)
-        feed = self._symbols[key]
-        feed.append(update)
+        lookback = max(
+            (sub.lookback for sub in self._subscribers.get(key, ())), default=0
+        )
+        return max(lookback + 1 + (self.margin or 0), 2)
+
+    def fit_feed(self, symbol, period):
+        """Grow a feed if its subscribers need more candles than it keeps.
+
+        Feeds are never shrunk here, since dropping candles can't be undone. This does nothing unless the manager sizes
+        feeds automatically.
+
+        :param str symbol: The name of the symbol
+        :param str period: The name of the feed
+        """
+        if self.margin is None:
+            return
+        with self._lock:
+            feed = self._symbols.get(self._to_key(symbol, period))
+            if feed is not None:
+                size = self.feed_size(symbol, period)
+                if size > feed.max_candles:
+                    feed.resize(size)
+
+    def has_subscribers(self, symbol, period):
+        """Return True if any subscriber listens to a feed.
 
-        self._invoke_subscribers(key)
+        :param str symbol: The name of the symbol
+        :param str period: The name of the feed
+        :rtype: bool
+        """
+        return len(self._subscribers.get(self._to_key(symbol, period), ())) > 0
+
+    def notify(self, symbol_subscriber):
+        """Send a subscriber the current state of its feed, as if the feed had just been updated.
+
+        This brings a subscriber up to date when it subscribes to a feed that already has candles, rather than waiting
+        for the next update. Nothing is sent if the feed hasn't been added yet, or if its most recent candle is still
+        forming and the subscriber doesn't accept intrabar updates.
+
+        :param SymbolSubscriber symbol_subscriber: The subscriber to notify
+        """
+        key = self._to_key(symbol_subscriber.symbol, symbol_subscriber.period)
+        with self._lock:
+            feed = self._symbols.get(key)
+            provisional = key in self._provisional
+            if feed is None or (provisional and not symbol_subscriber.INTRABAR):
+                return
+            symbol_subscriber.process_update(feed, provisional)
 
     def add_subscriber(self, symbol_subscriber):
         """Subscribe to updates from a feed."""
-        self._subscribers.append(symbol_subscriber)
+        key = self._to_key(symbol_subscriber.symbol, symbol_subscriber.period)
+        with self._lock:
+            self._subscribers.setdefault(key, []).append(symbol_subscriber)
+            symbol_subscriber._attach(self)
+            self.fit_feed(symbol_subscriber.symbol, symbol_subscriber.period)
 
     def remove_subscriber(self, symbol_subscriber):
         """Unsubscribe from updates to a feed."""
-        self._subscribers.remove(symbol_subscriber)
+        key = self._to_key(symbol_subscriber.symbol, symbol_subscriber.period)
+        with self._lock:
+            subscribers = self._subscribers.get(key, [])
+            subscribers.remove(symbol_subscriber)
+            symbol_subscriber._detach(self)
+            if len(subscribers) == 0:
+                del self._subscribers[key]
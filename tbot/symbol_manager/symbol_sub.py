@@ -1,10 +1,19 @@
 from abc import ABC, abstractmethod
 
-from tbot.indicators import Indicator
+from tbot.indicators import IndicatorGraph
 
 
 class SymbolSubscriber(ABC):
-    """Class to receive updates for a symbol feed from the symbol manager."""
+    """Class to receive updates for a symbol feed from the symbol manager.
+
+    Subclasses that set INTRABAR to True are also updated while the most recent candle is still forming. The provisional
+    property tells on_update whether the most recent candle is complete.
+    """
+
+    INTRABAR = False
+
+    # The number of earlier candles that on_update reads from the feed, apart from what the indicators need
+    LOOKBACK = 0
 
     def __init__(self, symbol, period):
         """Initialize the Symbolsubscriber.
@@ -12,24 +21,37 @@ class SymbolSubscriber(ABC):
         :param str symbol: The symbol of interest
         :param CandlePeriod period: The time period the feed will be delimited by
         """
-        self._indicators = {}
+        self._graph = IndicatorGraph()
         self._feed = None
         self._has_update = False
+        self._provisional = False
 
         self._symbol = symbol
         self._period = period
+        self._manager = None
 
-    def process_update(self, new_feed):
+    def process_update(self, new_feed, provisional=False):
         """Ingest an update from the symbol manager.
 
         :param CandleSeries new_feed: The most recent data for this subscriber's feed
+        :param bool provisional: True if the most recent candle in the feed is still forming
 
         ..note::
             This is meant to be called only by the symbol manager object.
         """
         self._feed = new_feed
+        self._provisional = provisional
+        self._graph.update(new_feed)
         self.on_update()
 
+    def _attach(self, symbol_manager):
+        """Take note of the symbol manager the subscriber was added to."""
+        self._manager = symbol_manager
+
+    def _detach(self, symbol_manager):
+        """Forget the symbol manager the subscriber was removed from."""
+        self._manager = None
+
     @abstractmethod
     def on_update(self):
         """Run user-defined logic as a result of a feed update."""
@@ -53,6 +75,14 @@ class SymbolSubscriber(ABC):
         """
         return self._period
 
+    @property
+    def provisional(self):
+        """Return whether the most recent candle in the feed is still forming.
+
+        :rtype: bool
+        """
+        return self._provisional
+
     @property
     def feed(self):
         """Get the feed requested by this subscriber.
@@ -62,6 +92,16 @@ class SymbolSubscriber(ABC):
         """
         return self._feed
 
+    @property
+    def lookback(self):
+        """Return the number of candles before the most recent one that this subscriber needs in its feed.
+
+        :return: The largest of LOOKBACK and the lookback of every registered indicator, including the indicators it is
+            calculated on
+        :rtype: int
+        """
+        return max(self.LOOKBACK, self._graph.lookback)
+
     @property
     def indicators(self):
         """Return the indicator instance registered to a particular name.
@@ -69,32 +109,29 @@ class SymbolSubscriber(ABC):
         :returns: The underlying indicator data store, which is a dict of (name -> Indicator instance)
         :rtype: dict
         """
-        return self._indicators
+        return self._graph.indicators
 
-    def register_indicator(self, name, indicator):
+    def register_indicator(self, name, indicator, source=None, fields=None):
         """Register an indicator to apply to this feed.
 
         :param str name: A unique name to indentify this indicator. For example, "sma_14"
         :param Indicator indicator: A indicator instance to register for this feed.
+        :param str source: The name of a registered indicator to calculate this indicator on, such as "rsi" for an SMA of
+            the RSI. If None, the indicator is calculated on the feed.
+        :param fields: How to build candles from the result of the source. See IndicatorGraph.add().
         """
-        if not isinstance(indicator, Indicator):
-            raise TypeError(
-                f"Param 'indicator' must be of type Indicator. Got {type(indicator)}"
-            )
-        if name in self._indicators:
-            raise ValueError(
-                f"There is already an indicator named '{name}' registered."
-            )
-
-        self._indicators[name] = indicator
-        indicator._update(self)
+        self._graph.add(name, indicator, source, fields)
+        if self._manager is not None:
+            self._manager.fit_feed(self._symbol, self._period)
+        if self._feed is not None:
+            self._graph.update(self._feed)
 
     def unregister_indicator(self, name):
         """Unregister an indicator from the feed.
 
-        :param str name: The registered name of the indicator
+        :param str name: The registered name of the indicator. Indicators calculated on it must be unregistered first.
         """
         try:
-            del self._indicators[name]
+            self._graph.remove(name)
         except KeyError:
             pass
@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Class to implement an in-process cache with time-based expiry and least-recently-used eviction.
+
+    Every entry has a size, as reported by the sizeof callable. When the total size of all entries exceeds max_size,
+    the least recently used entries are evicted until the cache fits within its budget again.
+
+    .. note::
+        All operations are protected by a lock, so a single cache may be shared between threads.
+    """
+
+    def __init__(self, ttl, max_size, sizeof=None, clock=time.time):
+        """Initialize the cache.
+
+        :param float ttl: The default number of seconds an entry remains valid after it is stored
+        :param int max_size: The total size budget of the cache, in the units returned by sizeof
+        :param callable sizeof: A function returning the size of a value. If None, every entry has a size of 1
+        :param callable clock: A function returning the current time in seconds
+        """
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1. Got {max_size}")
+
+        self._ttl = ttl
+        self._max_size = max_size
+        self._sizeof = sizeof if sizeof is not None else (lambda value: 1)
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of entries in the cache, including any that have expired but not been evicted."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Return True if a valid entry is stored for the key."""
+        with self._lock:
+            return self._lookup(key) is not None
+
+    @property
+    def size(self):
+        """Return the total size of all entries in the cache.
+
+        :rtype: int
+        """
+        return self._size
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        # Drop the entry if it has expired
+        if entry[0] <= self._clock():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def get(self, key, default=None):
+        """Return the value stored for the key.
+
+        :param key: The key to look up
+        :param default: The value to return if there is no valid entry for the key
+        :return: The cached value, or default
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return default
+            return entry[1]
+
+    def put(self, key, value, ttl=None, expires=None):
+        """Store a value in the cache.
+
+        :param key: The key to store the value under
+        :param value: The value to store
+        :param float ttl: The number of seconds the entry remains valid. If None, the cache's default is used
+        :param float expires: An absolute expiry time, in the units of the cache clock. Overrides ttl if provided
+
+        .. note::
+            A value that is larger than the entire budget of the cache is not stored.
+        """
+        if expires is None:
+            expires = self._clock() + (self._ttl if ttl is None else ttl)
+        size = self._sizeof(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self._max_size:
+                return
+
+            self._entries[key] = (expires, value, size)
+            self._size += size
+
+            # Evict least recently used entries until we're back under budget
+            while self._size > self._max_size:
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key, default=None):
+        """Remove an entry from the cache and return its value.
+
+        :param key: The key to remove
+        :param default: The value to return if there is no valid entry for the key
+        :return: The cached value, or default
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[1]
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,35 @@
+import importlib
+
+
+def lazy_exports(namespace, exports):
+    """Build the module-level __getattr__ and __dir__ of a package whose exports are imported on first use.
+
+    Example, in a package's __init__.py::
+
+        __getattr__, __dir__ = lazy_exports(globals(), {"CandleSeries": ".candle_series"})
+
+    :param dict namespace: The globals of the package's __init__.py
+    :param dict exports: The exported names, as (name -> module that defines it). Relative module names are resolved
+        against the package.
+    :return: The __getattr__ and __dir__ functions for the package
+    :rtype: tuple(callable, callable)
+    """
+    package = namespace["__name__"]
+
+    def __getattr__(name):
+        try:
+            module = exports[name]
+        except KeyError:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}"
+            ) from None
+
+        value = getattr(importlib.import_module(module, package), name)
+        # Cache the value, so later lookups don't go through this hook
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
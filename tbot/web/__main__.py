@@ -1,3 +1,4 @@
+import argparse
 import logging
 
 from tbot.util import log
@@ -7,6 +8,12 @@ from . import api
 
 def main():
     """Application entry point."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--asgi", action="store_true", help="Serve the API with the async server"
+    )
+    args = parser.parse_args()
+
     # Enable logging
     log.setup_logging()
     log.disable_sublogger("urllib3")
@@ -15,7 +22,12 @@ def main():
     # TODO
     logging.debug("Launching main application")
 
-    api.run()
+    if args.asgi:
+        from . import asgi
+
+        asgi.run()
+    else:
+        api.run()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,23 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import numpy as np
 import pytz
-import yfinance as yf
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 
-from tbot.candles import Candle, CandleSeries
+from tbot.candles import CandlePeriod, CandleSeries
 from tbot.indicators.sr import HorizontalSR
 from tbot.util import log
+from tbot.util.cache import TTLCache
+
+from .stream import StreamHub
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 log.disable_sublogger("yfinance")
 log.disable_sublogger("peewee")
@@ -26,6 +37,23 @@ times = {}
 for k, v in periods.items():
     times[v] = k
 
+# The candles are from US exchanges, whose regular session opens at 9:30 Eastern
+EXCHANGE_TZ = pytz.timezone("US/Eastern")
+SESSION_START = timedelta(hours=9, minutes=30)
+
+# Support/resistance is calculated on daily candles
+SR_PERIOD = timedelta(days=1)
+
+CHART_COLUMNS = ["time", "open", "high", "low", "close"]
+
+# Downloads and responses are cached until a new candle is due
+CACHE_MAX_ENTRIES = 512
+_cache = TTLCache(0, CACHE_MAX_ENTRIES)
+_executor = ThreadPoolExecutor(max_workers=8)
+
+# Set by attach_manager when live feeds are available
+_hub = None
+
 
 def get_market_ohlc(symbol, end_dt, period):
     """Return YFinance's market OHLC for the symbol.
@@ -58,7 +86,9 @@ def get_market_ohlc(symbol, end_dt, period):
         timedelta(weeks=1): timedelta(days=3 * 365),
     }
 
-    # Download hourly candles from yfinance
+    # Download hourly candles from yfinance. It is imported here because it is slow to import.
+    import yfinance as yf
+
     end_dt += timedelta(days=1)
     data = yf.download(
         [symbol],
@@ -71,28 +101,28 @@ def get_market_ohlc(symbol, end_dt, period):
     # This is done because for some reason yfinance returns inconsistent timezone
     # information.
     data = data.tz_localize(None)
-    data = data.tz_localize(pytz.timezone("US/Eastern"))
+    data = data.tz_localize(EXCHANGE_TZ)
 
     # Convert to the candles data structure
-    candles = []
-    for index, row in data.iterrows():
-        candles.append(
-            Candle(
-                period,
-                index.to_pydatetime(),
-                row["Open"],
-                row["High"],
-                row["Low"],
-                row["Close"],
-                row["Volume"],
-            )
-        )
-    return CandleSeries(period, candles, len(candles))
-
-
-def run():
-    """Start the Flask API web server."""
-    app.run(host="localhost", port=8081, debug=True)
+    return CandleSeries.from_dataframe(CandlePeriod.from_timedelta(period), data)
+
+
+def attach_manager(mgr, indicators=None):
+    """Stream live feeds from a symbol manager through the /stream route.
+
+    :param SymbolManager mgr: The symbol manager holding the live feeds
+    :param dict indicators: A dictionary of (name -> callable) returning an Indicator to stream alongside each feed
+    """
+    global _hub
+    _hub = StreamHub(mgr, indicators=indicators)
+
+
+def run(debug=True):
+    """Start the Flask API web server.
+
+    :param bool debug: Run the server in debug mode. This must be False if the server isn't run from the main thread.
+    """
+    app.run(host="localhost", port=8081, debug=debug, threaded=True)
 
 
 @app.route("/")
@@ -101,44 +131,223 @@ def root():
     return jsonify({"msg": "Hello API"})
 
 
-@app.route("/trade", methods=["POST"])
-def trade():
-    """Trade API route."""
-    params = request.json
+def _next_bar_due(period, now):
+    """Return the time the next candle of a period is due to open, as a unix timestamp.
 
-    # Download daily candles to use for support/resistance
-    sr_pd = timedelta(days=1)
-    candles_sr = get_market_ohlc(params["symbol"], datetime.now(), sr_pd)
+    Candles are aligned to the exchange session, so hourly candles open at 9:30, 10:30 and so on Eastern time, daily
+    candles when the session opens and weekly candles on Monday.
 
-    # Download candles for requested timeframe
-    candles_req = get_market_ohlc(
-        params["symbol"], datetime.now(), times[params["timeframe"]]
-    )
-    candles_req_chart = []
-    for c in candles_req:
-        candles_req_chart.append(
-            {
-                # Note that lightweight charts needs the utc offset to correctly display time
-                "time": c.time.timestamp() + c.time.utcoffset().total_seconds(),
-                "open": c.open,
-                "high": c.high,
-                "low": c.low,
-                "close": c.close,
-            }
-        )
+    :param timedelta period: The candle period
+    :param datetime now: The current time
+    :rtype: float
+    """
+    _, end = CandlePeriod.from_timedelta(period).span(now, EXCHANGE_TZ, SESSION_START)
+    return end.timestamp()
+
+
+def get_candles(symbol, period):
+    """Return the candles for a symbol, downloading them only if a new candle is due since they were cached.
+
+    :param str symbol: The symbol to request
+    :param timedelta period: The candle period
+    :rtype: CandleSeries
+    """
+    key = ("candles", symbol, period)
+    candles = _cache.get(key)
+    if candles is None:
+        now = datetime.now()
+        candles = get_market_ohlc(symbol, now, period)
+        _cache.put(key, candles, expires=_next_bar_due(period, now))
+    return candles
+
+
+def get_levels(symbol, candles_sr):
+    """Return the support/resistance levels of a symbol, calculating them only once per daily candle.
+
+    :param str symbol: The symbol the candles belong to
+    :param CandleSeries candles_sr: Daily candles to calculate the levels on
+    :rtype: list[float]
+    """
+    key = ("s_r", symbol, candles_sr.last.time)
+    levels = _cache.get(key)
+    if levels is None:
+        s_r = HorizontalSR()
+        s_r._update(candles_sr)
+        levels = list(s_r.last)
+        _cache.put(key, levels, expires=_next_bar_due(SR_PERIOD, datetime.now()))
+    return levels
+
+
+def get_cached_chart(symbol, timeframe):
+    """Return the cached chart data for a symbol and timeframe.
+
+    :param str symbol: The symbol to chart
+    :param str timeframe: The candle period to chart, as a yfinance interval string
+    :return: The chart data, or None if it isn't cached. See get_chart for the format.
+    :rtype: dict
+    """
+    return _cache.get(("chart", symbol, times[timeframe]))
+
+
+def get_chart(symbol, timeframe):
+    """Return the chart data for a symbol and timeframe in columnar form.
+
+    :param str symbol: The symbol to chart
+    :param str timeframe: The candle period to chart, as a yfinance interval string
+    :return: A dictionary containing a numpy array for each of "time", "open", "high", "low" and "close", the list of
+        support/resistance levels visible in the candles as "s_r", and an "etag" identifying this version of the data
+    :rtype: dict
+
+    .. note::
+        Chart data is cached until the next candle of the requested timeframe is due.
+    """
+    chart = get_cached_chart(symbol, timeframe)
+    if chart is not None:
+        return chart
+
+    # Download daily candles to use for support/resistance, and candles for the requested timeframe, at the same time
+    sr_future = _executor.submit(get_candles, symbol, SR_PERIOD)
+    req_future = _executor.submit(get_candles, symbol, times[timeframe])
+    return build_chart(symbol, timeframe, sr_future.result(), req_future.result())
+
+
+def build_chart(symbol, timeframe, candles_sr, candles_req):
+    """Build and cache the chart data for a symbol and timeframe from downloaded candles.
+
+    :param str symbol: The symbol to chart
+    :param str timeframe: The candle period to chart, as a yfinance interval string
+    :param CandleSeries candles_sr: Daily candles to calculate support/resistance on
+    :param CandleSeries candles_req: Candles of the requested timeframe
+    :return: The chart data. See get_chart for the format.
+    :rtype: dict
+    """
+    # Note that lightweight charts needs the utc offset to correctly display time
+    chart = {
+        "time": np.array(
+            [
+                c.time.timestamp() + c.time.utcoffset().total_seconds()
+                for c in candles_req
+            ]
+        ),
+        "open": np.array([c.open for c in candles_req], dtype=np.float64),
+        "high": np.array([c.high for c in candles_req], dtype=np.float64),
+        "low": np.array([c.low for c in candles_req], dtype=np.float64),
+        "close": np.array([c.close for c in candles_req], dtype=np.float64),
+    }
 
     # Calculate Support/Resistance, keeping lines only visible in the requested timeframe
-    candles_sr.register_indicator("s_r", HorizontalSR())
     s_r = []
-    filter_min = min([c.low for c in candles_req])
-    filter_max = max([c.high for c in candles_req])
+    filter_min = chart["low"].min()
+    filter_max = chart["high"].max()
     filter_min -= 0.01 * filter_min
     filter_max += 0.01 * filter_max
-    for sr_line in candles_sr.indicators["s_r"].last:
+    for sr_line in get_levels(symbol, candles_sr):
         if sr_line >= filter_min and sr_line <= filter_max:
-            s_r.append(sr_line)
+            s_r.append(float(sr_line))
+    chart["s_r"] = s_r
+
+    # The ETag identifies the full contents of the chart
+    digest = hashlib.blake2b(digest_size=16)
+    for col in CHART_COLUMNS:
+        digest.update(chart[col].tobytes())
+    digest.update(np.asarray(s_r, dtype=np.float64).tobytes())
+    chart["etag"] = f'"{digest.hexdigest()}"'
+
+    period = times[timeframe]
+    _cache.put(
+        ("chart", symbol, period),
+        chart,
+        expires=_next_bar_due(period, datetime.now()),
+    )
+
+    return chart
+
+
+def _dumps(obj):
+    """Serialize an object containing numpy arrays to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    # numpy arrays and scalars both support tolist()
+    return json.dumps(obj, default=lambda o: o.tolist()).encode()
+
+
+def render_chart(chart, since=None, if_none_match=None):
+    """Render chart data as a JSON response body.
+
+    :param dict chart: The chart data, as returned by get_chart
+    :param float since: If provided, only candles with a time at or after this value are included. This is the "time"
+        of the most recent candle the client already has, which is resent in case it changed.
+    :param str if_none_match: The ETag of the data the client already has, if any
+    :return: A tuple of (HTTP status, response body, ETag). The body is None when the status is 304.
+    :rtype: tuple
+
+    .. note::
+        Candles are returned in columnar form, as {"time": [...], "open": [...], ...}.
+    """
+    etag = chart["etag"]
+    if if_none_match is not None and etag in [
+        t.strip() for t in if_none_match.split(",")
+    ]:
+        return 304, None, etag
+
+    start = 0
+    if since is not None:
+        start = int(np.searchsorted(chart["time"], float(since), side="left"))
+
+    candles = {col: chart[col][start:] for col in CHART_COLUMNS}
+    body = _dumps({"candles": candles, "s_r": chart["s_r"], "since": since})
+    return 200, body, etag
+
+
+def render_trade(symbol, timeframe, since=None, if_none_match=None):
+    """Render the chart data for a symbol and timeframe as a JSON response body.
+
+    :param str symbol: The symbol to chart
+    :param str timeframe: The candle period to chart, as a yfinance interval string
+    :param float since: If provided, only candles with a time at or after this value are included
+    :param str if_none_match: The ETag of the data the client already has, if any
+    :return: A tuple of (HTTP status, response body, ETag). The body is None when the status is 304.
+    :rtype: tuple
+    """
+    return render_chart(
+        get_chart(symbol, timeframe), since=since, if_none_match=if_none_match
+    )
+
+
+@app.route("/trade", methods=["POST"])
+def trade():
+    """Trade API route.
+
+    The JSON body must contain "symbol" and "timeframe", and may contain "since" to only receive recent candles. Clients
+    may also send an If-None-Match header with the ETag of a previous response.
+    """
+    params = request.json
+    status, body, etag = render_trade(
+        params["symbol"],
+        params["timeframe"],
+        since=params.get("since"),
+        if_none_match=request.headers.get("If-None-Match"),
+    )
+    return Response(
+        body, status=status, mimetype="application/json", headers={"ETag": etag}
+    )
+
 
-    # Construct response
-    resp = {"candles": candles_req_chart, "s_r": s_r}
+@app.route("/stream/<path:symbol>/<period>")
+def stream(symbol, period):
+    """Stream live candles and indicator values for a feed as Server-Sent Events."""
+    if _hub is None:
+        return jsonify({"msg": "Live feeds are not available"}), 503
 
-    return jsonify(resp)
+    try:
+        candle_period = CandlePeriod(period)
+    except (KeyError, ValueError):
+        return jsonify({"msg": f"Unknown period {period}"}), 400
+
+    client = _hub.subscribe(symbol, candle_period)
+    return Response(
+        _hub.events(client),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,206 @@
+"""ASGI application serving the same routes as the Flask API.
+
+Data fetches are awaited on an I/O thread pool, and CPU work such as support/resistance and payload building runs on a
+separate bounded pool, so the event loop is never blocked by a slow download. Run it with any ASGI server, such as
+``uvicorn tbot.web.asgi:app``, or with run().
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+from tbot.candles import CandlePeriod
+
+from . import api
+
+IO_WORKERS = 32
+CPU_WORKERS = os.cpu_count() or 4
+
+# The number of seconds without updates after which a stream sends a keepalive comment
+STREAM_KEEPALIVE = 15.0
+
+_io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS)
+_cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS)
+
+
+async def _read_body(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def _respond(send, status, body=b"", headers=None):
+    response_headers = [(b"content-type", b"application/json")]
+    for name, value in (headers or {}).items():
+        response_headers.append((name.encode(), value.encode()))
+    response_headers.append((b"content-length", str(len(body)).encode()))
+
+    await send(
+        {"type": "http.response.start", "status": status, "headers": response_headers}
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _header(scope, name):
+    name = name.lower().encode()
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode()
+    return None
+
+
+async def get_chart(symbol, timeframe):
+    """Return the chart data for a symbol and timeframe without blocking the event loop.
+
+    :param str symbol: The symbol to chart
+    :param str timeframe: The candle period to chart, as a yfinance interval string
+    :return: The chart data. See tbot.web.api.get_chart for the format.
+    :rtype: dict
+    """
+    chart = api.get_cached_chart(symbol, timeframe)
+    if chart is not None:
+        return chart
+
+    # Download both sets of candles at the same time
+    loop = asyncio.get_running_loop()
+    candles_sr, candles_req = await asyncio.gather(
+        loop.run_in_executor(_io_executor, api.get_candles, symbol, api.SR_PERIOD),
+        loop.run_in_executor(
+            _io_executor, api.get_candles, symbol, api.times[timeframe]
+        ),
+    )
+    return await loop.run_in_executor(
+        _cpu_executor, api.build_chart, symbol, timeframe, candles_sr, candles_req
+    )
+
+
+async def root(scope, receive, send):
+    """Root API route."""
+    await _respond(send, 200, json.dumps({"msg": "Hello API"}).encode())
+
+
+async def trade(scope, receive, send):
+    """Trade API route. See tbot.web.api.trade."""
+    params = json.loads(await _read_body(receive))
+    chart = await get_chart(params["symbol"], params["timeframe"])
+
+    loop = asyncio.get_running_loop()
+    status, body, etag = await loop.run_in_executor(
+        _cpu_executor,
+        api.render_chart,
+        chart,
+        params.get("since"),
+        _header(scope, "If-None-Match"),
+    )
+    await _respond(send, status, body or b"", headers={"ETag": etag})
+
+
+async def stream(scope, receive, send, symbol, period):
+    """Stream live candles and indicator values for a feed as Server-Sent Events. See tbot.web.api.stream."""
+    if api._hub is None:
+        await _respond(
+            send, 503, json.dumps({"msg": "Live feeds are not available"}).encode()
+        )
+        return
+
+    try:
+        candle_period = CandlePeriod(period)
+    except (KeyError, ValueError):
+        await _respond(
+            send, 400, json.dumps({"msg": f"Unknown period {period}"}).encode()
+        )
+        return
+
+    # Set whenever a message is buffered for the client, or the client disconnects
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    disconnected = False
+
+    async def watch_disconnect():
+        nonlocal disconnected
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        disconnected = True
+        wakeup.set()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+
+    # Messages are buffered on the thread that updates the feed, so the event is set on the loop's thread
+    client = api._hub.subscribe(
+        symbol, candle_period, on_put=lambda: loop.call_soon_threadsafe(wakeup.set)
+    )
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                ],
+            }
+        )
+
+        # Wait on the event rather than blocking a thread on the client buffer for every connection
+        while not disconnected:
+            # Clear before reading, so a message buffered after the read sets the event again
+            wakeup.clear()
+            msg = client.get(timeout=0)
+            if msg is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), STREAM_KEEPALIVE)
+                    continue
+                except asyncio.TimeoutError:
+                    msg = b": keepalive\n\n"
+
+            await send({"type": "http.response.body", "body": msg, "more_body": True})
+
+    finally:
+        watcher.cancel()
+        api._hub.unsubscribe(client)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application entry point."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    path = scope["path"]
+    method = scope["method"]
+    if path == "/" and method == "GET":
+        await root(scope, receive, send)
+    elif path == "/trade" and method == "POST":
+        await trade(scope, receive, send)
+    elif path.startswith("/stream/") and method == "GET":
+        # The symbol may itself contain slashes, so the period is the last path component
+        symbol, _, period = unquote(path[len("/stream/") :]).rpartition("/")
+        await stream(scope, receive, send, symbol, period)
+    else:
+        await _respond(send, 404, json.dumps({"msg": "Not found"}).encode())
+
+
+def run(host="localhost", port=8081):
+    """Start the ASGI web server.
+
+    .. note::
+        This requires uvicorn to be installed.
+    """
+    import uvicorn
+
+    uvicorn.run(app, host=host, port=port)
@@ -9,6 +9,21 @@ const textColor = 'white'
 const areaTopColor = '#2962FF'
 const areaBottomColor = 'rgba(41, 98, 255, 0.28)'
 
+// The API returns candles as columns, while lightweight charts expects one object per candle
+function toCandles(columns) {
+  const candles = []
+  for (let i = 0; i < columns["time"].length; i++) {
+    candles.push({
+      time: columns["time"][i],
+      open: columns["open"][i],
+      high: columns["high"][i],
+      low: columns["low"][i],
+      close: columns["close"][i],
+    })
+  }
+  return candles
+}
+
 export default class Chart extends React.Component {
   state = {
     symbol: "/ES=F",
@@ -79,11 +94,12 @@ export default class Chart extends React.Component {
     chart.timeScale().fitContent();
 
     // Add candles
+    const candles = toCandles(data["candles"])
     const series = chart.addCandlestickSeries({
       upColor: '#26a69a', downColor: '#ef5350', borderVisible: false,
       wickUpColor: '#26a69a', wickDownColor: '#ef5350',
     });
-    series.setData(data["candles"]);
+    series.setData(candles);
 
     // Add horizontal support and resistance
     for (let i = 0; i < data["s_r"].length; i++) {
@@ -96,7 +112,7 @@ export default class Chart extends React.Component {
       });
     }
 
-    series.setData(data["candles"]);
+    series.setData(candles);
     chart.timeScale().fitContent();
 
     // Save the chart
@@ -0,0 +1,182 @@
+"""Load test of the web API against a stubbed data source.
+
+Requests are issued in-process, so the results measure the serving path rather than the network. Example::
+
+    python -m tbot.web.loadtest --mode asgi --requests 2000 --concurrency 64 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytz
+
+from tbot.candles import Candle, CandlePeriod, CandleSeries
+from tbot.util.cache import TTLCache
+
+from . import api
+
+TIMEFRAMES = ["1m", "5m", "15m", "1h", "1d"]
+
+
+def stub_market_ohlc(latency):
+    """Return a replacement for api.get_market_ohlc that generates candles instead of downloading them.
+
+    :param float latency: The number of seconds each call blocks for, to simulate a download
+    :rtype: callable
+    """
+    tz = pytz.timezone("US/Eastern")
+
+    def get_market_ohlc(symbol, end_dt, period):
+        time.sleep(latency)
+
+        # Generate a deterministic random walk for each symbol and period. hash() of a string changes between processes.
+        rng = np.random.default_rng(zlib.crc32(f"{symbol}_{period}".encode()))
+        n = 1000
+        close = 100.0 + np.cumsum(rng.normal(0, 1, n))
+        spread = np.abs(rng.normal(0, 0.5, n))
+        candle_period = CandlePeriod.from_timedelta(period)
+        start = tz.localize(end_dt.replace(tzinfo=None)) - n * period
+
+        candles = [
+            Candle(
+                candle_period,
+                start + i * period,
+                close[i - 1] if i > 0 else close[i],
+                close[i] + spread[i],
+                close[i] - spread[i],
+                close[i],
+                1000,
+            )
+            for i in range(n)
+        ]
+        return CandleSeries(candle_period, candles, n)
+
+    return get_market_ohlc
+
+
+def _requests(count, symbols):
+    rng = random.Random(0)
+    return [
+        {"symbol": f"SYM{rng.randrange(symbols)}", "timeframe": rng.choice(TIMEFRAMES)}
+        for _ in range(count)
+    ]
+
+
+async def _run_asgi(params_list, concurrency):
+    from .asgi import app
+
+    latencies = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(params):
+        nonlocal errors
+        body = json.dumps(params).encode()
+        status = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        scope = {"type": "http", "method": "POST", "path": "/trade", "headers": []}
+        async with sem:
+            start = time.perf_counter()
+            await app(scope, receive, send)
+            latencies.append(time.perf_counter() - start)
+        if status[0] != 200:
+            errors += 1
+
+    await asyncio.gather(*[one(p) for p in params_list])
+    return latencies, errors
+
+
+def _run_wsgi(params_list, concurrency):
+    client = api.app.test_client()
+
+    def one(params):
+        start = time.perf_counter()
+        status = client.post("/trade", json=params).status_code
+        return time.perf_counter() - start, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, params_list))
+
+    return [r[0] for r in results], sum(1 for r in results if r[1] != 200)
+
+
+def run(
+    mode="asgi", requests=1000, concurrency=32, latency=0.1, symbols=50, cold=False
+):
+    """Run the load test.
+
+    :param str mode: "asgi" to test the async server, or "wsgi" to test the Flask server
+    :param int requests: The total number of requests to make
+    :param int concurrency: The maximum number of requests in flight at once
+    :param float latency: The number of seconds each stubbed download takes
+    :param int symbols: The number of distinct symbols to request
+    :param bool cold: If True, the response cache is disabled so every request downloads and rebuilds its chart
+    :return: A JSON-serializable dictionary of the results
+    :rtype: dict
+
+    .. note::
+        The data source and response cache of the API are replaced while the test runs, and restored afterwards.
+    """
+    get_market_ohlc, cache = api.get_market_ohlc, api._cache
+    api.get_market_ohlc = stub_market_ohlc(latency)
+    api._cache = TTLCache(0, 1 if cold else api.CACHE_MAX_ENTRIES)
+    params_list = _requests(requests, symbols)
+
+    try:
+        start = time.perf_counter()
+        if mode == "asgi":
+            latencies, errors = asyncio.run(_run_asgi(params_list, concurrency))
+        else:
+            latencies, errors = _run_wsgi(params_list, concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        api.get_market_ohlc, api._cache = get_market_ohlc, cache
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed": elapsed,
+        "requests_per_sec": requests / elapsed,
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p99": float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["asgi", "wsgi"], default="asgi")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--cold", action="store_true")
+    args = parser.parse_args()
+
+    result = run(
+        mode=args.mode,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        latency=args.latency,
+        symbols=args.symbols,
+        cold=args.cold,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import json
+import math
+import queue
+import threading
+
+from tbot.symbol_manager import SymbolSubscriber
+from tbot.util import log
+
+LOGGER = log.get_logger()
+
+# The number of messages buffered for each client before the oldest are dropped
+CLIENT_BUFFER_SIZE = 256
+
+
+def _jsonable(value):
+    """Convert an indicator value into something the json module can serialize."""
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    if isinstance(value, float):
+        # NaN isn't valid JSON, and TA-Lib uses it for values that haven't warmed up
+        return None if math.isnan(value) else value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
+
+
+class StreamClient:
+    """Class to buffer feed messages for a single streaming client.
+
+    The buffer is bounded. If the client falls behind, the oldest messages are dropped so it can't back up the feed.
+    """
+
+    def __init__(self, key, maxsize=CLIENT_BUFFER_SIZE, on_put=None):
+        """Initialize the client buffer.
+
+        :param str key: The key of the feed the client is subscribed to
+        :param int maxsize: The maximum number of messages to buffer
+        :param callable on_put: A function called with no arguments after each message is buffered, on the thread that
+            updated the feed. This lets an event loop wait for messages rather than blocking a thread on get().
+        """
+        self.key = key
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._on_put = on_put
+
+    def put(self, msg):
+        """Add a message to the buffer without blocking, dropping the oldest message if the buffer is full.
+
+        :param bytes msg: The message to send to the client
+        """
+        while True:
+            try:
+                self._queue.put_nowait(msg)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        if self._on_put is not None:
+            self._on_put()
+
+    def get(self, timeout=None):
+        """Return the next message for the client.
+
+        :param float timeout: The number of seconds to wait for a message
+        :return: The next message, or None if no message arrived before the timeout
+        :rtype: bytes
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class FeedBroadcaster(SymbolSubscriber):
+    """Subscriber that forwards every update of a feed to any number of streaming clients.
+
+    Each update is serialized once, then handed to every client's buffer. A client that connects to a feed that already
+    has candles is first sent the most recent candle, rather than waiting for the next update.
+    """
+
+    INTRABAR = True
+
+    def __init__(self, symbol, period, indicators=None):
+        """Initialize the broadcaster.
+
+        :param str symbol: The symbol of interest
+        :param CandlePeriod period: The time period the feed will be delimited by
+        :param dict indicators: A dictionary of (name -> callable) returning an Indicator to register on the feed. The last
+            value of each indicator is included in every message.
+        """
+        super().__init__(symbol, period)
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._last_msg = None
+        for name, factory in (indicators or {}).items():
+            self.register_indicator(name, factory())
+
+    def __len__(self):
+        """Return the number of connected clients."""
+        return len(self._clients)
+
+    def add_client(self, client):
+        """Start forwarding updates to a client.
+
+        :param StreamClient client: The client to add
+        """
+        with self._lock:
+            self._clients.add(client)
+            if self._last_msg is not None:
+                client.put(self._last_msg)
+
+    def remove_client(self, client):
+        """Stop forwarding updates to a client.
+
+        :param StreamClient client: The client to remove
+        """
+        with self._lock:
+            self._clients.discard(client)
+
+    def _attach(self, symbol_manager):
+        """Send the current state of the feed to the clients once the broadcaster is subscribed to it."""
+        super()._attach(symbol_manager)
+        symbol_manager.notify(self)
+
+    def on_update(self):
+        """Send the most recent candle and indicator values to every client."""
+        with self._lock:
+            if len(self._clients) == 0:
+                self._last_msg = None
+                return
+
+        msg = {
+            "symbol": self.symbol,
+            "period": str(self.period),
+            "provisional": self.provisional,
+            "candle": self.feed.last.to_json_dict(),
+            "indicators": {
+                name: _jsonable(ind.last) for name, ind in self.indicators.items()
+            },
+        }
+        data = f"data: {json.dumps(msg)}\n\n".encode()
+        with self._lock:
+            self._last_msg = data
+            clients = list(self._clients)
+        for client in clients:
+            client.put(data)
+
+
+class StreamHub:
+    """Class to share feed subscriptions from a symbol manager among streaming clients.
+
+    Only one broadcaster is subscribed to the symbol manager per feed, no matter how many clients are connected to it.
+    """
+
+    def __init__(self, mgr, indicators=None, buffer_size=CLIENT_BUFFER_SIZE):
+        """Initialize the hub.
+
+        :param SymbolManager mgr: The symbol manager to stream feeds from
+        :param dict indicators: A dictionary of (name -> callable) returning an Indicator to stream alongside each feed
+        :param int buffer_size: The maximum number of messages buffered for each client
+        """
+        self.mgr = mgr
+        self.indicators = indicators
+        self.buffer_size = buffer_size
+        self._broadcasters = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, symbol, period, on_put=None):
+        """Connect a new client to a feed.
+
+        :param str symbol: The symbol of the feed
+        :param CandlePeriod period: The period of the feed
+        :param callable on_put: A function called after each message is buffered for the client. See StreamClient.
+        :return: The client, which receives a message for every update to the feed
+        :rtype: StreamClient
+        """
+        key = self.mgr._to_key(symbol, period)
+        client = StreamClient(key, maxsize=self.buffer_size, on_put=on_put)
+        with self._lock:
+            broadcaster = self._broadcasters.get(key)
+            if broadcaster is None:
+                # The client is added first, so it receives the snapshot sent when the broadcaster subscribes
+                broadcaster = FeedBroadcaster(symbol, period, self.indicators)
+                broadcaster.add_client(client)
+                self.mgr.add_subscriber(broadcaster)
+                self._broadcasters[key] = broadcaster
+            else:
+                broadcaster.add_client(client)
+
+        return client
+
+    def unsubscribe(self, client):
+        """Disconnect a client from its feed.
+
+        :param StreamClient client: The client to disconnect
+        """
+        with self._lock:
+            broadcaster = self._broadcasters.get(client.key)
+            if broadcaster is None:
+                return
+            broadcaster.remove_client(client)
+
+            # Stop listening to the feed once the last client leaves
+            if len(broadcaster) == 0:
+                self.mgr.remove_subscriber(broadcaster)
+                del self._broadcasters[client.key]
+
+        if client.dropped > 0:
+            LOGGER.debug(f"Client of {client.key} dropped {client.dropped} messages")
+
+    def events(self, client, keepalive=15.0):
+        """Generate Server-Sent Events for a client until it disconnects.
+
+        :param StreamClient client: The client to generate events for
+        :param float keepalive: The number of seconds without updates after which a keepalive comment is sent
+        """
+        try:
+            while True:
+                msg = client.get(timeout=keepalive)
+                yield msg if msg is not None else b": keepalive\n\n"
+        finally:
+            self.unsubscribe(client)
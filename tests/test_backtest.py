@@ -0,0 +1,42 @@
+import numpy as np
+
+from tbot.backtest import BacktestEngine, Strategy
+from tbot.benchmark import synthetic_arrays
+from tbot.candles import CandlePeriod
+
+HOUR = CandlePeriod("1h")
+DAY = CandlePeriod("1d")
+
+
+class _OrderLog(Strategy):
+    """Strategy that flips its position on every update and records when each order was placed."""
+
+    def __init__(self, symbol, period):
+        """Initialize the strategy."""
+        super().__init__(symbol, period)
+        self.placed = []
+
+    def on_update(self):
+        """Flip the position and record the order time."""
+        order = self.order_target(1 if self.position <= 0 else -1)
+        if order is not None:
+            self.placed.append(order.time_ms)
+
+
+def test_multi_period_fills_never_precede_orders():
+    """Orders from an hourly strategy never fill on a daily candle that opened before they were placed."""
+    engine = BacktestEngine(max_candles=50)
+    engine.add_feed("SYM", HOUR, synthetic_arrays(24 * 10, HOUR))
+    engine.add_feed("SYM", DAY, synthetic_arrays(10, DAY, seed=1))
+    strategy = _OrderLog("SYM", HOUR)
+    engine.add_strategy(strategy)
+    result = engine.run()
+
+    fills = result.trades["time"]
+    assert len(fills) > 0
+    assert np.all(np.diff(fills) > 0)
+
+    # Every order fills on the next hourly candle, which opens as the candle it was placed on closes
+    placed = np.asarray(strategy.placed[: len(fills)])
+    assert np.all(fills >= placed)
+    np.testing.assert_array_equal(fills, placed)
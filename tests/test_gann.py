@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from tbot.candles import Candle, CandlePeriod
+from tbot.indicators.qte.gann.gann_analysis import GannAnalysis
+from tbot.indicators.qte.gann.gann_dir import GannDir
+
+PERIOD = CandlePeriod("1d")
+START = datetime(2020, 1, 1, tzinfo=pytz.utc)
+
+
+def _candles(bars):
+    return [
+        Candle(PERIOD, START + timedelta(days=i), low, high, low, high, 1.0)
+        for i, (high, low) in enumerate(bars)
+    ]
+
+
+# A down bar, one bar inside it, and then a bar that is higher than the inside bar but still inside the down bar
+BARS = [(11.0, 6.0), (10.0, 5.0), (9.0, 6.0), (9.5, 6.5)]
+
+
+def test_single_inside_bar_starts_hoagie_by_default():
+    """By default, the bar after one inside bar is compared with the outer bar."""
+    dirs = GannAnalysis._calc_dirs(_candles(BARS))
+    assert dirs[1:] == [GannDir.DOWN, GannDir.DOWN, GannDir.DOWN]
+    assert GannAnalysis().hoagie_min_inside_bars == 1
+
+
+def test_hoagie_min_inside_bars_opt_in():
+    """With HOAGIE_MIN_INSIDE_BARS, a single inside bar doesn't start a Hoagie."""
+    dirs = GannAnalysis._calc_dirs(_candles(BARS), GannAnalysis.HOAGIE_MIN_INSIDE_BARS)
+    assert dirs[1:] == [GannDir.DOWN, GannDir.DOWN, GannDir.UP]
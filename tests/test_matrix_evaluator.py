@@ -0,0 +1,29 @@
+import numpy as np
+
+from tbot.candles import CandlePeriod
+from tbot.indicators import matrix
+from tbot.symbol_manager.matrix_evaluator import MatrixEvaluator
+
+PERIOD = CandlePeriod("1m")
+
+
+def test_history_keeps_most_recent_rows():
+    """After more bars than the history holds, the history is the most recent rows, oldest first."""
+    n = 3
+    evaluator = MatrixEvaluator(
+        ["A", "B", "C"], PERIOD, {"close": matrix.RollingMean(1)}, history=4
+    )
+    evaluator._reset()
+    assert evaluator.values["close"].shape == (4, n)
+    assert np.isnan(evaluator.values["close"]).all()
+
+    for bar in range(10):
+        prices = {name: np.arange(n) + 10.0 * bar for name in matrix.PRICES}
+        evaluator._evaluate(bar, prices)
+        evaluator._publish()
+
+    np.testing.assert_array_equal(evaluator.times, [6, 7, 8, 9])
+    expected = 10.0 * np.arange(6, 10)[:, None] + np.arange(n)
+    np.testing.assert_array_equal(evaluator.values["close"], expected)
+    np.testing.assert_array_equal(evaluator.row("close"), expected[-1])
+    assert not evaluator.values["close"].flags.writeable
@@ -0,0 +1,54 @@
+import numpy as np
+
+from tbot.benchmark import synthetic_arrays, to_candles
+from tbot.candles import Candle, CandlePeriod, CandleSeries
+from tbot.indicators.sr import HorizontalSR
+
+PERIOD = CandlePeriod("1m")
+
+
+def _fresh(series, **kwargs):
+    indicator = HorizontalSR(**kwargs)
+    indicator._update(series)
+    return indicator.data
+
+
+def test_update_matches_fresh_calculation_while_sliding():
+    """The levels of a capped series match a fresh calculation after every new candle, once the series slides."""
+    candles = to_candles(PERIOD, synthetic_arrays(1100, PERIOD, volatility=0.002))
+    series = CandleSeries(PERIOD, candles[:50], 400)
+    indicator = HorizontalSR()
+    for candle in candles[50:]:
+        series.append(candle)
+        indicator._update(series)
+        np.testing.assert_array_equal(indicator.data, _fresh(series))
+
+
+def test_update_matches_fresh_calculation_with_forming_candles():
+    """The levels match a fresh calculation through intrabar updates, revisions and a resize of a sliding series."""
+    candles = to_candles(PERIOD, synthetic_arrays(600, PERIOD, volatility=0.002))
+    series = CandleSeries(PERIOD, candles[:50], 200)
+    indicator = HorizontalSR(window=3)
+    for i, c in enumerate(candles[50:]):
+        # The candle forms in two steps before it's complete
+        series.append(Candle(PERIOD, c.time, c.open, c.open, c.open, c.open, 0.0))
+        series.replace_last(Candle(PERIOD, c.time, c.open, c.high, c.open, c.open, 0.0))
+        indicator._update(series)
+        np.testing.assert_array_equal(indicator.data, _fresh(series, window=3))
+        series.replace_last(c)
+        indicator._update(series)
+        np.testing.assert_array_equal(indicator.data, _fresh(series, window=3))
+
+        if i % 50 == 0:
+            old = series[-4]
+            series.revise(
+                Candle(
+                    PERIOD, old.time, old.open, old.high * 1.01, old.low, old.close, 0.0
+                )
+            )
+            indicator._update(series)
+            np.testing.assert_array_equal(indicator.data, _fresh(series, window=3))
+        if i == 300:
+            series.resize(150)
+            indicator._update(series)
+            np.testing.assert_array_equal(indicator.data, _fresh(series, window=3))
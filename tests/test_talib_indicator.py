@@ -0,0 +1,21 @@
+import numpy as np
+
+from tbot.benchmark import synthetic_arrays, to_candles
+from tbot.candles import CandlePeriod, CandleSeries
+from tbot.indicators import TalibIndicator
+
+PERIOD = CandlePeriod("1m")
+
+
+def test_windowed_update_matches_fresh_calculation_while_sliding():
+    """Leading values whose window starts before the oldest candle are NaN, as in a fresh calculation."""
+    candles = to_candles(PERIOD, synthetic_arrays(700, PERIOD))
+    series = CandleSeries(PERIOD, candles[:50], 300)
+    indicator = TalibIndicator("SMA", timeperiod=10)
+    for c in candles[50:]:
+        series.append(c)
+        indicator._update(series)
+        fresh = TalibIndicator("SMA", timeperiod=10)
+        fresh._update(series)
+        np.testing.assert_allclose(indicator.data, fresh.data, rtol=1e-12)
+        assert np.isnan(indicator.data[:9]).all()